@@ -0,0 +1,172 @@
+# AIworkshop2/backtest.py
+import os
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+
+from portfolio import mean_variance_weights, TRADING_DAYS_PER_YEAR
+
+BACKTEST_ENGINES = ["equal_weight", "mean_variance", "rl"]
+BACKTEST_TRAIN_DAYS = 2 * TRADING_DAYS_PER_YEAR
+BACKTEST_TEST_DAYS = TRADING_DAYS_PER_YEAR // 4
+# Proportional transaction cost per unit of turnover, in basis points.
+BACKTEST_COST_BPS = 10.0
+BACKTEST_RL_TIMESTEPS = 2048
+
+# Set once per worker process by _init_worker, so tasks only carry window indices.
+_worker_returns: Dict[str, Any] = {}
+
+
+def walk_forward_windows(num_days: int, train_days: int = BACKTEST_TRAIN_DAYS, test_days: int = BACKTEST_TEST_DAYS) -> List[Tuple[int, int, int]]:
+    """(train_start, train_end, test_end) row indices; test windows are consecutive and never overlap."""
+    return [
+        (train_end - train_days, train_end, train_end + test_days)
+        for train_end in range(train_days, num_days - test_days + 1, test_days)
+    ]
+
+
+def _init_worker(returns: np.ndarray, columns: List[str]):
+    _worker_returns["returns"] = returns
+    _worker_returns["columns"] = columns
+    try:
+        import torch
+        torch.set_num_threads(1)  # one window per core; no intra-op oversubscription
+    except ImportError:
+        pass
+
+
+def fit_window(engine: str, window: Tuple[int, int, int], risk_aversion: float, rl_timesteps: int) -> Tuple[np.ndarray, float]:
+    """
+    Fits `engine` on the train rows only and returns its (test_days x assets) daily target weights
+    on the test rows, plus the fit + evaluation time in seconds.
+    """
+    returns, columns = _worker_returns["returns"], _worker_returns["columns"]
+    train_start, train_end, test_end = window
+    train_df = pd.DataFrame(returns[train_start:train_end], columns=columns)
+    start = time.perf_counter()
+
+    if engine == "equal_weight":
+        weights = np.full((test_end - train_end, len(columns)), 1.0 / len(columns))
+    elif engine == "mean_variance":
+        weights = np.tile(mean_variance_weights(train_df, risk_aversion), (test_end - train_end, 1))
+    elif engine == "rl":
+        from rl import train_rl_agent, test_rl_agent, PortfolioOptimizationEnv, LOOKBACK_WINDOW
+
+        model, _, _ = train_rl_agent(train_df, risk_aversion, 1.0, num_envs=1, total_timesteps=rl_timesteps)
+        # The policy sees the last LOOKBACK_WINDOW train days as its first observation, then trades the test rows.
+        test_df = pd.DataFrame(returns[train_end - LOOKBACK_WINDOW:test_end], columns=columns)
+        env = PortfolioOptimizationEnv(test_df, risk_aversion, LOOKBACK_WINDOW, 1.0)
+        test_rl_agent(model, env)
+        # weights_history[k + 1] is the allocation the policy traded on test day k.
+        weights = np.array(env.weights_history[1:], dtype=np.float64)
+    else:
+        raise ValueError(f"Unknown backtest engine '{engine}'. Use one of {BACKTEST_ENGINES}.")
+    return weights, time.perf_counter() - start
+
+
+def apply_costs(weights: np.ndarray, returns: np.ndarray, cost_bps: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Net daily returns and turnover of trading to `weights` each day, for all windows at once.
+    Before each day's trade the book holds yesterday's weights drifted by yesterday's returns;
+    the first day starts from cash, so its turnover is 1.
+    """
+    gross = np.einsum("ij,ij->i", weights, returns)
+    drifted = weights * (1 + returns) / (1 + gross)[:, np.newaxis]
+    before_trade = np.vstack([np.zeros((1, weights.shape[1])), drifted[:-1]])
+    turnover = np.abs(weights - before_trade).sum(axis=1)
+    return gross - cost_bps / 1e4 * turnover, turnover
+
+
+def summarize(net_returns: np.ndarray, turnover: np.ndarray, windows: List[Tuple[int, int, int]], fit_seconds: List[float]) -> Dict[str, Any]:
+    years = len(net_returns) / TRADING_DAYS_PER_YEAR
+    total_return = np.prod(1 + net_returns) - 1
+    annual_return = (1 + total_return) ** (1 / years) - 1
+    volatility = net_returns.std() * np.sqrt(TRADING_DAYS_PER_YEAR)
+
+    window_returns, offset = [], 0
+    for _, train_end, test_end in windows:
+        window_returns.append(float(np.prod(1 + net_returns[offset:offset + test_end - train_end]) - 1))
+        offset += test_end - train_end
+
+    return {
+        "annual_return": float(annual_return),
+        "volatility": float(volatility),
+        "sharpe_ratio": float(annual_return / volatility) if volatility > 0 else 0.0,
+        "annual_turnover": float(turnover.sum() / years),
+        "window_returns": window_returns,
+        "mean_fit_seconds": float(np.mean(fit_seconds)),
+    }
+
+
+def run_backtest(returns_df: pd.DataFrame, engines: List[str], train_days: int = BACKTEST_TRAIN_DAYS, test_days: int = BACKTEST_TEST_DAYS,
+                 cost_bps: float = BACKTEST_COST_BPS, risk_aversion: float = 4.0, workers: Optional[int] = None, rl_timesteps: int = BACKTEST_RL_TIMESTEPS) -> Dict[str, Any]:
+    """
+    Walk-forward backtest: every (engine, window) fit runs in a worker process; costs and metrics are then
+    computed over all out-of-sample days of an engine in one vectorized pass.
+    """
+    for engine in engines:
+        if engine not in BACKTEST_ENGINES:
+            raise ValueError(f"Unknown backtest engine '{engine}'. Use one of {BACKTEST_ENGINES}.")
+
+    returns = returns_df.values.astype(np.float64)
+    windows = walk_forward_windows(len(returns), train_days, test_days)
+    if not windows:
+        raise ValueError(f"Need more than {train_days + test_days} days of returns for one walk-forward window.")
+    test_returns = np.vstack([returns[train_end:test_end] for _, train_end, test_end in windows])
+
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(returns, returns_df.columns.tolist())) as pool:
+        futures = {
+            engine: [pool.submit(fit_window, engine, window, risk_aversion, rl_timesteps) for window in windows]
+            for engine in engines
+        }
+        fits = {engine: [f.result() for f in engine_futures] for engine, engine_futures in futures.items()}
+    wall_seconds = time.perf_counter() - start
+
+    results = {}
+    for engine, engine_fits in fits.items():
+        weights = np.vstack([w for w, _ in engine_fits])
+        net_returns, turnover = apply_costs(weights, test_returns, cost_bps)
+        results[engine] = summarize(net_returns, turnover, windows, [s for _, s in engine_fits])
+
+    return {
+        "windows": len(windows),
+        "out_of_sample_days": int(len(test_returns)),
+        "cost_bps": cost_bps,
+        "workers": workers,
+        "wall_seconds": wall_seconds,
+        "engines": results,
+    }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Walk-forward out-of-sample backtest of the allocation engines.")
+    parser.add_argument("--engines", default="equal_weight,mean_variance", help=f"Comma-separated subset of {BACKTEST_ENGINES}.")
+    parser.add_argument("--train-days", type=int, default=BACKTEST_TRAIN_DAYS)
+    parser.add_argument("--test-days", type=int, default=BACKTEST_TEST_DAYS)
+    parser.add_argument("--cost-bps", type=float, default=BACKTEST_COST_BPS)
+    parser.add_argument("--risk-aversion", type=float, default=4.0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--rl-timesteps", type=int, default=BACKTEST_RL_TIMESTEPS)
+    args = parser.parse_args()
+
+    from rl import fetch_asset_data, TICKERS
+    returns_df = fetch_asset_data(TICKERS)
+    report = run_backtest(returns_df, args.engines.split(","), args.train_days, args.test_days, args.cost_bps,
+                          args.risk_aversion, args.workers, args.rl_timesteps)
+
+    print(f"\n{report['windows']} windows, {report['out_of_sample_days']} out-of-sample days, "
+          f"{report['workers']} workers, {report['wall_seconds']:.1f}s wall")
+    print(f"{'engine':<16}{'ann. return':>12}{'volatility':>12}{'sharpe':>8}{'turnover/yr':>13}{'fit s/window':>14}")
+    for engine, r in report["engines"].items():
+        print(f"{engine:<16}{r['annual_return']:>12.2%}{r['volatility']:>12.2%}{r['sharpe_ratio']:>8.2f}"
+              f"{r['annual_turnover']:>13.2f}{r['mean_fit_seconds']:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ from firebase_admin import firestore
 import datetime
 from datetime import timezone
 import calendar
+from typing import Optional
 
 async def recalculate_user_history(user_id: str, db: firestore.client) -> dict:
     """
@@ -112,10 +113,10 @@ async def recalculate_user_history(user_id: str, db: firestore.client) -> dict:
         print(f"Error recalculating history: {e}")
         return {"status": "error", "message": str(e)}
 
-async def get_average_metrics_last_3_months(user_id: str, db: firestore.client) -> dict:
+def read_average_metrics_last_3_months(user_id: str, db: firestore.client) -> Optional[dict]:
     """
-    Fetches average income and expense for the last 3 completed months.
-    Excludes the current month.
+    Blocking Firestore read behind get_average_metrics_last_3_months: average income and expense
+    of the last 3 completed months. Returns None when no completed month has been aggregated yet.
     """
     try:
         stats_ref = db.collection('monthly_balances').where("user_id", "==", user_id)\
@@ -147,10 +148,7 @@ async def get_average_metrics_last_3_months(user_id: str, db: firestore.client)
                 break
             
         if not income_list:
-            print("No previous monthly data found. Recalculating...")
-            await recalculate_user_history(user_id, db)
-            # Re-fetch after recalculation
-            return await get_average_metrics_last_3_months(user_id, db)
+            return None
 
         avg_income = sum(income_list) / len(income_list)
         avg_expense = sum(expense_list) / len(expense_list)
@@ -165,6 +163,19 @@ async def get_average_metrics_last_3_months(user_id: str, db: firestore.client)
         print(f"Error fetching avg metrics: {e}")
         return {"avg_monthly_income": 0.0, "avg_monthly_spending": 0.0, "num_months": 0}
 
+async def get_average_metrics_last_3_months(user_id: str, db: firestore.client) -> dict:
+    """
+    Fetches average income and expense for the last 3 completed months.
+    Excludes the current month.
+    """
+    metrics = read_average_metrics_last_3_months(user_id, db)
+    if metrics is None:
+        print("No previous monthly data found. Recalculating...")
+        await recalculate_user_history(user_id, db)
+        # Re-fetch after recalculation
+        return await get_average_metrics_last_3_months(user_id, db)
+    return metrics
+
 async def get_average_balance_last_3_months(user_id: str, db: firestore.client) -> float:
     """
     Fetches the average 'balance' of the last 3 *completed* months from 'monthly_balances' collection.
@@ -0,0 +1,89 @@
+import argparse
+import time
+import tempfile
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+import numpy as np
+
+import lstm
+from lstm import preprocess_transactions, train_global_model, save_global_model, forecast_with_global_model
+from forecast_export import load_forecaster
+
+warnings.filterwarnings("ignore")
+
+VARIANTS = [
+    ("eager", False),
+    ("eager", True),
+    ("torchscript", False),
+    ("torchscript", True),
+    ("onnx", False),
+    ("onnx", True),
+]
+
+def make_synthetic_transactions(salary: float, daily_spend: float, days: int, seed: int) -> list:
+    rng = np.random.default_rng(seed)
+    start = date(2025, 1, 1)
+    transactions = []
+    for i in range(days):
+        day = start + timedelta(days=i)
+        if day.day == 1:
+            transactions.append({"transaction_date": day.isoformat(), "amount": salary, "type": "Income"})
+        transactions.append({"transaction_date": day.isoformat(), "amount": round(daily_spend * rng.uniform(0.5, 1.5), 2), "type": "Expense"})
+    return transactions
+
+def time_forecasts(forecaster, metadata, daily_summaries, concurrency: int, rounds: int) -> dict:
+    """Runs `rounds` batches of `concurrency` simultaneous forecasts and returns per-forecast latency stats."""
+    latencies = []
+
+    def run_one(daily_summary):
+        start = time.perf_counter()
+        forecast_with_global_model(daily_summary, forecaster, metadata)
+        return time.perf_counter() - start
+
+    forecast_with_global_model(daily_summaries[0], forecaster, metadata)  # warm-up
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(rounds):
+            batch = [daily_summaries[i % len(daily_summaries)] for i in range(concurrency)]
+            latencies.extend(pool.map(run_one, batch))
+    wall = time.perf_counter() - wall_start
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p95_ms": float(np.percentile(latencies_ms, 95)),
+        "throughput": len(latencies) / wall
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark eager vs exported vs quantized forecast inference latency.")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--users", type=int, default=8)
+    args = parser.parse_args()
+
+    daily_summaries = [
+        preprocess_transactions(make_synthetic_transactions(2000 + 500 * k, 40 + 10 * k, 180, seed=k))
+        for k in range(args.users)
+    ]
+
+    # Benchmark against a throwaway model so existing artifacts are never touched.
+    with tempfile.TemporaryDirectory() as model_dir:
+        lstm.MODEL_DIR = model_dir
+        model, metadata = train_global_model(daily_summaries, epochs=1)
+        save_global_model(model, metadata, model_dir)
+
+        print(f"{'runtime':<14}{'int8':<6}{'1x p50 ms':>11}{'64x p50 ms':>12}{'64x p95 ms':>12}{'64x fc/s':>10}")
+        for runtime, quantize in VARIANTS:
+            try:
+                forecaster, metadata = load_forecaster(runtime=runtime, quantize=quantize)
+            except (ValueError, ImportError) as e:
+                print(f"{runtime:<14}{str(quantize):<6} skipped: {e}")
+                continue
+
+            single = time_forecasts(forecaster, metadata, daily_summaries, concurrency=1, rounds=args.rounds * 4)
+            burst = time_forecasts(forecaster, metadata, daily_summaries, concurrency=64, rounds=args.rounds)
+            print(f"{runtime:<14}{str(quantize):<6}{single['p50_ms']:>11.2f}{burst['p50_ms']:>12.2f}{burst['p95_ms']:>12.2f}{burst['throughput']:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import argparse
+import time
+import warnings
+import numpy as np
+import pandas as pd
+
+from rl import PortfolioOptimizationEnv, PandasPortfolioOptimizationEnv, LOOKBACK_WINDOW, DEVICE, train_rl_agent
+
+warnings.filterwarnings("ignore")
+
+ENVS = [
+    ("pandas (reference)", PandasPortfolioOptimizationEnv),
+    ("array-backed", PortfolioOptimizationEnv),
+]
+
+def make_returns_df(days: int, assets: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(rng.normal(0.0005, 0.01, (days, assets)), columns=[f"A{i}" for i in range(assets)])
+
+def env_steps_per_second(env_cls, df: pd.DataFrame, steps: int) -> float:
+    """Raw env throughput with pre-drawn random actions (no policy in the loop)."""
+    env = env_cls(df, 4.0, LOOKBACK_WINDOW)
+    actions = np.random.default_rng(1).uniform(-1, 1, (steps, df.shape[1])).astype(np.float32)
+    env.reset()
+    start = time.perf_counter()
+    for action in actions:
+        _, _, terminated, truncated, _ = env.step(action)
+        if terminated or truncated:
+            env.reset()
+    return steps / (time.perf_counter() - start)
+
+def ppo_steps_per_second(env_cls, df: pd.DataFrame, steps: int) -> float:
+    from stable_baselines3 import PPO
+
+    model = PPO("MlpPolicy", env_cls(df, 4.0, LOOKBACK_WINDOW), learning_rate=3e-4, verbose=0, device=DEVICE)
+    start = time.perf_counter()
+    model.learn(total_timesteps=steps)
+    return steps / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description="Step throughput of the array-backed portfolio env vs the pandas reference.")
+    parser.add_argument("--days", type=int, default=1250, help="Trading days of history (5 years).")
+    parser.add_argument("--assets", type=int, default=8)
+    parser.add_argument("--steps", type=int, default=20000)
+    parser.add_argument("--ppo-steps", type=int, default=0, help="Also time PPO.learn for this many timesteps.")
+    parser.add_argument("--num-envs", default="", help="Comma-separated worker counts to time train_rl_agent with, e.g. 1,2,4.")
+    args = parser.parse_args()
+
+    df = make_returns_df(args.days, args.assets)
+    print(f"{'env':<22}{'env steps/s':>14}{'PPO steps/s':>14}")
+    for name, env_cls in ENVS:
+        env_rate = env_steps_per_second(env_cls, df, args.steps)
+        ppo_rate = f"{ppo_steps_per_second(env_cls, df, args.ppo_steps):>14.0f}" if args.ppo_steps else f"{'-':>14}"
+        print(f"{name:<22}{env_rate:>14.0f}{ppo_rate}")
+
+    if args.num_envs:
+        steps = args.ppo_steps or 8192
+        print(f"\n{'workers':<10}{'PPO steps/s':>14}{'speedup':>10}")
+        baseline = None
+        for num_envs in [int(n) for n in args.num_envs.split(",")]:
+            _, _, results = train_rl_agent(df, 4.0, 10000.0, num_envs=num_envs, total_timesteps=steps)
+            rate = results["training_steps_per_second"]
+            baseline = baseline or rate
+            print(f"{num_envs:<10}{rate:>14.0f}{rate / baseline:>9.2f}x")
+
+if __name__ == "__main__":
+    main()
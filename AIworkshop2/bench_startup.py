@@ -0,0 +1,53 @@
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+HEAVY_ENGINE_MODULES = ["fhsm", "lstm", "stat_forecast", "simulation", "budgeter", "vlm", "rl", "exporter"]
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)")
+
+def measure_import(module: str) -> tuple[float, list]:
+    """
+    Imports `module` in a fresh interpreter with -X importtime.
+    Returns (wall seconds, [(cumulative seconds, name)] for the modules it imports directly).
+    """
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    children = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        # Depth 1 (two spaces of indent) = imported directly by the target module.
+        if match and len(match.group(3)) == 3:
+            children.append((int(match.group(2)) / 1e6, match.group(4)))
+    return wall, sorted(children, reverse=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Track API startup cost: import time of main and of each heavy engine.")
+    parser.add_argument("--top", type=int, default=10, help="How many of main's direct imports to list.")
+    args = parser.parse_args()
+
+    wall, children = measure_import("main")
+    print(f"import main: {wall:.2f}s wall")
+    for seconds, name in children[:args.top]:
+        print(f"  {name:<28}{seconds:>8.3f}s")
+
+    print("\nHeavy engines (each in a fresh interpreter, loaded lazily by main):")
+    for module in HEAVY_ENGINE_MODULES:
+        try:
+            wall, _ = measure_import(module)
+            print(f"  {module:<28}{wall:>8.2f}s")
+        except RuntimeError as e:
+            print(f"  {module:<28} failed: {e}")
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,17 @@
 # AI workshop 2/budgeter.py
 import os
-from typing import Dict, List, Any, Optional
+import re
+import json
+import asyncio
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import date, timedelta, datetime
 from firebase_admin import firestore
-from openai import OpenAI
 import logging
 from collections import defaultdict
 from dotenv import load_dotenv
 
+import llm_gateway
+
 
 load_dotenv(override=True)
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
@@ -15,12 +19,11 @@ OPENAI_API_URL = os.environ.get("OPENAI_API_URL")
 
 print(f"DEBUG: budgeter.py loaded. Key: {str(OPENAI_API_KEY)[:10]}... URL: {OPENAI_API_URL}")
 
-client_kwargs = {"api_key": OPENAI_API_KEY}
-if OPENAI_API_URL:
-    client_kwargs["base_url"] = OPENAI_API_URL
-
-OPENAI_CLIENT = OpenAI(**client_kwargs)
 MODEL_NAME = "openai/gpt-4o-mini" 
+# The one-tap budget is interactive, so give up on the completion well before a client would.
+BUDGET_LLM_TIMEOUT_SECONDS = float(os.getenv("BUDGET_LLM_TIMEOUT_SECONDS", "15"))
+# Most recent transactions used for the per-category spending breakdown.
+BUDGET_TRANSACTION_WINDOW = 500
 
 logging.basicConfig(level=logging.INFO)
 
@@ -136,6 +139,92 @@ def generate_budget_prompt(analysis: Dict[str, Any], fhs_report: Dict[str, Any],
     
     return prompt
 
+def repair_json_text(text: str) -> str:
+    """
+    Deterministic clean-up of a model's JSON answer: drops markdown fences and any prose around
+    the outermost {...}, and removes trailing commas before } or ].
+    """
+    text = text.strip()
+    text = re.sub(r"^```(?:json)?\s*|\s*```$", "", text)
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end < start:
+        raise ValueError("No JSON object in model response.")
+    return re.sub(r",\s*([}\]])", r"\1", text[start:end + 1])
+
+def _to_amount(value: Any) -> float:
+    if isinstance(value, str):
+        value = re.sub(r"[^\d.\-]", "", value)
+    return float(value)
+
+def parse_budget_response(text: str, income: float) -> Dict[str, Any]:
+    """
+    Repairs and validates the budget JSON. Amounts must be non-negative numbers; if they do not add
+    up to the monthly income they are rescaled to it, and percentages are always recomputed.
+    Raises ValueError when the answer cannot be used.
+    """
+    data = json.loads(repair_json_text(text))
+    allocation = data.get("budget_allocation") if isinstance(data, dict) else None
+    if not isinstance(allocation, list) or not allocation:
+        raise ValueError("Model response has no budget_allocation list.")
+
+    items = []
+    for entry in allocation:
+        if not isinstance(entry, dict) or not entry.get("category"):
+            raise ValueError(f"Invalid budget_allocation entry: {entry}")
+        try:
+            amount = _to_amount(entry.get("amount"))
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid amount for {entry.get('category')}: {entry.get('amount')}")
+        if amount < 0:
+            raise ValueError(f"Negative amount for {entry.get('category')}: {amount}")
+        items.append({"category": str(entry["category"]), "amount": amount})
+
+    total = sum(item["amount"] for item in items)
+    if total <= 0:
+        raise ValueError("Budget allocation totals zero.")
+
+    target = income if income > 0 else total
+    if abs(total - target) > 0.01:
+        logging.warning(f"Budget allocation totals {total:.2f}, rescaling to income {target:.2f}")
+        for item in items:
+            item["amount"] = item["amount"] * target / total
+    for item in items:
+        item["amount"] = round(item["amount"], 2)
+    # Rounding residue goes to the largest line so the total is exact to the cent.
+    largest = max(items, key=lambda item: item["amount"])
+    largest["amount"] = round(largest["amount"] + target - sum(item["amount"] for item in items), 2)
+    for item in items:
+        item["percentage"] = round(item["amount"] / target * 100, 2)
+
+    return {"explanation": str(data.get("explanation", "")), "budget_allocation": items}
+
+def fetch_recent_transactions(user_id: str, db: firestore.client, limit: int = BUDGET_TRANSACTION_WINDOW) -> List[Dict[str, Any]]:
+    transactions_ref = db.collection('transactions')\
+        .where("user_id", "==", user_id)\
+        .order_by("transaction_date", direction=firestore.Query.DESCENDING)\
+        .limit(limit)
+    
+    transactions = []
+    for doc in transactions_ref.stream():
+        transaction_data = doc.to_dict()
+        if hasattr(transaction_data.get('transaction_date'), 'isoformat'):
+            transaction_data['transaction_date'] = transaction_data['transaction_date'].isoformat()
+        transactions.append(transaction_data)
+    return transactions
+
+async def prefetch_budget_inputs(user_id: str, db: firestore.client) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """The 3-month metrics and the recent transaction window, read concurrently in worker threads."""
+    from balance_manager import read_average_metrics_last_3_months, get_average_metrics_last_3_months
+
+    metrics, transactions = await asyncio.gather(
+        asyncio.to_thread(read_average_metrics_last_3_months, user_id, db),
+        asyncio.to_thread(fetch_recent_transactions, user_id, db)
+    )
+    if metrics is None:
+        # No completed month aggregated yet: rebuild the monthly history first.
+        metrics = await get_average_metrics_last_3_months(user_id, db)
+    return metrics, transactions
+
 async def generate_auto_budget(
     user_id: str,
     db: firestore.client,
@@ -148,26 +237,10 @@ async def generate_auto_budget(
     """
     
     try:
-        from balance_manager import get_average_metrics_last_3_months
-        
-        # 1. Get accurate 3-month average from aggregated collection
-        metrics = await get_average_metrics_last_3_months(user_id, db)
+        # 1. Accurate 3-month averages (aggregated collection) and 2. the category window, together
+        metrics, transactions = await prefetch_budget_inputs(user_id, db)
         avg_income = metrics.get("avg_monthly_income", 0.0)
         avg_spending = metrics.get("avg_monthly_spending", 0.0)
-        
-        # 2. Get transaction history for category breakdown
-        transactions_ref = db.collection('transactions')\
-            .where("user_id", "==", user_id)\
-            .order_by("transaction_date", direction=firestore.Query.DESCENDING)\
-            .limit(500)
-        docs = transactions_ref.stream()
-        
-        transactions = []
-        for doc in docs:
-            transaction_data = doc.to_dict()
-            if hasattr(transaction_data.get('transaction_date'), 'isoformat'):
-                transaction_data['transaction_date'] = transaction_data['transaction_date'].isoformat()
-            transactions.append(transaction_data)
             
         if not transactions:
             return {"error": "No transaction history found to generate a budget."}
@@ -186,26 +259,20 @@ async def generate_auto_budget(
             "X-Title": "AI Personal Finance Assistant"
         }
         try:
-            response = OPENAI_CLIENT.chat.completions.create(
+            response = await llm_gateway.chat_completion(
+                "budget",
+                user_id=user_id,
                 model=MODEL_NAME,
                 messages=[
                     {"role": "system", "content": "You are a precise JSON output generator for financial planning. Only output the requested JSON object."},
                     {"role": "user", "content": prompt}
                 ],
                 # response_format={"type": "json_object"}, # REMOVED for OpenRouter
-                extra_headers=extra_headers
+                extra_headers=extra_headers,
+                timeout=BUDGET_LLM_TIMEOUT_SECONDS
             )
             
-            model_response = response.choices[0].message.content
-            # Clean markdown
-            model_response = model_response.strip()
-            if model_response.startswith("```json"):
-                model_response = model_response[7:]
-            if model_response.endswith("```"):
-                model_response = model_response[:-3]
-            model_response = model_response.strip()
-            
-            budget_recommendation = json.loads(model_response)
+            budget_recommendation = parse_budget_response(response.choices[0].message.content or "", avg_income)
             
             budget_recommendation["data_context"] = {
                 "income": avg_income,
@@ -6,7 +6,8 @@ from dotenv import load_dotenv
 load_dotenv(override=True)
 
 # Import exactly what simulation.py uses
-from simulation import openai_client, MODEL_MINI, OPENAI_API_KEY, OPENAI_API_URL
+import llm_gateway
+from simulation import MODEL_MINI, OPENAI_API_KEY, OPENAI_API_URL
 
 async def debug_sim():
     print(f"--- Debugging Simulation Configuration ---")
@@ -14,15 +15,16 @@ async def debug_sim():
     print(f"API_URL From Module: {OPENAI_API_URL}")
     print(f"Model Name: {MODEL_MINI}")
     
-    if openai_client:
-        print(f"Client Base URL: {openai_client.base_url}")
+    if llm_gateway.is_configured():
+        print(f"Client Base URL: {llm_gateway.get_client().base_url}")
     else:
         print("Client is None!")
         return
 
     print("\nAttempting API Call (JSON Mode) with this config...")
     try:
-        response = await openai_client.chat.completions.create(
+        response = await llm_gateway.chat_completion(
+            "debug",
             model=MODEL_MINI,
             messages=[
                 {"role": "system", "content": "You are a helper. Respond in JSON."},
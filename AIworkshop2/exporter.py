@@ -52,7 +52,7 @@ def generate_user_pdf_report(user_id: str, db: Any) -> io.BytesIO:
     total_expense = sum(t.get('amount', 0.0) for t in transactions if t.get('type') == 'Expense')
 
     # LSTM Forecast
-    lstm_report = generate_lstm_forecast(transactions)
+    lstm_report = generate_lstm_forecast(transactions, user_id=user_id)
     forecast_results = lstm_report.get('forecast_results', [])
 
     # 2. PDF Setup
@@ -0,0 +1,166 @@
+# AIworkshop2/forecast_export.py
+import os
+import json
+import threading
+import warnings
+import tempfile
+import numpy as np
+import torch
+import torch.nn as nn
+from typing import Dict, Any, Optional, Tuple
+
+from lstm import LOOKBACK, GLOBAL_MODEL_VERSION, load_global_model, find_global_model_path
+
+# Runtime used by generate_lstm_forecast: eager | torchscript | onnx
+FORECAST_RUNTIME = os.getenv("FORECAST_RUNTIME", "eager")
+FORECAST_QUANTIZE = os.getenv("FORECAST_QUANTIZE", "0") == "1"
+# Intra-op threads for exported runtimes. 1 keeps many small concurrent forecasts from oversubscribing the CPU.
+FORECAST_INTRA_OP_THREADS = int(os.getenv("FORECAST_INTRA_OP_THREADS", "1"))
+
+EXPORT_SUFFIXES = {"torchscript": ".ts", "onnx": ".onnx"}
+
+_FORECASTER_CACHE: Dict[Tuple[str, str, bool], Tuple[Any, Dict[str, Any]]] = {}
+_CACHE_LOCK = threading.Lock()
+_threads_configured = False
+
+
+class StatefulForecaster(nn.Module):
+    """Export wrapper: (x, h, c) -> (pred, h, c), so exported graphs keep the carried LSTM state."""
+
+    def __init__(self, model: nn.Module):
+        super(StatefulForecaster, self).__init__()
+        self.model = model
+
+    def forward(self, x: torch.Tensor, h: torch.Tensor, c: torch.Tensor):
+        pred, (h, c) = self.model.forward_with_state(x, (h, c))
+        return pred, h, c
+
+
+class TorchScriptForecaster:
+    def __init__(self, module: torch.jit.ScriptModule, metadata: Dict[str, Any]):
+        self.module = module
+        self.state_shape = (metadata["num_layers"], 1, metadata["hidden_size"])
+
+    def forward_with_state(self, x: torch.Tensor, state=None):
+        if state is None:
+            state = (torch.zeros(self.state_shape), torch.zeros(self.state_shape))
+        pred, h, c = self.module(x, *state)
+        return pred, (h, c)
+
+
+class OnnxForecaster:
+    def __init__(self, path: str, metadata: Dict[str, Any], intra_op_threads: int = FORECAST_INTRA_OP_THREADS):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.state_shape = (metadata["num_layers"], 1, metadata["hidden_size"])
+
+    def forward_with_state(self, x: torch.Tensor, state=None):
+        if state is None:
+            state = (np.zeros(self.state_shape, dtype=np.float32), np.zeros(self.state_shape, dtype=np.float32))
+        pred, h, c = self.session.run(None, {"x": x.numpy().astype(np.float32), "h": state[0], "c": state[1]})
+        return torch.from_numpy(pred), (h, c)
+
+
+def quantize_forecast_model(model: nn.Module) -> nn.Module:
+    """Dynamic int8 quantization of the LSTM and Linear layers (weights int8, activations quantized on the fly)."""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return torch.ao.quantization.quantize_dynamic(model, {nn.LSTM, nn.Linear}, dtype=torch.qint8)
+
+
+def get_export_path(global_model_path: str, runtime: str, quantize: bool) -> str:
+    base, _ = os.path.splitext(global_model_path)
+    return f"{base}{'_int8' if quantize else ''}{EXPORT_SUFFIXES[runtime]}"
+
+
+def export_forecast_model(model: nn.Module, metadata: Dict[str, Any], runtime: str, quantize: bool, path: str) -> str:
+    """Exports a trained forecast model to TorchScript or ONNX. Metadata is written next to it as <path>.json."""
+    if runtime not in EXPORT_SUFFIXES:
+        raise ValueError(f"Unsupported forecast export format '{runtime}'. Use one of {list(EXPORT_SUFFIXES)}.")
+
+    model = model.cpu().eval()
+    example = (
+        torch.zeros(1, LOOKBACK, metadata["input_size"]),
+        torch.zeros(metadata["num_layers"], 1, metadata["hidden_size"]),
+        torch.zeros(metadata["num_layers"], 1, metadata["hidden_size"])
+    )
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        if runtime == "torchscript":
+            wrapper = StatefulForecaster(quantize_forecast_model(model) if quantize else model).eval()
+            torch.jit.trace(wrapper, example).save(path)
+        else:
+            try:
+                from onnxruntime.quantization import quantize_dynamic, QuantType
+            except ImportError:
+                raise ValueError("ONNX export requires the optional 'onnx' and 'onnxruntime' packages.")
+
+            # torch's dynamically quantized LSTM cannot be exported, so int8 ONNX is quantized by onnxruntime instead.
+            with tempfile.TemporaryDirectory() as tmp:
+                fp32_path = path if not quantize else os.path.join(tmp, "forecast_fp32.onnx")
+                torch.onnx.export(
+                    StatefulForecaster(model).eval(), example, fp32_path,
+                    input_names=["x", "h", "c"], output_names=["pred", "h_out", "c_out"],
+                    dynamic_axes={"x": {1: "steps"}}, dynamo=False
+                )
+                if quantize:
+                    quantize_dynamic(fp32_path, path, weight_type=QuantType.QInt8)
+
+    with open(f"{path}.json", "w") as f:
+        json.dump({**metadata, "runtime": runtime, "quantized": quantize}, f)
+    return path
+
+
+def configure_inference_threads():
+    """torch.set_num_threads is process-wide, so it is only applied once and only when an optimized runtime is opted into."""
+    global _threads_configured
+    if not _threads_configured:
+        torch.set_num_threads(FORECAST_INTRA_OP_THREADS)
+        _threads_configured = True
+
+
+def load_forecaster(runtime: Optional[str] = None, quantize: Optional[bool] = None, version: Optional[str] = None) -> Optional[Tuple[Any, Dict[str, Any]]]:
+    """
+    Returns (forecaster, metadata) for the latest global model in the requested runtime, loaded once per process.
+    Exported artifacts are created next to the .pt file on first use. Returns None when no global model exists.
+    """
+    runtime = runtime or FORECAST_RUNTIME
+    quantize = FORECAST_QUANTIZE if quantize is None else quantize
+
+    global_model_path = find_global_model_path(version or GLOBAL_MODEL_VERSION)
+    if global_model_path is None:
+        return None
+
+    key = (global_model_path, runtime, quantize)
+    if key in _FORECASTER_CACHE:
+        return _FORECASTER_CACHE[key]
+
+    with _CACHE_LOCK:
+        if key in _FORECASTER_CACHE:
+            return _FORECASTER_CACHE[key]
+
+        model, metadata = load_global_model(version)
+        if runtime == "eager":
+            forecaster = quantize_forecast_model(model) if quantize else model
+            if quantize:
+                configure_inference_threads()
+        elif runtime in EXPORT_SUFFIXES:
+            path = get_export_path(global_model_path, runtime, quantize)
+            if not os.path.exists(path):
+                print(f"Exporting forecast model to {path}...")
+                export_forecast_model(model, metadata, runtime, quantize, path)
+            if runtime == "torchscript":
+                configure_inference_threads()
+                forecaster = TorchScriptForecaster(torch.jit.load(path), metadata)
+            else:
+                forecaster = OnnxForecaster(path, metadata)
+        else:
+            raise ValueError(f"Unknown FORECAST_RUNTIME '{runtime}'. Use eager, torchscript or onnx.")
+
+        _FORECASTER_CACHE[key] = (forecaster, metadata)
+        return _FORECASTER_CACHE[key]
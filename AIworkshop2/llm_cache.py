@@ -0,0 +1,110 @@
+# AIworkshop2/llm_cache.py
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+# In-memory entries kept per cache (least recently used are evicted first).
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2048"))
+# Answers older than this are treated as misses and refreshed from the LLM.
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# No bare "m": in "for 12m" it means months far more often than million.
+_NUMBER = re.compile(r"(?<![\w.])(\d{1,3}(?:,\d{3})+|\d+)(?:\.(\d+))?(?:\s*(k|mil|million|thousand)\b)?", re.IGNORECASE)
+_MULTIPLIERS = {"k": 1_000, "thousand": 1_000, "mil": 1_000_000, "million": 1_000_000}
+
+
+def _canonical_number(match: re.Match) -> str:
+    whole, fraction, suffix = match.group(1).replace(",", ""), match.group(2) or "", (match.group(3) or "").lower()
+    value = float(f"{whole}.{fraction}" if fraction else whole) * _MULTIPLIERS.get(suffix, 1)
+    return f"{value:.10g}" if value != int(value) else str(int(value))
+
+
+def normalize_question(question: str) -> str:
+    """
+    Cache key text: lowercase, single spaces, no trailing punctuation, and numbers in one
+    form ("RM1,000", "rm 1k" and "rm 1000.00" all become "rm 1000").
+    """
+    text = question.lower().strip()
+    text = re.sub(r"(?<=[a-z$€£₹])(?=\d)", " ", text)
+    text = _NUMBER.sub(_canonical_number, text)
+    text = re.sub(r"\s+", " ", text)
+    return text.rstrip(" ?!.")
+
+
+class LLMCache:
+    """
+    Thread-safe LRU + TTL cache of JSON-serializable LLM answers, optionally persisted to SQLite.
+    Values are stored as JSON, so every get() returns a fresh copy the caller may mutate.
+    Caches with different TTLs sharing one SQLite file should use different tables, since
+    opening a cache purges its table of rows older than its own TTL.
+    """
+
+    def __init__(self, max_entries: int = LLM_CACHE_MAX_ENTRIES, ttl_seconds: float = LLM_CACHE_TTL_SECONDS,
+                 path: Optional[str] = None, table: str = "llm_cache"):
+        if not re.fullmatch(r"[A-Za-z_]\w*", table):
+            raise ValueError(f"Invalid cache table name: {table!r}")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._table = table
+        self._db = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)")
+            self._db.execute(f"DELETE FROM {table} WHERE created < ?", (time.time() - ttl_seconds,))
+            self._db.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] <= self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return json.loads(entry[1])
+            if entry is not None:
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(f"SELECT created, value FROM {self._table} WHERE key = ?", (key,)).fetchone()
+                if row is not None and now - row[0] <= self.ttl_seconds:
+                    self._remember(key, row[0], row[1])
+                    self.hits += 1
+                    return json.loads(row[1])
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        created, payload = time.time(), json.dumps(value)
+        with self._lock:
+            self._remember(key, created, payload)
+            if self._db is not None:
+                self._db.execute(f"INSERT OR REPLACE INTO {self._table} (key, value, created) VALUES (?, ?, ?)", (key, payload, created))
+                self._db.commit()
+
+    def _remember(self, key: str, created: float, payload: str) -> None:
+        self._entries[key] = (created, payload)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "persistent": self._db is not None,
+            }
@@ -0,0 +1,236 @@
+# AIworkshop2/llm_gateway.py
+import os
+import time
+import random
+import asyncio
+import logging
+import threading
+from bisect import bisect_left
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, AsyncIterator, List
+
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+# Every chat completion in the app goes through this module: one pooled client, bounded
+# concurrency (global and per user), per-call timeouts, retries with jittered backoff, metrics.
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_BACKOFF_BASE_SECONDS = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "0.5"))
+LLM_BACKOFF_MAX_SECONDS = 8.0
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_MAX_CONCURRENCY_PER_USER = int(os.getenv("LLM_MAX_CONCURRENCY_PER_USER", "2"))
+# Upstream connections held open by the shared client; requests beyond this wait for a free one.
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "32"))
+
+LATENCY_BUCKETS_SECONDS = [0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60]
+TOKEN_BUCKETS = [64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384]
+
+_client = None
+_client_lock = threading.Lock()
+_limits: Dict[str, Any] = {"loop": None, "global": None, "users": {}}
+
+
+def is_configured() -> bool:
+    return bool(os.getenv("OPENAI_API_KEY"))
+
+
+def get_client():
+    """The process-wide AsyncOpenAI client, created on first use with a bounded connection pool."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+                try:
+                    import httpx2 as httpx  # newer openai SDKs are built on the httpx2 fork
+                except ImportError:
+                    import httpx
+
+                client_kwargs = {
+                    "api_key": os.getenv("OPENAI_API_KEY"),
+                    "max_retries": 0,  # retried in chat_completion, with jitter and metrics
+                    "http_client": DefaultAsyncHttpxClient(limits=httpx.Limits(
+                        max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_CONNECTIONS
+                    )),
+                }
+                if os.getenv("OPENAI_API_URL"):
+                    client_kwargs["base_url"] = os.getenv("OPENAI_API_URL")
+                _client = AsyncOpenAI(**client_kwargs)
+    return _client
+
+
+class _Histogram:
+    def __init__(self, buckets: List[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        labels = [f"le_{b:g}" for b in self.buckets] + ["inf"]
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 4) if self.count else 0.0,
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class _PurposeMetrics:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.latency = _Histogram(LATENCY_BUCKETS_SECONDS)
+        self.prompt_tokens = _Histogram(TOKEN_BUCKETS)
+        self.completion_tokens = _Histogram(TOKEN_BUCKETS)
+
+
+_metrics: Dict[str, _PurposeMetrics] = {}
+_metrics_lock = threading.Lock()
+
+
+def _record(purpose: str, latency: float, usage: Any = None, error: bool = False, retries: int = 0):
+    with _metrics_lock:
+        m = _metrics.setdefault(purpose, _PurposeMetrics())
+        m.calls += 1
+        m.errors += int(error)
+        m.retries += retries
+        m.latency.observe(latency)
+        if usage is not None:
+            m.prompt_tokens.observe(getattr(usage, "prompt_tokens", 0) or 0)
+            m.completion_tokens.observe(getattr(usage, "completion_tokens", 0) or 0)
+
+
+def get_metrics() -> Dict[str, Any]:
+    """Per-purpose call/error/retry counts and latency and token histograms since process start."""
+    with _metrics_lock:
+        return {
+            purpose: {
+                "calls": m.calls,
+                "errors": m.errors,
+                "retries": m.retries,
+                "latency_seconds": m.latency.snapshot(),
+                "prompt_tokens": m.prompt_tokens.snapshot(),
+                "completion_tokens": m.completion_tokens.snapshot(),
+            }
+            for purpose, m in _metrics.items()
+        }
+
+
+@asynccontextmanager
+async def _concurrency_slot(user_id: Optional[str]):
+    """Holds the per-user slot (if any) and then a global slot. Semaphores belong to the running loop."""
+    loop = asyncio.get_running_loop()
+    if _limits["loop"] is not loop:
+        _limits.update(loop=loop, users={})
+        _limits["global"] = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+
+    user_entry = None
+    if user_id is not None:
+        # [semaphore, holders]; dropped when the last holder leaves so the dict stays small.
+        user_entry = _limits["users"].setdefault(user_id, [asyncio.Semaphore(LLM_MAX_CONCURRENCY_PER_USER), 0])
+        user_entry[1] += 1
+    try:
+        if user_entry is not None:
+            async with user_entry[0]:
+                async with _limits["global"]:
+                    yield
+        else:
+            async with _limits["global"]:
+                yield
+    finally:
+        if user_entry is not None:
+            user_entry[1] -= 1
+            if user_entry[1] == 0:
+                _limits["users"].pop(user_id, None)
+
+
+def _is_retryable(error: Exception) -> bool:
+    import openai
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError, openai.RateLimitError, asyncio.TimeoutError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+def _backoff_seconds(attempt: int) -> float:
+    """Full jitter: uniform in [0, base * 2^attempt], capped."""
+    return random.uniform(0, min(LLM_BACKOFF_MAX_SECONDS, LLM_BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+async def chat_completion(purpose: str, user_id: Optional[str] = None, timeout: Optional[float] = None,
+                          max_retries: Optional[int] = None, **kwargs) -> Any:
+    """
+    client.chat.completions.create(**kwargs) with a concurrency slot, a per-attempt timeout and
+    retries on timeouts, connection errors, 429 and 5xx. `purpose` labels the metrics.
+    """
+    timeout = LLM_TIMEOUT_SECONDS if timeout is None else timeout
+    max_retries = LLM_MAX_RETRIES if max_retries is None else max_retries
+    start = time.perf_counter()
+    attempt = 0
+    async with _concurrency_slot(user_id):
+        while True:
+            try:
+                response = await asyncio.wait_for(get_client().chat.completions.create(timeout=timeout, **kwargs), timeout)
+                _record(purpose, time.perf_counter() - start, getattr(response, "usage", None), retries=attempt)
+                return response
+            except Exception as e:
+                if attempt >= max_retries or not _is_retryable(e):
+                    _record(purpose, time.perf_counter() - start, error=True, retries=attempt)
+                    raise
+                logging.warning(f"LLM call '{purpose}' failed ({type(e).__name__}), retry {attempt + 1}/{max_retries}")
+                await asyncio.sleep(_backoff_seconds(attempt))
+                attempt += 1
+
+
+async def stream_chat_completion(purpose: str, user_id: Optional[str] = None, timeout: Optional[float] = None,
+                                 max_retries: Optional[int] = None, **kwargs) -> AsyncIterator[Any]:
+    """
+    Streaming chat completion chunks. The concurrency slot is held until the stream ends; only
+    opening the stream is retried, since chunks already yielded cannot be taken back. `timeout`
+    also bounds the wait for each chunk, so a stalled stream releases its slot. Usage is requested
+    in the final chunk (choices empty) for the token histograms.
+    """
+    timeout = LLM_TIMEOUT_SECONDS if timeout is None else timeout
+    max_retries = LLM_MAX_RETRIES if max_retries is None else max_retries
+    kwargs.setdefault("stream_options", {"include_usage": True})
+    start = time.perf_counter()
+    attempt = 0
+    usage = None
+    async with _concurrency_slot(user_id):
+        while True:
+            try:
+                stream = await asyncio.wait_for(get_client().chat.completions.create(timeout=timeout, stream=True, **kwargs), timeout)
+                break
+            except Exception as e:
+                if attempt >= max_retries or not _is_retryable(e):
+                    _record(purpose, time.perf_counter() - start, error=True, retries=attempt)
+                    raise
+                await asyncio.sleep(_backoff_seconds(attempt))
+                attempt += 1
+        chunks = stream.__aiter__()
+        finished = False
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), timeout)
+                except StopAsyncIteration:
+                    break
+                usage = getattr(chunk, "usage", None) or usage
+                yield chunk
+            finished = True
+        except Exception:
+            _record(purpose, time.perf_counter() - start, usage, error=True, retries=attempt)
+            raise
+        finally:
+            # Stalled, failed or abandoned by the caller: drop the upstream connection too.
+            close = getattr(stream, "close", None)
+            if not finished and close is not None:
+                await close()
+        _record(purpose, time.perf_counter() - start, usage, retries=attempt)
@@ -0,0 +1,196 @@
+# AIworkshop2/llm_stub_server.py
+"""
+Deterministic OpenAI-compatible stand-in for load tests and offline runs.
+
+    python llm_stub_server.py --port 8001 --latency-ms 400 --error-rate 0.02
+    OPENAI_API_URL=http://127.0.0.1:8001/v1 OPENAI_API_KEY=stub uvicorn main:app
+
+Answers /v1/chat/completions (plain and streamed) with schema-valid canned responses for the
+prompts this app sends: simulation parameter extraction, simulation reports, general chat,
+auto-budget and VLM receipt extraction.
+"""
+import os
+import re
+import json
+import time
+import uuid
+import random
+import asyncio
+from typing import Dict, Any, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+STUB_LATENCY_MS = float(os.getenv("STUB_LLM_LATENCY_MS", "0"))
+STUB_JITTER_MS = float(os.getenv("STUB_LLM_JITTER_MS", "0"))
+STUB_ERROR_RATE = float(os.getenv("STUB_LLM_ERROR_RATE", "0"))
+STUB_RATE_LIMIT_RATE = float(os.getenv("STUB_LLM_RATE_LIMIT_RATE", "0"))
+STUB_SEED = int(os.getenv("STUB_LLM_SEED", "0"))
+# Streamed responses are split into chunks of this many words.
+STUB_STREAM_WORDS_PER_CHUNK = 3
+
+app = FastAPI(title="LLM stub")
+config: Dict[str, float] = {
+    "latency_ms": STUB_LATENCY_MS,
+    "jitter_ms": STUB_JITTER_MS,
+    "error_rate": STUB_ERROR_RATE,
+    "rate_limit_rate": STUB_RATE_LIMIT_RATE,
+}
+_rng = random.Random(STUB_SEED)
+stats: Dict[str, Any] = {"requests": 0, "errors": 0, "rate_limited": 0, "in_flight": 0, "max_in_flight": 0, "by_kind": {}}
+
+
+def _text(content: Any) -> str:
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content or ""
+
+
+def classify_request(messages: List[Dict[str, Any]]) -> str:
+    system = _text(messages[0].get("content")) if messages and messages[0].get("role") == "system" else ""
+    user_content = messages[-1].get("content") if messages else ""
+    if isinstance(user_content, list) and any(part.get("type") == "image_url" for part in user_content):
+        return "vlm"
+    if "financial parameter extractor" in system:
+        return "extraction"
+    if "JSON output generator for financial planning" in system:
+        return "budget"
+    if "Analyze these simulation results" in _text(user_content):
+        return "report"
+    return "chat"
+
+
+def canned_content(kind: str, messages: List[Dict[str, Any]]) -> str:
+    prompt = _text(messages[-1].get("content")) if messages else ""
+    if kind == "extraction":
+        amounts = [float(n.replace(",", "")) for n in re.findall(r"\d[\d,]*(?:\.\d+)?", prompt)]
+        return json.dumps({
+            "simulation_goal": "Stub Scenario",
+            "time_horizon_months": 12,
+            "monthly_impact": -amounts[0] if amounts else 0.0,
+            "one_time_impact": 0.0,
+            "target_amount": 0.0,
+        })
+    if kind == "budget":
+        match = re.search(r"Average Monthly Income: \S+ ([\d.]+)", prompt)
+        income = float(match.group(1)) if match else 0.0
+        shares = [("Bills", 30), ("Food", 15), ("Transport", 10), ("Discretionary/Other Expenses", 15), ("Savings", 20), ("Investment", 10)]
+        return json.dumps({
+            "explanation": "Stub budget: fixed shares of the average monthly income.",
+            "budget_allocation": [{"category": c, "amount": round(income * p / 100, 2), "percentage": float(p)} for c, p in shares],
+        })
+    if kind == "vlm":
+        return json.dumps({"transactions": [
+            {"date": "2025-01-15", "type": "Expense", "amount": 42.5, "category": "Food", "merchant": "Stub Cafe", "balance": 0.0},
+            {"date": "2025-01-16", "type": "Income", "amount": 3000.0, "category": "Salary", "merchant": "Stub Employer", "balance": 0.0},
+        ]})
+    if kind == "report":
+        horizon = re.search(r"FOR (\d+) MONTHS", prompt)
+        savings = re.search(r"NET SAVINGS Realized: (.+)", prompt)
+        return (
+            f"## Simulation Summary\n\nOver {horizon.group(1) if horizon else 'the next 12'} months your net savings come to "
+            f"{savings.group(1).strip() if savings else 'the simulated amount'}. This is a stub narrative for load testing: "
+            "the numbers above come from the simulation engine, the prose does not."
+        )
+    return "This is a stub answer from the local LLM stand-in server."
+
+
+def _usage(messages: List[Dict[str, Any]], content: str) -> Dict[str, int]:
+    prompt_tokens = sum(len(_text(m.get("content"))) for m in messages) // 4
+    completion_tokens = len(content) // 4
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+
+
+@app.get("/v1/models")
+@app.get("/models")
+async def list_models():
+    return {"object": "list", "data": [{"id": "stub", "object": "model", "owned_by": "stub"}]}
+
+
+@app.get("/stats")
+async def get_stats():
+    return {**stats, "config": config}
+
+
+@app.post("/v1/chat/completions")
+@app.post("/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    messages, model = body.get("messages", []), body.get("model", "stub")
+    kind = classify_request(messages)
+    stats["requests"] += 1
+    stats["by_kind"][kind] = stats["by_kind"].get(kind, 0) + 1
+    stats["in_flight"] += 1
+    stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+    try:
+        delay_ms = max(0.0, config["latency_ms"] + _rng.uniform(-config["jitter_ms"], config["jitter_ms"]))
+        await asyncio.sleep(delay_ms / 1000)
+
+        roll = _rng.random()
+        if roll < config["rate_limit_rate"]:
+            stats["rate_limited"] += 1
+            return JSONResponse({"error": {"message": "Stub rate limit", "type": "rate_limit_error"}}, status_code=429, headers={"retry-after": "1"})
+        if roll < config["rate_limit_rate"] + config["error_rate"]:
+            stats["errors"] += 1
+            return JSONResponse({"error": {"message": "Stub injected failure", "type": "server_error"}}, status_code=500)
+    finally:
+        stats["in_flight"] -= 1
+
+    content = canned_content(kind, messages)
+    completion_id, created = f"chatcmpl-stub-{uuid.uuid4().hex[:12]}", int(time.time())
+
+    if body.get("stream"):
+        words = content.split(" ")
+        pieces = [" ".join(words[i:i + STUB_STREAM_WORDS_PER_CHUNK]) + " " for i in range(0, len(words), STUB_STREAM_WORDS_PER_CHUNK)]
+        pieces[-1] = pieces[-1].rstrip(" ")
+
+        include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+
+        def event(choices: List[Dict[str, Any]], **extra) -> str:
+            return "data: " + json.dumps({
+                "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": choices, **extra,
+            }) + "\n\n"
+
+        def chunk(delta: Dict[str, Any], finish_reason: Any = None) -> str:
+            return event([{"index": 0, "delta": delta, "finish_reason": finish_reason}])
+
+        async def events():
+            yield chunk({"role": "assistant", "content": ""})
+            for piece in pieces:
+                yield chunk({"content": piece})
+            yield chunk({}, "stop")
+            if include_usage:
+                # Like the real API: one extra chunk with no choices carrying the usage.
+                yield event([], usage=_usage(messages, content))
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return {
+        "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": _usage(messages, content),
+    }
+
+
+def main():
+    import argparse
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Deterministic OpenAI-compatible LLM stub.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=STUB_LATENCY_MS)
+    parser.add_argument("--jitter-ms", type=float, default=STUB_JITTER_MS)
+    parser.add_argument("--error-rate", type=float, default=STUB_ERROR_RATE, help="Fraction of requests answered with HTTP 500.")
+    parser.add_argument("--rate-limit-rate", type=float, default=STUB_RATE_LIMIT_RATE, help="Fraction of requests answered with HTTP 429.")
+    args = parser.parse_args()
+
+    config.update(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate)
+    print(f"LLM stub on http://{args.host}:{args.port}/v1 with {config}")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,12 @@
+import os
+import glob
 import numpy as np
 import pandas as pd
 from sklearn.preprocessing import MinMaxScaler
 import torch
 import torch.nn as nn
 from torch.utils.data import DataLoader, TensorDataset
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, date, timedelta
 
 LOOKBACK = 30           
@@ -16,6 +18,17 @@ DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
 INPUT_FEATURES = ["income", "expense", "balance", "day_of_week", "day_of_month"]
 TARGET_FEATURES = ["income", "expense"] 
 
+# === Global (cross-user) model artifacts ===
+MODEL_DIR = os.getenv("FORECAST_MODEL_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "forecast_models"))
+GLOBAL_MODEL_PREFIX = "global_lstm"
+GLOBAL_MODEL_VERSION = os.getenv("FORECAST_MODEL_VERSION")  # Pin an artifact version, otherwise the latest is used
+GLOBAL_EPOCHS = 20
+GLOBAL_BATCH_SIZE = 256
+GLOBAL_FEATURES = ["income", "expense", "balance", "day_of_week", "day_of_month"]
+SCALE_FEATURES = ["log_scale"]
+
+_GLOBAL_MODEL_CACHE: Dict[str, Tuple[nn.Module, Dict[str, Any]]] = {}
+
 class MultiOutputLSTM(nn.Module):
     def __init__(self, input_size: int, output_size: int = 2, hidden_size: int = 64, num_layers: int = 2):
         super(MultiOutputLSTM, self).__init__()
@@ -28,6 +41,11 @@ class MultiOutputLSTM(nn.Module):
         out = self.fc(out)
         return out
 
+    def forward_with_state(self, x: torch.Tensor, state: Optional[Tuple[torch.Tensor, torch.Tensor]] = None):
+        """Same as forward but carries the LSTM (h, c) state so a rollout can feed one new day at a time."""
+        out, state = self.lstm(x, state)
+        return self.fc(out[:, -1, :]), state
+
 def preprocess_transactions(transactions: List[Dict[str, Any]]) -> pd.DataFrame:
     if not transactions:
         raise ValueError("No transaction data available for forecasting.")
@@ -66,7 +84,52 @@ def create_sequences(data: np.ndarray, flow_data: np.ndarray, lookback: int, tar
         y.append(flow_data[i, target_indices])
     return np.array(X), np.array(y)
 
-def generate_lstm_forecast(transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
+
+def build_forecast_report(daily_summary: pd.DataFrame, forecast_flows: np.ndarray, forecast_balances: List[float], model_notes: str) -> Dict[str, Any]:
+    """Shapes predicted daily flows into the response schema shared by every forecast engine."""
+    last_date = daily_summary["date"].iloc[-1].date()
+    future_dates = [last_date + timedelta(days=i + 1) for i in range(len(forecast_balances))]
+
+    forecast_total_income = round(float(forecast_flows[:, 0].sum()), 2)
+    forecast_total_expense = round(float(forecast_flows[:, 1].sum()), 2)
+    forecast_final_balance = round(float(forecast_balances[-1]), 2)
+    
+    forecast_results = [
+        {
+            "date": date_obj.isoformat(),
+            "forecast_income": float(round(income, 2)),
+            "forecast_expense": float(round(expense, 2)),
+            "forecast_balance": float(round(balance, 2))
+        }
+        for date_obj, income, expense, balance in zip(future_dates, forecast_flows[:, 0], forecast_flows[:, 1], forecast_balances)
+    ]
+    
+    return {
+        "summary": {
+            "start_date": last_date.isoformat(),
+            "start_balance": round(float(daily_summary["balance"].iloc[-1]), 2),
+            "end_date": future_dates[-1].isoformat(),
+            "forecast_end_balance": forecast_final_balance,
+            "forecast_total_income": forecast_total_income,
+            "forecast_total_expense": forecast_total_expense,
+            "net_flow_forecast": round(forecast_total_income - forecast_total_expense, 2),
+            "model_notes": model_notes
+        },
+        "forecast_results": forecast_results
+    }
+
+def generate_lstm_forecast(transactions: List[Dict[str, Any]], engine: Optional[str] = None, user_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    engine: 'auto' (default), 'lstm', or one of stat_forecast.STAT_ENGINES.
+    'auto' uses the statistical engine for users with at most STAT_FORECAST_MAX_DAYS of history.
+    LSTM forecasts prefer the user's nightly model, then the global model, then per-request training.
+    """
+    from stat_forecast import STAT_ENGINES, DEFAULT_STAT_ENGINE, STAT_FORECAST_MAX_DAYS, generate_stat_forecast
+
+    engine = (engine or "auto").lower()
+    if engine not in ["auto", "lstm"] + STAT_ENGINES:
+        return {"error": f"Unknown forecast engine '{engine}'. Use auto, lstm or one of {STAT_ENGINES}."}
+
     try:
         daily_summary = preprocess_transactions(transactions)
     except ValueError as e:
@@ -76,7 +139,29 @@ def generate_lstm_forecast(transactions: List[Dict[str, Any]]) -> Dict[str, Any]
     # === Optimization: Relax restrictions for demo/new users ===
     if len(daily_summary) < 1: 
         return {"error": f"Not enough historical data ({len(daily_summary)} days). Need at least 1 day."}
-    
+
+    if engine in STAT_ENGINES:
+        return generate_stat_forecast(daily_summary, engine)
+    if engine == "auto" and len(daily_summary) <= STAT_FORECAST_MAX_DAYS:
+        return generate_stat_forecast(daily_summary, DEFAULT_STAT_ENGINE)
+
+    if user_id:
+        user_model = load_user_model(user_id)
+        if user_model is not None:
+            model, metadata = user_model
+            return forecast_with_global_model(daily_summary, model, metadata)
+
+    # Prefer the shared cross-user model: inference only, no per-request training.
+    from forecast_export import load_forecaster
+    global_model = load_forecaster()
+    if global_model is not None:
+        model, metadata = global_model
+        return forecast_with_global_model(daily_summary, model, metadata)
+
+    return train_user_forecast(daily_summary)
+
+def train_user_forecast(daily_summary: pd.DataFrame) -> Dict[str, Any]:
+    """Legacy path: trains a fresh per-user LSTM on the request. Used when no global artifact exists."""
     # If data is less than LOOKBACK, we will pad it later.
     if len(daily_summary) <= LOOKBACK:
         print(f"Warning: Low data mode ({len(daily_summary)} days). Forecast accuracy may be low.")
@@ -158,7 +243,6 @@ def generate_lstm_forecast(transactions: List[Dict[str, Any]]) -> Dict[str, Any]
     current_balance = float(daily_summary["balance"].iloc[-1])
     last_date = daily_summary["date"].iloc[-1].date()
     forecast_balances = []
-    future_dates = []
 
     for i in range(FORECAST_DAYS):
         with torch.no_grad():
@@ -174,7 +258,6 @@ def generate_lstm_forecast(transactions: List[Dict[str, Any]]) -> Dict[str, Any]
         forecast_balances.append(float(current_balance))
         
         next_date = last_date + timedelta(days=i + 1)
-        future_dates.append(next_date)
         
         next_flow_raw = np.array([pred_income, pred_expense, current_balance])
         next_flow_scaled = scaler_flow.transform(next_flow_raw.reshape(1, -1)).flatten()
@@ -188,32 +271,313 @@ def generate_lstm_forecast(transactions: List[Dict[str, Any]]) -> Dict[str, Any]
         new_seq = torch.cat((last_seq[:, 1:, :], next_input_tensor), dim=1)
         last_seq = new_seq
         
-    forecast_flows = np.array(forecast_flows)
+    return build_forecast_report(
+        daily_summary, np.array(forecast_flows), forecast_balances,
+        f"PyTorch LSTM based on {LOOKBACK}-day lookback."
+    )
 
-    forecast_total_income = round(float(forecast_flows[:, 0].sum()), 2)
-    forecast_total_expense = round(float(forecast_flows[:, 1].sum()), 2)
-    forecast_final_balance = round(float(forecast_balances[-1]), 2)
-    
-    forecast_results = [
-        {
-            "date": date_obj.isoformat(),
-            "forecast_income": float(round(income, 2)),
-            "forecast_expense": float(round(expense, 2)),
-            "forecast_balance": float(round(balance, 2))
-        }
-        for date_obj, income, expense, balance in zip(future_dates, forecast_flows[:, 0], forecast_flows[:, 1], forecast_balances)
-    ]
-    
-    return {
-        "summary": {
-            "start_date": daily_summary["date"].iloc[-1].date().isoformat(),
-            "start_balance": round(float(daily_summary["balance"].iloc[-1]), 2),
-            "end_date": future_dates[-1].isoformat(),
-            "forecast_end_balance": forecast_final_balance,
-            "forecast_total_income": forecast_total_income,
-            "forecast_total_expense": forecast_total_expense,
-            "net_flow_forecast": round(forecast_total_income - forecast_total_expense, 2),
-            "model_notes": f"PyTorch LSTM based on {LOOKBACK}-day lookback."
-        },
-        "forecast_results": forecast_results
-    }
\ No newline at end of file
+# ============================================================
+# Global cross-user model
+# ============================================================
+
+def get_user_scale(daily_summary: pd.DataFrame) -> float:
+    """Average daily gross flow. Every user's series is expressed in multiples of it so one model fits all users."""
+    scale = float((daily_summary["income"] + daily_summary["expense"]).mean())
+    return max(scale, 1.0)
+
+def get_raw_features(daily_summary: pd.DataFrame) -> np.ndarray:
+    """(days, 5) float64 array of GLOBAL_FEATURES, padded with zero-flow days up to LOOKBACK."""
+    raw = daily_summary[GLOBAL_FEATURES].values.astype(np.float64)
+    missing = LOOKBACK - len(raw)
+    if missing > 0:
+        first_date = daily_summary["date"].iloc[0]
+        pad_dates = [first_date - timedelta(days=missing - i) for i in range(missing)]
+        padding = np.array([
+            [0.0, 0.0, raw[0, 2] - raw[0, 0] + raw[0, 1], d.weekday(), d.day]
+            for d in pad_dates
+        ])
+        raw = np.concatenate((padding, raw))
+    return raw
+
+def normalize_windows(windows: np.ndarray, scales: np.ndarray, use_scale_features: bool, ref_balance: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Normalizes raw (batch, LOOKBACK, 5) windows with per-user scales.
+    Balance is made relative to the start of each window so the cumulative level does not leak across users.
+    """
+    scales = scales.reshape(-1, 1)
+    if ref_balance is None:
+        ref_balance = windows[:, :1, 2]
+    n_features = len(GLOBAL_FEATURES) + (len(SCALE_FEATURES) if use_scale_features else 0)
+    out = np.empty(windows.shape[:2] + (n_features,), dtype=np.float32)
+    out[..., 0] = windows[..., 0] / scales
+    out[..., 1] = windows[..., 1] / scales
+    out[..., 2] = (windows[..., 2] - ref_balance) / (scales * LOOKBACK)
+    out[..., 3] = windows[..., 3] / 6.0
+    out[..., 4] = (windows[..., 4] - 1.0) / 30.0
+    if use_scale_features:
+        out[..., 5] = np.log1p(scales) / 10.0
+    return out
+
+def build_user_windows(daily_summary: pd.DataFrame, use_scale_features: bool = True) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """Normalized sliding windows and next-day targets for one user, or None if the history is too short."""
+    if len(daily_summary) <= LOOKBACK:
+        return None
+    raw = get_raw_features(daily_summary)
+    scale = get_user_scale(daily_summary)
+    windows = np.lib.stride_tricks.sliding_window_view(raw[:-1], LOOKBACK, axis=0).transpose(0, 2, 1)
+    X = normalize_windows(windows, np.full(len(windows), scale), use_scale_features)
+    y = (raw[LOOKBACK:, :2] / scale).astype(np.float32)
+    return X, y
+
+def build_global_training_set(daily_summaries: List[pd.DataFrame], use_scale_features: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """Stacks normalized sliding windows and next-day targets from every user's daily series."""
+    parts = [build_user_windows(d, use_scale_features) for d in daily_summaries]
+    parts = [p for p in parts if p is not None]
+
+    if not parts:
+        raise ValueError(f"No user has more than {LOOKBACK} days of history to train the global model.")
+    return np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+
+def train_global_model(
+    daily_summaries: List[pd.DataFrame],
+    use_scale_features: bool = True,
+    epochs: int = GLOBAL_EPOCHS,
+    batch_size: int = GLOBAL_BATCH_SIZE
+) -> Tuple[nn.Module, Dict[str, Any]]:
+    """Fits one shared MultiOutputLSTM on the normalized series of all users."""
+    X, y = build_global_training_set(daily_summaries, use_scale_features)
+    loader = DataLoader(TensorDataset(torch.from_numpy(X), torch.from_numpy(y)), batch_size=batch_size, shuffle=True)
+
+    model = MultiOutputLSTM(input_size=X.shape[2], output_size=y.shape[1]).to(DEVICE)
+    criterion = nn.MSELoss()
+    optimizer = torch.optim.Adam(model.parameters(), lr=LR)
+
+    model.train()
+    final_loss = 0.0
+    for _ in range(epochs):
+        epoch_loss = 0.0
+        for batch_X, batch_y in loader:
+            batch_X, batch_y = batch_X.to(DEVICE), batch_y.to(DEVICE)
+            optimizer.zero_grad()
+            loss = criterion(model(batch_X), batch_y)
+            loss.backward()
+            optimizer.step()
+            epoch_loss += loss.item() * len(batch_X)
+        final_loss = epoch_loss / len(X)
+
+    model.eval()
+    metadata = {
+        "lookback": LOOKBACK,
+        "input_size": int(X.shape[2]),
+        "output_size": int(y.shape[1]),
+        "hidden_size": model.lstm.hidden_size,
+        "num_layers": model.lstm.num_layers,
+        "use_scale_features": use_scale_features,
+        "num_users": len([d for d in daily_summaries if len(d) > LOOKBACK]),
+        "num_windows": int(len(X)),
+        "epochs": epochs,
+        "final_loss": float(final_loss),
+        "trained_at": datetime.now().isoformat()
+    }
+    return model.cpu(), metadata
+
+def save_global_model(model: nn.Module, metadata: Dict[str, Any], model_dir: Optional[str] = None) -> str:
+    """Writes a versioned artifact (global_lstm_<version>.pt) and returns its path."""
+    model_dir = model_dir or MODEL_DIR
+    os.makedirs(model_dir, exist_ok=True)
+    version = datetime.now().strftime("%Y%m%d%H%M%S")
+    metadata = {**metadata, "version": version}
+    path = os.path.join(model_dir, f"{GLOBAL_MODEL_PREFIX}_{version}.pt")
+    torch.save({"state_dict": model.state_dict(), "metadata": metadata}, path)
+    return path
+
+def find_global_model_path(version: Optional[str] = None, model_dir: Optional[str] = None) -> Optional[str]:
+    model_dir = model_dir or MODEL_DIR
+    if version:
+        path = os.path.join(model_dir, f"{GLOBAL_MODEL_PREFIX}_{version}.pt")
+        return path if os.path.exists(path) else None
+    candidates = sorted(glob.glob(os.path.join(model_dir, f"{GLOBAL_MODEL_PREFIX}_*.pt")))
+    return candidates[-1] if candidates else None
+
+def load_global_model(version: Optional[str] = None, model_dir: Optional[str] = None) -> Optional[Tuple[nn.Module, Dict[str, Any]]]:
+    """Loads the global model once per process. Returns None when no artifact has been trained yet."""
+    path = find_global_model_path(version or GLOBAL_MODEL_VERSION, model_dir)
+    if path is None:
+        return None
+    if path not in _GLOBAL_MODEL_CACHE:
+        checkpoint = torch.load(path, map_location="cpu")
+        metadata = checkpoint["metadata"]
+        model = MultiOutputLSTM(
+            input_size=metadata["input_size"],
+            output_size=metadata["output_size"],
+            hidden_size=metadata["hidden_size"],
+            num_layers=metadata["num_layers"]
+        )
+        model.load_state_dict(checkpoint["state_dict"])
+        model.eval()
+        _GLOBAL_MODEL_CACHE[path] = (model, metadata)
+    return _GLOBAL_MODEL_CACHE[path]
+
+def forecast_with_global_model(daily_summary: pd.DataFrame, model: Any, metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Autoregressive FORECAST_DAYS rollout of the shared model. Inference only.
+    The lookback window is encoded once; each forecast day is then fed as a single step on the carried LSTM state.
+    `model` is anything exposing forward_with_state: the eager module or a forecast_export runtime.
+    """
+    use_scale_features = metadata.get("use_scale_features", True)
+    scale = get_user_scale(daily_summary)
+    scales = np.array([scale])
+    window = get_raw_features(daily_summary)[np.newaxis, -LOOKBACK:]
+    ref_balance = window[:, :1, 2]
+    last_date = daily_summary["date"].iloc[-1].date()
+
+    forecast_flows = np.zeros((FORECAST_DAYS, 2))
+    forecast_balances = []
+    current_balance = float(daily_summary["balance"].iloc[-1])
+    next_step = np.zeros((1, 1, len(GLOBAL_FEATURES)))
+
+    with torch.inference_mode():
+        x = torch.from_numpy(normalize_windows(window, scales, use_scale_features))
+        pred, state = model.forward_with_state(x)
+        for i in range(FORECAST_DAYS):
+            pred = pred[0].numpy() * scale
+            pred_income, pred_expense = max(0.0, float(pred[0])), max(0.0, float(pred[1]))
+
+            forecast_flows[i] = (pred_income, pred_expense)
+            current_balance = current_balance + pred_income - pred_expense
+            forecast_balances.append(current_balance)
+
+            if i + 1 < FORECAST_DAYS:
+                next_date = last_date + timedelta(days=i + 1)
+                next_step[0, 0] = (pred_income, pred_expense, current_balance, next_date.weekday(), next_date.day)
+                x = torch.from_numpy(normalize_windows(next_step, scales, use_scale_features, ref_balance))
+                pred, state = model.forward_with_state(x, state)
+
+    return build_forecast_report(
+        daily_summary, forecast_flows, forecast_balances,
+        f"{'Per-user' if metadata.get('user_id') else 'Global'} PyTorch LSTM (v{metadata.get('version', 'unknown')}) based on {LOOKBACK}-day lookback."
+    )
+
+# ============================================================
+# Batched per-user models (nightly refresh)
+# ============================================================
+
+USER_MODEL_SUBDIR = "users"
+NIGHTLY_EPOCHS = 10
+NIGHTLY_BATCH_SIZE = 1024
+
+_USER_MODEL_CACHE: Dict[str, Tuple[float, nn.Module, Dict[str, Any]]] = {}
+
+class MultiHeadLSTM(nn.Module):
+    """Shared LSTM trunk with one linear head per user, so many users train in a single batched pass."""
+
+    def __init__(self, input_size: int, num_heads: int, output_size: int = 2, hidden_size: int = 64, num_layers: int = 2):
+        super(MultiHeadLSTM, self).__init__()
+        self.lstm = nn.LSTM(input_size, hidden_size, num_layers, batch_first=True)
+        bound = 1.0 / np.sqrt(hidden_size)
+        self.head_weight = nn.Parameter(torch.empty(num_heads, output_size, hidden_size).uniform_(-bound, bound))
+        self.head_bias = nn.Parameter(torch.empty(num_heads, output_size).uniform_(-bound, bound))
+
+    def forward(self, x: torch.Tensor, head_idx: torch.Tensor) -> torch.Tensor:
+        out, _ = self.lstm(x)
+        out = out[:, -1, :]
+        return torch.einsum("bh,boh->bo", out, self.head_weight[head_idx]) + self.head_bias[head_idx]
+
+    def export_head(self, head: int) -> MultiOutputLSTM:
+        """Trunk + one head as a plain MultiOutputLSTM, so per-user artifacts use the normal inference path."""
+        model = MultiOutputLSTM(self.lstm.input_size, self.head_weight.shape[1], self.lstm.hidden_size, self.lstm.num_layers)
+        model.lstm.load_state_dict(self.lstm.state_dict())
+        model.fc.weight.data.copy_(self.head_weight.data[head])
+        model.fc.bias.data.copy_(self.head_bias.data[head])
+        return model.eval()
+
+def train_user_models_batched(
+    daily_summaries: Dict[str, pd.DataFrame],
+    use_scale_features: bool = True,
+    epochs: int = NIGHTLY_EPOCHS,
+    batch_size: int = NIGHTLY_BATCH_SIZE
+) -> Dict[str, Tuple[MultiOutputLSTM, Dict[str, Any]]]:
+    """
+    Packs every user's windows into one tensor and trains a shared trunk with independent per-user heads.
+    Returns {user_id: (model, metadata)}. Users with at most LOOKBACK days are skipped (served statistically).
+    """
+    user_ids, X_parts, y_parts, head_parts = [], [], [], []
+    for user_id, daily_summary in daily_summaries.items():
+        windows = build_user_windows(daily_summary, use_scale_features)
+        if windows is None:
+            continue
+        head_parts.append(np.full(len(windows[0]), len(user_ids), dtype=np.int64))
+        user_ids.append(user_id)
+        X_parts.append(windows[0])
+        y_parts.append(windows[1])
+
+    if not user_ids:
+        return {}
+
+    X = torch.from_numpy(np.concatenate(X_parts))
+    y = torch.from_numpy(np.concatenate(y_parts))
+    heads = torch.from_numpy(np.concatenate(head_parts))
+    loader = DataLoader(TensorDataset(X, y, heads), batch_size=batch_size, shuffle=True)
+
+    model = MultiHeadLSTM(input_size=X.shape[2], num_heads=len(user_ids), output_size=y.shape[1]).to(DEVICE)
+    criterion = nn.MSELoss()
+    optimizer = torch.optim.Adam(model.parameters(), lr=LR)
+
+    model.train()
+    for _ in range(epochs):
+        for batch_X, batch_y, batch_heads in loader:
+            batch_X, batch_y, batch_heads = batch_X.to(DEVICE), batch_y.to(DEVICE), batch_heads.to(DEVICE)
+            optimizer.zero_grad()
+            loss = criterion(model(batch_X, batch_heads), batch_y)
+            loss.backward()
+            optimizer.step()
+
+    model = model.cpu().eval()
+    trained_at = datetime.now()
+    results = {}
+    for head, user_id in enumerate(user_ids):
+        results[user_id] = (model.export_head(head), {
+            "lookback": LOOKBACK,
+            "input_size": int(X.shape[2]),
+            "output_size": int(y.shape[1]),
+            "hidden_size": model.lstm.hidden_size,
+            "num_layers": model.lstm.num_layers,
+            "use_scale_features": use_scale_features,
+            "num_windows": int(len(X_parts[head])),
+            "epochs": epochs,
+            "user_id": user_id,
+            "version": trained_at.strftime("%Y%m%d%H%M%S"),
+            "trained_at": trained_at.isoformat()
+        })
+    return results
+
+def get_user_model_path(user_id: str, model_dir: Optional[str] = None) -> str:
+    return os.path.join(model_dir or MODEL_DIR, USER_MODEL_SUBDIR, f"{user_id}.pt")
+
+def save_user_model(user_id: str, model: nn.Module, metadata: Dict[str, Any], model_dir: Optional[str] = None) -> str:
+    """Writes (or replaces) the per-user artifact. Written to a temp file first so readers never see a partial file."""
+    path = get_user_model_path(user_id, model_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    torch.save({"state_dict": model.state_dict(), "metadata": metadata}, tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+def load_user_model(user_id: str, model_dir: Optional[str] = None) -> Optional[Tuple[nn.Module, Dict[str, Any]]]:
+    """Loads a user's nightly model, reloading when the artifact changed on disk. None if the user has none."""
+    path = get_user_model_path(user_id, model_dir)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+
+    cached = _USER_MODEL_CACHE.get(path)
+    if cached is None or cached[0] != mtime:
+        checkpoint = torch.load(path, map_location="cpu")
+        metadata = checkpoint["metadata"]
+        model = MultiOutputLSTM(metadata["input_size"], metadata["output_size"], metadata["hidden_size"], metadata["num_layers"])
+        model.load_state_dict(checkpoint["state_dict"])
+        model.eval()
+        _USER_MODEL_CACHE[path] = (mtime, model, metadata)
+        cached = _USER_MODEL_CACHE[path]
+    return cached[1], cached[2]
@@ -1,27 +1,25 @@
 import firebase_admin
 import logging
 from firebase_admin import initialize_app, credentials, firestore, auth, storage 
-from models import Transaction, TransactionDB, AccountDB, UserSignup
-from vlm import extract_transactions_from_data
-from fhsm import generate_fhs_report, classify_fhs
+from models import Transaction, TransactionDB, AccountDB, UserSignup, SimulationBatchRequest
 from fastapi import FastAPI, HTTPException, Depends, status, UploadFile, File, Path, Query
-from lstm import generate_lstm_forecast 
 from typing import Annotated, List, Dict, Any, Optional
 from datetime import date
 import base64
+import json
 import time
+import asyncio
+import importlib
+from contextlib import asynccontextmanager
 from pathlib import Path as PathLib
 from accounts import accounts_router, update_account_balance 
 from auth_deps import get_current_user_id 
 from goals import goals_router
-from rl import generate_rl_optimization_report, fetch_asset_data, TICKERS 
-from simulation import generate_simulation_report as run_simulation, generate_general_chat_response
 from subscription import get_recurring_report
 from calender import calendar_router
-from budgeter import generate_auto_budget, analyze_recent_transactions
 from debt import debt_router
-from twin import twin_router, generate_twin_logic
-from fastapi.responses import FileResponse
+from twin import twin_router
+from fastapi.responses import FileResponse, StreamingResponse
 
 import os
 from fastapi.middleware.cors import CORSMiddleware
@@ -29,6 +27,12 @@ import datetime
 from categories import categories_router
 import traceback
 
+# Heavy engines (torch, stable_baselines3, sklearn, openai, matplotlib...) are imported inside the endpoints
+# that use them, so CRUD-only workers and --reload cycles do not pay for them at boot.
+HEAVY_ENGINE_MODULES = ["fhsm", "lstm", "stat_forecast", "simulation", "budgeter", "vlm", "rl", "exporter"]
+# "all" or a comma-separated subset of HEAVY_ENGINE_MODULES to import in the background right after startup.
+WARMUP_ENGINES = os.getenv("WARMUP_ENGINES", "")
+
 FIREBASE_CREDENTIAL_PATH = './serviceAccountKey.json'
 FIREBASE_STORAGE_BUCKET = "ai-personal-finance-assi-bdf76.firebasestorage.app" 
 
@@ -52,10 +56,28 @@ def get_db():
         print(f"Database connection error: {e}")
         return None
 
+def warm_up_engines(modules: List[str]) -> None:
+    for name in modules:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+            print(f"Warm-up: imported {name} in {time.perf_counter() - start:.2f}s")
+        except Exception as e:
+            print(f"Warm-up: failed to import {name}: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    modules = HEAVY_ENGINE_MODULES if WARMUP_ENGINES == "all" else [m.strip() for m in WARMUP_ENGINES.split(",") if m.strip()]
+    if modules:
+        # Runs in a worker thread so the app starts serving requests while the engines load.
+        asyncio.get_running_loop().run_in_executor(None, warm_up_engines, modules)
+    yield
+
 app = FastAPI(
     title="AI Personal Finance Assistant Backend",
     description="Backend API for managing transactions, accounts, and generating FHS reports.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Set up logging
@@ -179,7 +201,8 @@ async def extract_and_save_vlm_transactions(
 
         base64_data = base64.b64encode(contents).decode('utf-8')
         
-        vlm_transactions = await extract_transactions_from_data(base64_data, mime_type)
+        from vlm import extract_transactions_from_data
+        vlm_transactions = await extract_transactions_from_data(base64_data, mime_type, user_id)
         
         if not vlm_transactions:
             return [] 
@@ -244,6 +267,7 @@ async def get_fhs_report(
                 "message": "Please upload or manually create transactions first."
             }
         
+        from fhsm import generate_fhs_report
         fhs_report = generate_fhs_report(transactions)
         
         return fhs_report
@@ -257,7 +281,8 @@ async def get_fhs_report(
     
 @app.get("/reports/forecast/lstm")
 async def get_lstm_forecast_report(
-    user_id: Annotated[str, Depends(get_current_user_id)]
+    user_id: Annotated[str, Depends(get_current_user_id)],
+    engine: Optional[str] = Query(None, description="Forecast engine: auto (default), lstm, seasonal_naive, ets or bootstrap.")
 ):
     db = get_db()
     if not db:
@@ -285,7 +310,8 @@ async def get_lstm_forecast_report(
             }
         
         
-        lstm_report = generate_lstm_forecast(transactions)
+        from lstm import generate_lstm_forecast
+        lstm_report = generate_lstm_forecast(transactions, engine=engine, user_id=user_id)
         
         if "error" in lstm_report:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=lstm_report["error"])
@@ -305,69 +331,95 @@ async def get_lstm_forecast_report(
 
 # === ASYNC WRAPPERS FOR SIMULATION ===
 async def async_get_fhs_report_internal(transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    from fhsm import generate_fhs_report
     return generate_fhs_report(transactions)
 
-async def async_get_lstm_forecast_internal(transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
-    return generate_lstm_forecast(transactions)
+async def async_get_lstm_forecast_internal(transactions: List[Dict[str, Any]], user_id: Optional[str] = None) -> Dict[str, Any]:
+    from lstm import generate_lstm_forecast
+    return generate_lstm_forecast(transactions, user_id=user_id)
+
+
+def fetch_user_transactions(user_id: str, db: Any) -> List[Dict[str, Any]]:
+    """The user's transactions oldest first, with ISO-formatted dates."""
+    transactions_ref = db.collection('transactions').where("user_id", "==", user_id).order_by("transaction_date")
+    transactions = []
+    for doc in transactions_ref.stream():
+        transaction_data = doc.to_dict()
+        if hasattr(transaction_data.get('transaction_date'), 'isoformat'):
+            transaction_data['transaction_date'] = transaction_data['transaction_date'].isoformat()
+        transactions.append(transaction_data)
+    return transactions
+
+async def build_budget_analysis(user_id: str, db: Any, transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Recent-transaction budget analysis with the accurate last-3-month averages filled in."""
+    from balance_manager import get_average_metrics_last_3_months
+    from budgeter import analyze_recent_transactions
+
+    metrics = await get_average_metrics_last_3_months(user_id, db)
+    
+    budget_analysis = analyze_recent_transactions(transactions)
+    # Primary averages for AI context
+    avg_income = metrics.get("avg_monthly_income", budget_analysis.get('avg_monthly_income', 0.0))
+    avg_spending = metrics.get("avg_monthly_spending", sum(budget_analysis.get('avg_monthly_spending', {}).values()))
+    
+    budget_analysis['avg_monthly_income'] = avg_income
+    budget_analysis['accurate_total_spending'] = avg_spending
+    return budget_analysis
+
+async def build_simulation_context(user_id: str, db: Any, transactions: List[Dict[str, Any]]):
+    """(budget_analysis, twin_scenarios) grounded in the accurate last-3-month averages."""
+    from twin import generate_twin_logic
+
+    budget_analysis = await build_budget_analysis(user_id, db, transactions)
+    # Calculate totals for Twin (Use accurate averages)
+    twin_scenarios = generate_twin_logic(budget_analysis['avg_monthly_income'], budget_analysis['accurate_total_spending'], transactions)
+    return budget_analysis, twin_scenarios
 
 
 @app.post("/reports/simulate")
 async def simulate_user_question(
     user_question: Annotated[str, Query(description="The user's natural language question for financial simulation.")],
     user_id: Annotated[str, Depends(get_current_user_id)],
-    currency: Optional[str] = Query("USD", description="The user's preferred currency (e.g., MYR, USD).")
+    currency: Optional[str] = Query("USD", description="The user's preferred currency (e.g., MYR, USD)."),
+    mode: str = Query("deterministic", description="deterministic, or monte_carlo to add P5/P50/P95 balance bands drawn from the user's own history.")
 ):
     db = get_db()
     if not db:
         raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database service unavailable")
 
     try:
-        from balance_manager import get_average_metrics_last_3_months
+        from simulation import generate_simulation_report as run_simulation, generate_general_chat_response, SIMULATION_MODES
+        from fhsm import fetch_and_process_data
+        if mode not in SIMULATION_MODES:
+            raise HTTPException(status_code=400, detail=f"Unknown simulation mode '{mode}'. Use one of {SIMULATION_MODES}.")
         
         # 1. Fetch Transactions
-        transactions_ref = db.collection('transactions').where("user_id", "==", user_id).order_by("transaction_date")
-        docs = transactions_ref.stream()
-        
-        transactions = []
-        for doc in docs:
-            transaction_data = doc.to_dict()
-            if hasattr(transaction_data.get('transaction_date'), 'isoformat'):
-                transaction_data['transaction_date'] = transaction_data['transaction_date'].isoformat()
-            transactions.append(transaction_data)
+        transactions = fetch_user_transactions(user_id, db)
 
         if len(transactions) < 1: 
             print(f"User {user_id} has no transactions. Switching to General Chat mode.")
-            general_response = await generate_general_chat_response(user_question, currency=currency)
+            general_response = await generate_general_chat_response(user_question, currency=currency, user_id=user_id)
             return {
                 "simulation_report": general_response,
                 "status": "general_chat",
                 "note": "Not enough data for full simulation."
             }
 
-        # 2. Get Accurate 3rd-Month Metrics for Simulation Context
-        metrics = await get_average_metrics_last_3_months(user_id, db)
-        
-        budget_analysis = analyze_recent_transactions(transactions)
-        # Primary averages for AI context
-        avg_income = metrics.get("avg_monthly_income", budget_analysis.get('avg_monthly_income', 0.0))
-        avg_spending = metrics.get("avg_monthly_spending", sum(budget_analysis.get('avg_monthly_spending', {}).values()))
-        
-        budget_analysis['avg_monthly_income'] = avg_income
-        budget_analysis['accurate_total_spending'] = avg_spending
-        
-        # 3. Calculate totals for Twin (Use accurate averages)
-        twin_scenarios = generate_twin_logic(avg_income, avg_spending, transactions)
+        # 2-3. Accurate 3-month metrics and Twin scenarios for the simulation context
+        budget_analysis, twin_scenarios = await build_simulation_context(user_id, db, transactions)
         
         simulation_result = await run_simulation(
             user_id=user_id,
             user_question=user_question,
             db=db,
             fhs_report_func=lambda uid: async_get_fhs_report_internal(transactions),
-            lstm_report_func=lambda uid: async_get_lstm_forecast_internal(transactions),
+            lstm_report_func=lambda uid: async_get_lstm_forecast_internal(transactions, uid),
             get_balance_func=get_total_current_balance, 
             budget_analysis=budget_analysis,
             twin_scenarios=twin_scenarios,
-            currency=currency
+            currency=currency,
+            mode=mode,
+            daily_summary_func=lambda: fetch_and_process_data(transactions)
         )
         
         return simulation_result
@@ -382,6 +434,125 @@ async def simulate_user_question(
         }
     
 
+@app.post("/reports/simulate/stream")
+async def stream_simulation(
+    user_question: Annotated[str, Query(description="The user's natural language question for financial simulation.")],
+    user_id: Annotated[str, Depends(get_current_user_id)],
+    currency: Optional[str] = Query("USD", description="The user's preferred currency (e.g., MYR, USD)."),
+    mode: str = Query("deterministic", description="deterministic or monte_carlo, as for /reports/simulate.")
+):
+    """
+    Server-sent-event variant of /reports/simulate. Emits one `simulation` event with the numbers as soon
+    as they are computed, then `token` events with the narrative as the model writes it, then `done`.
+    """
+    db = get_db()
+    if not db:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database service unavailable")
+
+    from simulation import compute_simulation, stream_detailed_report, generate_general_chat_response, SafeEncoder, SIMULATION_MODES, OPENAI_API_KEY
+    from fhsm import fetch_and_process_data
+    if mode not in SIMULATION_MODES:
+        raise HTTPException(status_code=400, detail=f"Unknown simulation mode '{mode}'. Use one of {SIMULATION_MODES}.")
+    if not OPENAI_API_KEY:
+        raise HTTPException(status_code=500, detail="OpenAI API Key missing.")
+
+    def sse(event: str, data: Any) -> str:
+        return f"event: {event}\ndata: {json.dumps(data, cls=SafeEncoder)}\n\n"
+
+    async def events():
+        try:
+            transactions = fetch_user_transactions(user_id, db)
+            if not transactions:
+                yield sse("simulation", {"status": "general_chat", "note": "Not enough data for full simulation."})
+                yield sse("token", {"text": await generate_general_chat_response(user_question, currency=currency, user_id=user_id)})
+                yield sse("done", {})
+                return
+
+            budget_analysis = await build_budget_analysis(user_id, db, transactions)
+            params, simulation_data, _ = await compute_simulation(
+                user_id, user_question, db,
+                fhs_report_func=lambda uid: async_get_fhs_report_internal(transactions),
+                lstm_report_func=lambda uid: async_get_lstm_forecast_internal(transactions, uid),
+                get_balance_func=get_total_current_balance,
+                budget_analysis=budget_analysis,
+                currency=currency,
+                mode=mode,
+                daily_summary_func=lambda: fetch_and_process_data(transactions)
+            )
+            yield sse("simulation", {"raw_simulation_data": simulation_data, "extracted_parameters": params})
+
+            async for text in stream_detailed_report(user_question, simulation_data, currency, user_id):
+                yield sse("token", {"text": text})
+            yield sse("done", {})
+        except Exception as e:
+            logger.error(f"Simulation stream failed for user {user_id}: {str(e)}", exc_info=True)
+            yield sse("error", {"detail": getattr(e, "detail", str(e))})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.post("/reports/simulate/batch")
+async def simulate_scenario_batch(
+    request: SimulationBatchRequest,
+    user_id: Annotated[str, Depends(get_current_user_id)],
+    currency: Optional[str] = Query("USD", description="The user's preferred currency (e.g., MYR, USD).")
+):
+    """
+    Evaluates a grid of structured what-if scenarios (no LLM round-trip) against one shared
+    FHS/baseline computation and returns a comparison table.
+    """
+    db = get_db()
+    if not db:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database service unavailable")
+
+    try:
+        from balance_manager import get_average_metrics_last_3_months
+        from simulation import run_financial_simulation_batch
+
+        transactions = fetch_user_transactions(user_id, db)
+
+        metrics = await get_average_metrics_last_3_months(user_id, db)
+        avg_income = metrics.get("avg_monthly_income", 0.0)
+        avg_spending = metrics.get("avg_monthly_spending", 0.0)
+
+        fhs_report = await async_get_fhs_report_internal(transactions) if transactions else {}
+        # The LSTM forecast is only a fallback for missing baselines; skip it when the 3-month averages exist.
+        lstm_report = {}
+        if transactions and (avg_income <= 0 or avg_spending <= 0):
+            lstm_report = await async_get_lstm_forecast_internal(transactions, user_id)
+        initial_balance = await get_total_current_balance(user_id, db)
+
+        return run_financial_simulation_batch(
+            [scenario.model_dump() for scenario in request.scenarios],
+            fhs_report if "error" not in fhs_report else {},
+            lstm_report if "error" not in lstm_report else {},
+            initial_balance,
+            currency,
+            baseline_income=avg_income,
+            baseline_expense=avg_spending
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Batch simulation failed for user {user_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Simulation error: {str(e)}")
+    
+
+@app.get("/reports/simulate/cache")
+async def get_simulation_cache_stats(user_id: Annotated[str, Depends(get_current_user_id)]):
+    """Hit rates of the parameter-extraction and report-narrative caches in this worker."""
+    from simulation import extraction_cache, report_cache
+    return {"extraction": extraction_cache.stats(), "report": report_cache.stats()}
+
+
+@app.get("/reports/llm/metrics")
+async def get_llm_metrics(user_id: Annotated[str, Depends(get_current_user_id)]):
+    """Per-purpose LLM call counts, retries, and latency/token histograms for this worker."""
+    import llm_gateway
+    return llm_gateway.get_metrics()
+
+
 async def get_total_current_balance(user_id: str, db: Any) -> float:
     try:
         accounts_ref = db.collection('accounts').where("user_id", "==", user_id)
@@ -398,7 +569,9 @@ async def get_total_current_balance(user_id: str, db: Any) -> float:
 @app.get("/reports/optimization/rl")
 async def get_rl_optimization_report(
     user_id: Annotated[str, Depends(get_current_user_id)],
-    included_assets: Optional[str] = Query(None, description="Comma-separated list of assets to include, e.g., 'Crypto,Stocks'")
+    included_assets: Optional[str] = Query(None, description="Comma-separated list of assets to include, e.g., 'Crypto,Stocks'"),
+    mc_engine: Optional[str] = Query(None, description="Monte Carlo engine: normal, bootstrap or block. Defaults to MC_ENGINE."),
+    engine: Optional[str] = Query(None, description="Allocation engine: rl, mean_variance or auto. Defaults to ALLOCATION_ENGINE.")
 ):
     print(f"DEBUG: Entered get_rl_optimization_report with assets={included_assets}", flush=True)
     db = get_db()
@@ -406,6 +579,9 @@ async def get_rl_optimization_report(
         raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database service unavailable")
 
     try:
+        from fhsm import generate_fhs_report
+        from rl import generate_rl_optimization_report, fetch_asset_data, TICKERS
+
         # 1. Fetch User Transactions
         transactions_ref = db.collection('transactions').where("user_id", "==", user_id).order_by("transaction_date")
         docs = transactions_ref.stream()
@@ -477,7 +653,9 @@ async def get_rl_optimization_report(
             latest_fhs=latest_fhs_score, 
             starting_balance=starting_balance, 
             monthly_contribution=monthly_contribution,
-            returns_df=returns_df 
+            returns_df=returns_df,
+            mc_engine=mc_engine,
+            engine=engine
         )
         
         if "error" in rl_report:
@@ -493,6 +671,36 @@ async def get_rl_optimization_report(
         traceback.print_exc()
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="An unexpected error occurred during portfolio optimization.")
 
+@app.get("/reports/optimization/frontier")
+async def get_efficient_frontier(
+    user_id: Annotated[str, Depends(get_current_user_id)],
+    included_assets: Optional[str] = Query(None, description="Comma-separated list of assets to include, e.g., 'Crypto,Stocks'"),
+    num_portfolios: int = Query(5000, ge=100, le=50000, description="Number of candidate portfolios to evaluate.")
+):
+    """
+    Risk/return frontier over thousands of long-only portfolios of the stored market data,
+    including the mean-variance portfolio of every risk profile.
+    """
+    try:
+        from rl import fetch_asset_data, TICKERS, RISK_AVERSION_LEVELS
+        from portfolio import generate_frontier_report
+
+        selected_keys = [k.strip() for k in (included_assets or "").split(',') if k.strip() in TICKERS]
+        target_tickers = {k: TICKERS[k] for k in selected_keys} if selected_keys else TICKERS
+
+        try:
+            returns_df = fetch_asset_data(target_tickers)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=f"Market data unavailable: {e}")
+
+        return generate_frontier_report(returns_df, num_portfolios, RISK_AVERSION_LEVELS)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error generating efficient frontier: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="An unexpected error occurred while building the efficient frontier.")
+
 @app.post("/reports/optimization/save")
 async def save_optimized_portfolio(
     portfolio_data: Dict[str, Any],
@@ -535,6 +743,51 @@ async def get_saved_portfolio(
         print(f"Error retrieving saved portfolio: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/reports/optimization/saved/rebalancing")
+async def simulate_saved_portfolio_rebalancing(
+    user_id: Annotated[str, Depends(get_current_user_id)],
+    policies: Optional[str] = Query(None, description="Comma-separated policies: none, calendar:<days>, threshold:<band>, e.g. 'none,calendar:63,threshold:0.05'"),
+    cost_bps: float = Query(10.0, ge=0, le=500, description="Proportional transaction cost in basis points.")
+):
+    """
+    Replays the saved portfolio's weights over the stored market history under several rebalancing
+    policies with transaction costs. No RL training involved.
+    """
+    db = get_db()
+    if not db:
+        raise HTTPException(status_code=503, detail="Database unavailable")
+
+    try:
+        from rl import fetch_asset_data, TICKERS
+        from portfolio import parse_rebalance_policies, simulate_rebalancing, DEFAULT_REBALANCE_POLICIES
+
+        try:
+            parsed_policies = parse_rebalance_policies(policies or DEFAULT_REBALANCE_POLICIES)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        doc = db.collection('portfolio_optimizations').document(user_id).get()
+        saved_weights = (doc.to_dict() or {}).get('optimized_weights') if doc.exists else None
+        weights = {k: float(v) for k, v in (saved_weights or {}).items() if k in TICKERS and float(v) > 0}
+        if not weights:
+            raise HTTPException(status_code=404, detail="NO_SAVED_PORTFOLIO")
+
+        try:
+            returns_df = fetch_asset_data({k: TICKERS[k] for k in weights})
+        except ValueError as e:
+            raise HTTPException(status_code=503, detail=f"Market data unavailable: {e}")
+
+        target = [weights[asset] for asset in returns_df.columns]
+        report = simulate_rebalancing(returns_df, target, parsed_policies, cost_bps)
+        report["weights"] = {asset: round(w * 100 / sum(target), 2) for asset, w in zip(returns_df.columns, target)}
+        return report
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error simulating rebalancing: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/reports/export/pdf")
 async def export_financial_pdf(
     user_id: Annotated[str, Depends(get_current_user_id)]
@@ -604,8 +857,12 @@ async def generate_one_tap_budget(
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, 
                                 detail="Requires at least 90 days of transaction history to generate a smart budget.")
         
+        from fhsm import generate_fhs_report
+        from lstm import generate_lstm_forecast
+        from budgeter import generate_auto_budget
+
         fhs_report = generate_fhs_report(transactions)
-        lstm_report = generate_lstm_forecast(transactions)
+        lstm_report = generate_lstm_forecast(transactions, user_id=user_id)
         
         if "error" in fhs_report or "error" in lstm_report:
             error_detail = fhs_report.get("error") or lstm_report.get("error")
@@ -0,0 +1,191 @@
+# AIworkshop2/market_data.py
+import os
+import zlib
+import datetime
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+
+# One memory-mapped .npy per ticker: float64 array of shape (days, 2) = [days since epoch, close].
+MARKET_DATA_DIR = os.getenv("MARKET_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "market_data"))
+# MARKET_DATA_OFFLINE=1 never touches the network: reads come from the store, missing tickers from the seeded snapshot.
+MARKET_DATA_OFFLINE = os.getenv("MARKET_DATA_OFFLINE", "0") == "1"
+MARKET_DATA_SEED = int(os.getenv("MARKET_DATA_SEED", "42"))
+
+# Synthetic snapshot: business-day GBM anchored at a fixed start, so a given date always has the same price.
+SNAPSHOT_START = datetime.date(2015, 1, 1)
+SNAPSHOT_DRIFT = 0.0003
+SNAPSHOT_VOLATILITY = 0.01
+# A stored series starting within this many days of the requested start is considered complete (weekends, holidays).
+START_TOLERANCE_DAYS = 7
+
+EPOCH = datetime.date(1970, 1, 1)
+
+# price file path -> date the store was last brought up to date in this process (avoids hitting the network on every request).
+_checked_today: Dict[str, datetime.date] = {}
+
+
+def get_price_path(ticker: str, store_dir: Optional[str] = None) -> str:
+    safe = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in ticker)
+    return os.path.join(store_dir or MARKET_DATA_DIR, f"{safe}.npy")
+
+
+def to_day_numbers(dates) -> np.ndarray:
+    return (pd.DatetimeIndex(dates).normalize() - pd.Timestamp(EPOCH)).days.values.astype(np.float64)
+
+
+def from_day_numbers(days: np.ndarray) -> pd.DatetimeIndex:
+    return pd.Timestamp(EPOCH) + pd.to_timedelta(days.astype(np.int64), unit="D")
+
+
+def read_prices(ticker: str, store_dir: Optional[str] = None) -> Optional[pd.Series]:
+    """Close prices for `ticker` from the store (memory-mapped), or None if it has never been stored."""
+    path = get_price_path(ticker, store_dir)
+    if not os.path.exists(path):
+        return None
+    data = np.load(path, mmap_mode="r")
+    return pd.Series(np.asarray(data[:, 1]), index=from_day_numbers(np.asarray(data[:, 0])), name=ticker)
+
+
+def write_prices(ticker: str, prices: pd.Series, store_dir: Optional[str] = None) -> str:
+    """Writes the full series atomically (tmp file + rename) so concurrent readers never see a partial file."""
+    path = get_price_path(ticker, store_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    prices = prices.dropna()
+    prices = prices[~prices.index.duplicated(keep="last")].sort_index()
+    data = np.column_stack((to_day_numbers(prices.index), prices.values.astype(np.float64)))
+
+    tmp_path = f"{path}.tmp.npy"
+    np.save(tmp_path, data)
+    os.replace(tmp_path, path)
+    return path
+
+
+def download_prices(tickers: List[str], start: datetime.date, end: datetime.date) -> pd.DataFrame:
+    """Close prices from Yahoo Finance, one column per ticker. `end` is inclusive."""
+    import yfinance as yf
+
+    data = yf.download(tickers, start=start, end=end + datetime.timedelta(days=1), auto_adjust=True, progress=False)
+    if data is None or data.empty:
+        return pd.DataFrame()
+    if isinstance(data.columns, pd.MultiIndex):
+        data = data["Close"]
+    elif "Close" in data.columns:
+        data = data[["Close"]].rename(columns={"Close": tickers[0]})
+    data.index = pd.DatetimeIndex(data.index).tz_localize(None)
+    return data
+
+
+def synthetic_prices(ticker: str, start: datetime.date, end: datetime.date, seed: int = MARKET_DATA_SEED) -> pd.Series:
+    """Deterministic snapshot prices for offline mode. The same (ticker, seed, date) always gives the same price."""
+    dates = pd.bdate_range(SNAPSHOT_START, end)
+    rng = np.random.default_rng([seed, zlib.crc32(ticker.encode())])
+    log_returns = rng.normal(SNAPSHOT_DRIFT, SNAPSHOT_VOLATILITY, len(dates))
+    prices = pd.Series(100.0 * np.exp(np.cumsum(log_returns)), index=dates, name=ticker)
+    return prices[prices.index >= pd.Timestamp(start)]
+
+
+def update_price_store(tickers: List[str], start: datetime.date, end: datetime.date, store_dir: Optional[str] = None) -> List[str]:
+    """
+    Brings the store up to date for [start, end] by downloading only the days it is missing.
+    Tickers missing the same range share one download. Returns the tickers that could not be updated.
+    """
+    pending: Dict[tuple, List[str]] = {}
+    stored: Dict[str, Optional[pd.Series]] = {}
+    for ticker in tickers:
+        prices = read_prices(ticker, store_dir)
+        stored[ticker] = prices
+        if prices is None or prices.empty or prices.index[0].date() > start + datetime.timedelta(days=START_TOLERANCE_DAYS):
+            fetch_range = (start, end)
+        elif prices.index[-1].date() < end:
+            fetch_range = (prices.index[-1].date() + datetime.timedelta(days=1), end)
+        else:
+            continue
+        pending.setdefault(fetch_range, []).append(ticker)
+
+    failed = []
+    for (fetch_start, fetch_end), group in pending.items():
+        try:
+            fresh = download_prices(group, fetch_start, fetch_end)
+        except Exception as e:
+            print(f"Market data download failed for {group}: {e}")
+            failed.extend(group)
+            continue
+
+        for ticker in group:
+            new_prices = fresh[ticker].dropna() if ticker in fresh.columns else pd.Series(dtype=np.float64)
+            old_prices = stored[ticker]
+            if new_prices.empty and old_prices is None:
+                failed.append(ticker)
+                continue
+            if new_prices.empty:
+                # No new trading days (weekend/holiday): mark the file as checked today.
+                os.utime(get_price_path(ticker, store_dir))
+                continue
+            merged = new_prices if old_prices is None else pd.concat([old_prices, new_prices])
+            write_prices(ticker, merged, store_dir)
+    return failed
+
+
+def is_fresh(ticker: str, today: datetime.date, store_dir: Optional[str] = None) -> bool:
+    """The store is checked against the network at most once per day per ticker."""
+    path = get_price_path(ticker, store_dir)
+    if _checked_today.get(path) == today:
+        return True
+    return os.path.exists(path) and datetime.date.fromtimestamp(os.path.getmtime(path)) == today
+
+
+def load_prices(tickers: Dict[str, str], start: datetime.date, end: datetime.date, store_dir: Optional[str] = None, offline: Optional[bool] = None) -> pd.DataFrame:
+    """
+    Close prices for {name: ticker} between start and end, columns named by the friendly name.
+    Online: stale tickers are topped up incrementally, then everything is served from disk.
+    Offline: served from disk, tickers never stored come from the seeded synthetic snapshot.
+    """
+    offline = MARKET_DATA_OFFLINE if offline is None else offline
+    today = datetime.date.today()
+
+    if not offline:
+        stale = [t for t in tickers.values() if not is_fresh(t, today, store_dir)]
+        if stale:
+            print(f"Updating market data store for {stale}...")
+            update_price_store(stale, start, end, store_dir)
+            # A failed top-up still serves yesterday's data; retry tomorrow rather than on every request.
+            for ticker in stale:
+                path = get_price_path(ticker, store_dir)
+                if os.path.exists(path):
+                    _checked_today[path] = today
+
+    columns = {}
+    for name, ticker in tickers.items():
+        prices = read_prices(ticker, store_dir)
+        if prices is None and offline:
+            prices = synthetic_prices(ticker, start, end)
+        if prices is not None:
+            columns[name] = prices[(prices.index >= pd.Timestamp(start)) & (prices.index <= pd.Timestamp(end))]
+
+    return pd.DataFrame(columns)
+
+
+def main():
+    import argparse
+    from rl import TICKERS, HISTORICAL_YEARS
+
+    parser = argparse.ArgumentParser(description="Fill the local market data store used by the portfolio optimizer.")
+    parser.add_argument("--snapshot", action="store_true", help="Write the seeded synthetic snapshot instead of downloading.")
+    parser.add_argument("--store-dir", default=None)
+    args = parser.parse_args()
+
+    end = datetime.date.today()
+    start = end - datetime.timedelta(days=HISTORICAL_YEARS * 365)
+    for ticker in TICKERS.values():
+        if args.snapshot:
+            write_prices(ticker, synthetic_prices(ticker, start, end), args.store_dir)
+    if not args.snapshot:
+        failed = update_price_store(list(TICKERS.values()), start, end, args.store_dir)
+        if failed:
+            print(f"Could not update: {failed}")
+    print(f"Market data store: {args.store_dir or MARKET_DATA_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -199,4 +199,16 @@ class TwinDashboard(BaseModel):
 class UserSignup(BaseModel):
     email: str
     password: str
-    username: str
\ No newline at end of file
+    username: str
+
+# === What-if Simulation ===
+class SimulationScenario(BaseModel):
+    name: Optional[str] = Field(None, description="Label shown in the comparison table")
+    simulation_goal: str = Field("What-if", description="Use 'reduce spending' to cut baseline expenses by 10%")
+    monthly_impact: float = Field(0.0, description="Recurring monthly change; negative for new expenses such as loan payments")
+    one_time_impact: float = Field(0.0, description="Immediate one-time change, e.g. a negative downpayment")
+    time_horizon_months: int = Field(12, ge=1, le=480)
+    target_amount: float = Field(0.0, ge=0, description="Savings target, 0 for none")
+
+class SimulationBatchRequest(BaseModel):
+    scenarios: List[SimulationScenario] = Field(..., min_length=1, max_length=100)
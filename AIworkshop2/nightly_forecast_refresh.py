@@ -0,0 +1,75 @@
+import argparse
+import os
+import time
+import numpy as np
+import torch
+
+from lstm import (
+    preprocess_transactions, train_user_models_batched, save_user_model,
+    train_global_model, save_global_model, NIGHTLY_EPOCHS, MODEL_DIR, LOOKBACK
+)
+
+def make_synthetic_daily_summaries(num_users: int, days: int = 180, seed: int = 0) -> dict:
+    """Synthetic users for measuring throughput without Firestore access."""
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2025-01-01")
+    daily_summaries = {}
+    for k in range(num_users):
+        salary = float(rng.uniform(1500, 9000))
+        daily_spend = salary / 30 * float(rng.uniform(0.5, 1.1))
+        transactions = []
+        for i in range(days):
+            day = str(start + i)
+            if day.endswith("-01"):
+                transactions.append({"transaction_date": day, "amount": salary, "type": "Income"})
+            transactions.append({"transaction_date": day, "amount": round(daily_spend * float(rng.uniform(0.3, 1.7)), 2), "type": "Expense"})
+        daily_summaries[f"synthetic_{k}"] = preprocess_transactions(transactions)
+    return daily_summaries
+
+def refresh_user_models(daily_summaries: dict, users_per_pass: int, epochs: int, model_dir: str) -> int:
+    """Trains users in passes of `users_per_pass` heads and writes one artifact per user. Returns users written."""
+    user_ids = list(daily_summaries)
+    written = 0
+    for start in range(0, len(user_ids), users_per_pass):
+        chunk = {uid: daily_summaries[uid] for uid in user_ids[start:start + users_per_pass]}
+        for user_id, (model, metadata) in train_user_models_batched(chunk, epochs=epochs).items():
+            save_user_model(user_id, model, metadata, model_dir)
+            written += 1
+        print(f"  {min(start + users_per_pass, len(user_ids))}/{len(user_ids)} users processed")
+    return written
+
+def main():
+    parser = argparse.ArgumentParser(description="Nightly refresh of every user's forecast model in batched passes.")
+    parser.add_argument("--mode", choices=["heads", "shared"], default="heads",
+                        help="heads: shared trunk with per-user heads, one artifact per user. shared: one global model.")
+    parser.add_argument("--epochs", type=int, default=NIGHTLY_EPOCHS)
+    parser.add_argument("--users-per-pass", type=int, default=512, help="Users packed into one training pass (bounds memory).")
+    parser.add_argument("--threads", type=int, default=os.cpu_count(), help="torch intra-op threads (default: all cores).")
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    parser.add_argument("--synthetic-users", type=int, default=0, help="Benchmark on N synthetic users instead of Firestore.")
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.threads)
+
+    if args.synthetic_users:
+        daily_summaries = make_synthetic_daily_summaries(args.synthetic_users)
+    else:
+        from train_global_forecast import get_db, load_daily_summaries
+        daily_summaries = load_daily_summaries(get_db())
+
+    eligible = {uid: d for uid, d in daily_summaries.items() if len(d) > LOOKBACK}
+    print(f"Refreshing {len(eligible)} users ({len(daily_summaries) - len(eligible)} low-data users skipped), mode={args.mode}")
+
+    start = time.perf_counter()
+    if args.mode == "heads":
+        written = refresh_user_models(eligible, args.users_per_pass, args.epochs, args.model_dir)
+        print(f"Wrote {written} per-user artifacts to {os.path.join(args.model_dir, 'users')}")
+    else:
+        model, metadata = train_global_model(list(eligible.values()), epochs=args.epochs)
+        print(f"Saved shared model to {save_global_model(model, metadata, args.model_dir)}")
+    elapsed = time.perf_counter() - start
+
+    print(f"Nightly refresh finished in {elapsed:.1f}s: {len(eligible) / (elapsed / 60):.1f} users/minute")
+
+if __name__ == "__main__":
+    main()
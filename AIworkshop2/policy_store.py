@@ -0,0 +1,74 @@
+# AIworkshop2/policy_store.py
+import os
+import glob
+import datetime
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from stable_baselines3 import PPO
+
+# Pretrained PPO allocation policies, one file per (risk bucket, asset set, market data snapshot date).
+POLICY_DIR = os.getenv("RL_POLICY_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "rl_policies"))
+# A policy trained on a snapshot up to this many days older than the request's data is still served.
+RL_POLICY_MAX_AGE_DAYS = int(os.getenv("RL_POLICY_MAX_AGE_DAYS", "7"))
+# Snapshots kept per (risk bucket, asset set) when a new one is saved.
+RL_POLICY_KEEP = 2
+
+_POLICY_CACHE: Dict[Tuple[str, float], PPO] = {}
+_CACHE_LOCK = threading.Lock()
+
+
+def policy_key(risk_aversion: float, assets: List[str]) -> str:
+    """Asset order does not matter: policies are trained and served on the alphabetically sorted columns."""
+    return f"ra{risk_aversion:g}_{'-'.join(sorted(assets))}"
+
+
+def get_policy_path(risk_aversion: float, assets: List[str], snapshot: datetime.date, policy_dir: Optional[str] = None) -> str:
+    return os.path.join(policy_dir or POLICY_DIR, f"{policy_key(risk_aversion, assets)}_{snapshot:%Y%m%d}.zip")
+
+
+def list_policy_snapshots(risk_aversion: float, assets: List[str], policy_dir: Optional[str] = None) -> List[Tuple[datetime.date, str]]:
+    """(snapshot date, path) of every stored policy for this key, oldest first."""
+    prefix = os.path.join(policy_dir or POLICY_DIR, f"{policy_key(risk_aversion, assets)}_")
+    snapshots = []
+    for path in glob.glob(f"{glob.escape(prefix)}*.zip"):
+        try:
+            snapshots.append((datetime.datetime.strptime(path[len(prefix):-len(".zip")], "%Y%m%d").date(), path))
+        except ValueError:
+            continue  # in-progress tmp files
+    return sorted(snapshots)
+
+
+def find_policy_path(risk_aversion: float, assets: List[str], snapshot: datetime.date, policy_dir: Optional[str] = None, max_age_days: Optional[int] = None) -> Optional[str]:
+    """Newest policy trained on data no newer than `snapshot` and at most max_age_days older."""
+    max_age_days = RL_POLICY_MAX_AGE_DAYS if max_age_days is None else max_age_days
+    oldest = snapshot - datetime.timedelta(days=max_age_days)
+    candidates = [path for date, path in list_policy_snapshots(risk_aversion, assets, policy_dir) if oldest <= date <= snapshot]
+    return candidates[-1] if candidates else None
+
+
+def save_policy(model: PPO, risk_aversion: float, assets: List[str], snapshot: datetime.date, policy_dir: Optional[str] = None) -> str:
+    """Saves atomically (tmp file + rename) and prunes all but the newest RL_POLICY_KEEP snapshots of this key."""
+    path = get_policy_path(risk_aversion, assets, snapshot, policy_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path[:-len('.zip')]}.tmp.zip"
+    model.save(tmp_path)
+    os.replace(tmp_path, path)
+
+    for _, old_path in list_policy_snapshots(risk_aversion, assets, policy_dir)[:-RL_POLICY_KEEP]:
+        os.remove(old_path)
+    return path
+
+
+def load_policy(risk_aversion: float, assets: List[str], snapshot: datetime.date, policy_dir: Optional[str] = None) -> Optional[PPO]:
+    """Loads the matching pretrained policy once per process. Returns None on a cache miss."""
+    path = find_policy_path(risk_aversion, assets, snapshot, policy_dir)
+    if path is None:
+        return None
+
+    key = (path, os.path.getmtime(path))
+    if key not in _POLICY_CACHE:
+        with _CACHE_LOCK:
+            if key not in _POLICY_CACHE:
+                _POLICY_CACHE[key] = PPO.load(path, device="cpu")
+    return _POLICY_CACHE[key]
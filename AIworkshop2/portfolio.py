@@ -0,0 +1,258 @@
+# AIworkshop2/portfolio.py
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Optional
+
+TRADING_DAYS_PER_YEAR = 252
+MV_MAX_ITER = 500
+MV_TOLERANCE = 1e-10
+
+
+def project_to_simplex(v: np.ndarray) -> np.ndarray:
+    """Euclidean projection onto {w >= 0, sum(w) = 1} (sort-based, O(n log n))."""
+    u = np.sort(v)[::-1]
+    cumulative = np.cumsum(u) - 1.0
+    rho = np.nonzero(u - cumulative / np.arange(1, len(v) + 1) > 0)[0][-1]
+    return np.maximum(v - cumulative[rho] / (rho + 1.0), 0.0)
+
+
+def mean_variance_weights(returns_df: pd.DataFrame, risk_aversion: float, max_iter: int = MV_MAX_ITER, tol: float = MV_TOLERANCE) -> np.ndarray:
+    """
+    Long-only weights maximizing the env reward's objective: annual return - risk_aversion / 2 * annual variance,
+    with the sample mean and covariance of `returns_df`. Accelerated projected gradient ascent on the simplex;
+    the objective is concave, so this converges to the global optimum.
+    """
+    returns = returns_df.values.astype(np.float64)
+    mu = returns.mean(axis=0) * TRADING_DAYS_PER_YEAR
+    n_assets = len(mu)
+    if n_assets == 1:
+        return np.ones(1)
+    cov = np.cov(returns, rowvar=False) * TRADING_DAYS_PER_YEAR
+
+    # 1 / Lipschitz constant of the gradient mu - risk_aversion * cov @ w.
+    step = 1.0 / max(risk_aversion * np.linalg.eigvalsh(cov)[-1], 1e-12)
+    w = np.full(n_assets, 1.0 / n_assets)
+    y, t = w.copy(), 1.0
+    for _ in range(max_iter):
+        w_next = project_to_simplex(y + step * (mu - risk_aversion * cov @ y))
+        t_next = (1 + np.sqrt(1 + 4 * t * t)) / 2
+        y = w_next + (t - 1) / t_next * (w_next - w)
+        converged = np.abs(w_next - w).max() < tol
+        w, t = w_next, t_next
+        if converged:
+            break
+    return w
+
+
+def evaluate_static_weights(returns_df: pd.DataFrame, weights: np.ndarray, initial_portfolio_value: float, start: int = 0) -> Dict[str, Any]:
+    """Backtest of fixed weights from row `start` on. Same keys and formulas as rl.test_rl_agent."""
+    daily_returns = returns_df.values[start:].astype(np.float64) @ weights
+    portfolio_history = initial_portfolio_value * np.concatenate([[1.0], np.cumprod(1 + daily_returns)])
+
+    trading_days = len(daily_returns)
+    final_value = float(portfolio_history[-1])
+    total_return = (final_value - initial_portfolio_value) / initial_portfolio_value
+
+    annual_return = (1 + total_return) ** (TRADING_DAYS_PER_YEAR / trading_days) - 1 if trading_days > 0 else 0.0
+    volatility = np.std(daily_returns) * np.sqrt(TRADING_DAYS_PER_YEAR) if trading_days > 0 else 0.0
+    sharpe_ratio = annual_return / volatility if volatility > 0 else 0.0
+
+    return {
+        'total_return': float(total_return),
+        'annual_return': float(annual_return),
+        'volatility': float(volatility),
+        'sharpe_ratio': float(sharpe_ratio),
+        'final_value': final_value,
+        'portfolio_history': portfolio_history.tolist(),
+        'final_weights': np.asarray(weights, dtype=np.float32)
+    }
+
+
+FRONTIER_NUM_PORTFOLIOS = 5000
+FRONTIER_SEED = 42
+# Candidate portfolios evaluated per matrix multiply; bounds the (days x candidates) value matrix.
+FRONTIER_CHUNK_SIZE = 2000
+# Sampled candidates returned for the risk/return scatter behind the frontier.
+FRONTIER_CLOUD_POINTS = 500
+
+
+def evaluate_weight_matrix(returns_df: pd.DataFrame, weights: np.ndarray, chunk_size: int = FRONTIER_CHUNK_SIZE) -> Dict[str, np.ndarray]:
+    """
+    Metrics for every row of a (candidates x assets) weight matrix, with the formulas of rl.test_rl_agent.
+    Daily portfolio returns of a chunk of candidates are one (days x assets) @ (assets x candidates) product.
+    """
+    returns = returns_df.values.astype(np.float64)
+    trading_days = len(returns)
+    metrics = {name: np.empty(len(weights)) for name in ["annual_return", "volatility", "sharpe_ratio", "max_drawdown"]}
+
+    for start in range(0, len(weights), chunk_size):
+        rows = slice(start, start + chunk_size)
+        daily_returns = returns @ weights[rows].T
+        values = np.cumprod(1 + daily_returns, axis=0)
+        total_return = values[-1] - 1
+
+        annual_return = (1 + total_return) ** (TRADING_DAYS_PER_YEAR / trading_days) - 1
+        volatility = daily_returns.std(axis=0) * np.sqrt(TRADING_DAYS_PER_YEAR)
+        peaks = np.maximum(np.maximum.accumulate(values, axis=0), 1.0)
+
+        metrics["annual_return"][rows] = annual_return
+        metrics["volatility"][rows] = volatility
+        metrics["sharpe_ratio"][rows] = np.divide(annual_return, volatility, out=np.zeros_like(volatility), where=volatility > 0)
+        metrics["max_drawdown"][rows] = (values / peaks - 1).min(axis=0)
+    return metrics
+
+
+def pareto_frontier(annual_return: np.ndarray, volatility: np.ndarray) -> np.ndarray:
+    """Indices of portfolios no other portfolio beats on both return and volatility, by increasing volatility."""
+    order = np.lexsort((-annual_return, volatility))
+    sorted_returns = annual_return[order]
+    best_before = np.maximum.accumulate(np.concatenate([[-np.inf], sorted_returns[:-1]]))
+    return order[sorted_returns > best_before]
+
+
+def candidate_weights(n_assets: int, num_portfolios: int, seed: int = FRONTIER_SEED) -> np.ndarray:
+    """Single-asset corners, equal weight, then uniform samples from the simplex."""
+    rng = np.random.default_rng(seed)
+    fixed = np.vstack([np.eye(n_assets), np.full((1, n_assets), 1.0 / n_assets)])
+    return np.vstack([fixed, rng.dirichlet(np.ones(n_assets), max(num_portfolios - len(fixed), 0))])
+
+
+def generate_frontier_report(returns_df: pd.DataFrame, num_portfolios: int = FRONTIER_NUM_PORTFOLIOS, risk_aversion_levels: Optional[List[float]] = None, seed: int = FRONTIER_SEED) -> Dict[str, Any]:
+    """
+    Efficient frontier over random long-only portfolios plus the mean-variance optimum of every risk level,
+    so the frontier always contains the portfolios the mean_variance engine would recommend.
+    """
+    assets = returns_df.columns.tolist()
+    weights = candidate_weights(len(assets), num_portfolios, seed)
+    if risk_aversion_levels:
+        weights = np.vstack([weights, [mean_variance_weights(returns_df, ra) for ra in risk_aversion_levels]])
+
+    metrics = evaluate_weight_matrix(returns_df, weights)
+
+    def describe(i: int) -> Dict[str, Any]:
+        return {
+            "weights": {asset: float(round(w * 100, 2)) for asset, w in zip(assets, weights[i])},
+            "annual_return_pct": float(round(metrics["annual_return"][i] * 100, 2)),
+            "annual_volatility_pct": float(round(metrics["volatility"][i] * 100, 2)),
+            "sharpe_ratio": float(round(metrics["sharpe_ratio"][i], 2)),
+            "max_drawdown_pct": float(round(metrics["max_drawdown"][i] * 100, 2))
+        }
+
+    frontier = pareto_frontier(metrics["annual_return"], metrics["volatility"])
+    cloud = np.random.default_rng(seed).choice(len(weights), min(FRONTIER_CLOUD_POINTS, len(weights)), replace=False)
+
+    return {
+        "assets": assets,
+        "num_evaluated": int(len(weights)),
+        "trading_days": int(len(returns_df)),
+        "frontier": [describe(i) for i in frontier],
+        "max_sharpe": describe(int(np.argmax(metrics["sharpe_ratio"]))),
+        "min_volatility": describe(int(np.argmin(metrics["volatility"]))),
+        "cloud": {
+            "annual_return_pct": np.round(metrics["annual_return"][cloud] * 100, 2).tolist(),
+            "annual_volatility_pct": np.round(metrics["volatility"][cloud] * 100, 2).tolist()
+        }
+    }
+
+
+REBALANCE_COST_BPS = 10.0
+# none: buy and hold; calendar:<trading days>; threshold:<max weight drift before rebalancing>.
+DEFAULT_REBALANCE_POLICIES = "none,calendar:21,calendar:63,calendar:252,threshold:0.05,threshold:0.1"
+# Trading days between points of the value history returned for charts.
+REBALANCE_HISTORY_STEP = 21
+
+
+def parse_rebalance_policies(spec: str) -> List[Dict[str, Any]]:
+    """'none,calendar:21,threshold:0.05' -> [{'type': 'none', ...}, ...]. Raises ValueError on a bad entry."""
+    policies = []
+    for item in [p.strip() for p in spec.split(",") if p.strip()]:
+        kind, _, param = item.partition(":")
+        if kind == "none" and not param:
+            policies.append({"name": "none", "type": "none", "label": "Buy and hold"})
+        elif kind == "calendar" and param.isdigit() and int(param) > 0:
+            policies.append({"name": item, "type": "calendar", "interval_days": int(param), "label": f"Every {param} trading days"})
+        elif kind == "threshold":
+            try:
+                band = float(param)
+            except ValueError:
+                band = 0.0
+            if not 0 < band < 1:
+                raise ValueError(f"Threshold band must be between 0 and 1, got '{param}'.")
+            policies.append({"name": item, "type": "threshold", "band": band, "label": f"When any weight drifts {band:.0%}"})
+        else:
+            raise ValueError(f"Unknown rebalance policy '{item}'. Use none, calendar:<days> or threshold:<band>.")
+    if not policies:
+        raise ValueError("No rebalance policies given.")
+    return policies
+
+
+def simulate_rebalancing(returns_df: pd.DataFrame, target_weights: np.ndarray, policies: List[Dict[str, Any]],
+                         cost_bps: float = REBALANCE_COST_BPS, initial_value: float = 10000.0) -> Dict[str, Any]:
+    """
+    Replays fixed target weights over history under every policy at once: one pass over the days,
+    with the holdings of all policies as a (policies x assets) matrix. Rebalancing trades back to the
+    targets and pays cost_bps on the traded value (turnover = sum of |drifted - target| weights).
+    """
+    returns = returns_df.values.astype(np.float64)
+    target = np.asarray(target_weights, dtype=np.float64)
+    target = target / target.sum()
+    num_days, num_policies = len(returns), len(policies)
+    cost_rate = cost_bps / 1e4
+
+    intervals = np.array([p.get("interval_days", 0) for p in policies])
+    bands = np.array([p.get("band", np.inf) for p in policies])
+    days = np.arange(1, num_days + 1)
+    calendar_due = (intervals > 0) & (days[:, np.newaxis] % np.maximum(intervals, 1) == 0)
+
+    # Day 0 buys the targets from cash (turnover 1) for every policy.
+    holdings = np.tile(target * initial_value * (1 - cost_rate), (num_policies, 1))
+    values = np.empty((num_days + 1, num_policies))
+    values[0] = initial_value
+    rebalances = np.zeros(num_policies, dtype=int)
+    turnover = np.ones(num_policies)
+    costs = np.full(num_policies, initial_value * cost_rate)
+
+    for t in range(num_days):
+        holdings *= 1 + returns[t]
+        value = holdings.sum(axis=1)
+        drift = np.abs(holdings / value[:, np.newaxis] - target)
+        due = calendar_due[t] | (drift.max(axis=1) > bands)
+        traded = np.where(due, drift.sum(axis=1), 0.0)
+        cost = cost_rate * value * traded
+        value = value - cost
+        holdings[due] = target * value[due, np.newaxis]
+
+        values[t + 1] = value
+        rebalances += due
+        turnover += traded
+        costs += cost
+
+    years = num_days / TRADING_DAYS_PER_YEAR
+    daily_returns = values[1:] / values[:-1] - 1
+    annual_return = (values[-1] / initial_value) ** (1 / years) - 1
+    volatility = daily_returns.std(axis=0) * np.sqrt(TRADING_DAYS_PER_YEAR)
+    max_drawdown = (values / np.maximum.accumulate(values, axis=0) - 1).min(axis=0)
+    history_days = np.arange(0, num_days + 1, REBALANCE_HISTORY_STEP)
+
+    return {
+        "cost_bps": cost_bps,
+        "trading_days": int(num_days),
+        "policies": [
+            {
+                "name": p["name"],
+                "label": p["label"],
+                "final_value": float(round(values[-1, i], 2)),
+                "annual_return_pct": float(round(annual_return[i] * 100, 2)),
+                "annual_volatility_pct": float(round(volatility[i] * 100, 2)),
+                "max_drawdown_pct": float(round(max_drawdown[i] * 100, 2)),
+                "rebalances": int(rebalances[i]),
+                "annual_turnover": float(round(turnover[i] / years, 3)),
+                "total_costs": float(round(costs[i], 2)),
+            }
+            for i, p in enumerate(policies)
+        ],
+        "history": {
+            "days": history_days.tolist(),
+            "values": {p["name"]: np.round(values[history_days, i], 2).tolist() for i, p in enumerate(policies)}
+        }
+    }
@@ -0,0 +1,52 @@
+import argparse
+import os
+import time
+import warnings
+
+from rl import TICKERS, RISK_AVERSION_LEVELS, INITIAL_PORTFOLIO_VALUE, RL_OFFLINE_NUM_ENVS, RL_TRAINING_STEPS
+from rl import fetch_asset_data, train_rl_agent, get_returns_snapshot
+from policy_store import save_policy, get_policy_path, POLICY_DIR
+
+warnings.filterwarnings("ignore")
+
+def pretrain(asset_sets: list, num_envs: int, timesteps: int, force: bool = False) -> int:
+    """Trains one policy per risk bucket for each asset set on today's market data snapshot. Returns how many were trained."""
+    trained = 0
+    for asset_names in asset_sets:
+        # Same fetch as the endpoint, so the rows (and snapshot) match what requests will see.
+        returns_df = fetch_asset_data({name: TICKERS[name] for name in asset_names})
+        returns_df = returns_df[sorted(returns_df.columns)]
+        assets = returns_df.columns.tolist()
+        snapshot = get_returns_snapshot(returns_df)
+
+        for risk_aversion in RISK_AVERSION_LEVELS:
+            path = get_policy_path(risk_aversion, assets, snapshot)
+            if not force and os.path.exists(path):
+                print(f"Up to date: {path}")
+                continue
+            start = time.perf_counter()
+            model, _, _ = train_rl_agent(returns_df, risk_aversion, INITIAL_PORTFOLIO_VALUE, num_envs=num_envs, total_timesteps=timesteps)
+            print(f"Saved {save_policy(model, risk_aversion, assets, snapshot)} in {time.perf_counter() - start:.1f}s")
+            trained += 1
+    return trained
+
+def main():
+    parser = argparse.ArgumentParser(description="Pretrain PPO allocation policies for every risk bucket (run nightly after the market data update).")
+    parser.add_argument("--assets", action="append", default=[], help="Extra comma-separated asset set to pretrain, e.g. 'Crypto,Stocks'. Repeatable. All assets are always included.")
+    parser.add_argument("--num-envs", type=int, default=RL_OFFLINE_NUM_ENVS)
+    parser.add_argument("--timesteps", type=int, default=RL_TRAINING_STEPS)
+    parser.add_argument("--force", action="store_true", help="Retrain even if a policy for today's snapshot exists.")
+    args = parser.parse_args()
+
+    asset_sets = [list(TICKERS)]
+    for spec in args.assets:
+        names = [name.strip() for name in spec.split(",") if name.strip() in TICKERS]
+        if names and sorted(names) not in [sorted(s) for s in asset_sets]:
+            asset_sets.append(names)
+
+    start = time.perf_counter()
+    trained = pretrain(asset_sets, args.num_envs, args.timesteps, args.force)
+    print(f"Pretrained {trained} policies for {len(asset_sets)} asset sets in {time.perf_counter() - start:.1f}s ({POLICY_DIR}).")
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,7 @@
 import numpy as np
 import pandas as pd
-import yfinance as yf
 import datetime
-from typing import Dict, List, Tuple, Optional, Any, Annotated
+from typing import Dict, List, Tuple, Optional, Any, Annotated, Union, Callable
 import gymnasium as gym
 from gymnasium import spaces
 from stable_baselines3 import PPO
@@ -10,7 +9,11 @@ from stable_baselines3.common.env_checker import check_env
 from stable_baselines3.common.callbacks import BaseCallback
 import torch
 import os
+import time
 import json 
+import threading
+import multiprocessing
+from multiprocessing import shared_memory
 from fastapi import APIRouter, HTTPException, status, Depends, Query
 from firebase_admin import firestore
 from auth_deps import get_current_user_id
@@ -143,15 +146,48 @@ TICKERS = {
 ASSET_NAMES = list(TICKERS.keys())
 NUM_ASSETS = len(ASSET_NAMES)
 HISTORICAL_YEARS = 5 
-RL_TRAINING_STEPS = 5000 
+RL_TRAINING_STEPS = int(os.getenv("RL_TRAINING_STEPS", "5000"))
 TRADING_DAYS_PER_YEAR = 252
 LOOKBACK_WINDOW = 60 
+# Rolling volatility window of the reward: the previous 20 returns plus the current one.
+ROLLING_VOL_WINDOW = 21
+# Parallel PPO rollouts: number of SubprocVecEnv workers (1 = single in-process env).
+# Training on a request miss runs inside the API process, so it stays on one env by default;
+# the offline paths (pretrain_policies.py, bench_rl_env.py) use RL_OFFLINE_NUM_ENVS workers.
+RL_NUM_ENVS = int(os.getenv("RL_NUM_ENVS", "1"))
+RL_OFFLINE_NUM_ENVS = int(os.getenv("RL_OFFLINE_NUM_ENVS", str(min(4, os.cpu_count() or 1))))
+# Shortest episode a randomized start may leave in the return history.
+RL_MIN_EPISODE_DAYS = TRADING_DAYS_PER_YEAR
+# Rollout steps collected per PPO update, split across workers so more envs do not mean fewer updates.
+RL_ROLLOUT_STEPS = 2048
+# rl: pretrained PPO policy, training on a miss; mean_variance: closed-form allocation;
+# auto: like rl, but when training on a miss would exceed RL_LATENCY_SLO_SECONDS it answers with
+# mean_variance and trains that policy in the background, so the next request is served from the store.
+ALLOCATION_ENGINES = ["rl", "mean_variance", "auto"]
+ALLOCATION_ENGINE = os.getenv("ALLOCATION_ENGINE", "auto")
+RL_LATENCY_SLO_SECONDS = float(os.getenv("RL_LATENCY_SLO_SECONDS", "5"))
+# Training throughput assumed until this process has measured one (see train_rl_agent).
+_training_steps_per_second = float(os.getenv("RL_EXPECTED_STEPS_PER_SECOND", "500"))
 INITIAL_PORTFOLIO_VALUE = 10000.0
 INITIAL_PORTFOLIO_VALUE_DEFAULT = 10000.0
+MC_TIME_HORIZONS = [5, 10, 25]
+MC_NUM_SIMULATIONS = int(os.getenv("MC_NUM_SIMULATIONS", "5000"))
+# Simulations per chunk: bounds the (sims x days) return matrix to ~50 MB for a 25-year horizon.
+MC_CHUNK_SIZE = 1000
+CONTRIBUTION_INTERVAL_DAYS = 21
+MC_PERCENTILES = [5, 50, 95]
+# normal: i.i.d. normal daily returns; bootstrap: resampled historical days; block: stationary block bootstrap.
+MC_ENGINES = ["normal", "bootstrap", "block"]
+MC_ENGINE = os.getenv("MC_ENGINE", "normal")
+# Mean block length (trading days) of the stationary bootstrap.
+MC_BLOCK_LENGTH = 21
 
 
 
 
+# Every value get_risk_aversion can return; one pretrained policy per level and asset set.
+RISK_AVERSION_LEVELS = [1.0, 2.0, 4.0, 6.0, 10.0]
+
 def get_risk_aversion(latest_fhs: float) -> Tuple[float, str]:
     """Determines risk aversion factor and profile based on latest FHS score."""
     if latest_fhs >= 85:
@@ -173,13 +209,16 @@ def get_risk_aversion(latest_fhs: float) -> Tuple[float, str]:
     return risk_aversion, risk_profile
 
 
-class PortfolioOptimizationEnv(gym.Env):
-    """Custom Environment for Portfolio Optimization using Reinforcement Learning"""
+class PandasPortfolioOptimizationEnv(gym.Env):
+    """
+    Original DataFrame-indexed environment. Kept as the reference for parity tests and
+    bench_rl_env.py; training uses the array-backed PortfolioOptimizationEnv below.
+    """
     
     metadata = {'render_modes': ['human']}
     
     def __init__(self, df: pd.DataFrame, risk_aversion: float = 4.0, lookback_window: int = 60, initial_portfolio_value: float = INITIAL_PORTFOLIO_VALUE_DEFAULT):
-        super(PortfolioOptimizationEnv, self).__init__()
+        super(PandasPortfolioOptimizationEnv, self).__init__()
         
         self.df = df
         self.risk_aversion = risk_aversion
@@ -293,52 +332,178 @@ class PortfolioOptimizationEnv(gym.Env):
 
 
 
-def fetch_asset_data(tickers: Dict) -> pd.DataFrame:
-    """Fetch historical asset data (5 years) and calculate daily returns."""
-    end_date = datetime.datetime.now()
-    start_date = end_date - datetime.timedelta(days=HISTORICAL_YEARS * 365)
+class PortfolioOptimizationEnv(gym.Env):
+    """
+    Custom Environment for Portfolio Optimization using Reinforcement Learning.
+    Same dynamics and rewards as PandasPortfolioOptimizationEnv, but backed by a contiguous float32
+    returns array: observations are filled into a preallocated buffer, the rolling volatility is a
+    ring buffer with running sums, and the histories are preallocated arrays exposed as views.
+
+    `df` may also be a float32 (days x assets) array, e.g. a view on shared memory, which is used without copying.
+    With random_start, each episode starts at a random day, leaving at least RL_MIN_EPISODE_DAYS to trade.
+    """
     
-    print("Fetching historical asset data...")
+    metadata = {'render_modes': ['human']}
     
-    try:
-        data = yf.download(list(tickers.values()), start=start_date, end=end_date, auto_adjust=True, progress=False)
-    except Exception as e:
-        print(f"yfinance download failed: {e}")
-        raise ValueError("Failed to download data from Yahoo Finance.")
+    def __init__(self, df: Union[pd.DataFrame, np.ndarray], risk_aversion: float = 4.0, lookback_window: int = 60, initial_portfolio_value: float = INITIAL_PORTFOLIO_VALUE_DEFAULT, random_start: bool = False):
+        super(PortfolioOptimizationEnv, self).__init__()
+        
+        self.df = df
+        self.risk_aversion = risk_aversion
+        self.lookback_window = lookback_window
+        self.n_assets = df.shape[1]
+        self.initial_portfolio_value = initial_portfolio_value
+        self.random_start = random_start
 
-    if data.empty:
-        raise ValueError("Failed to download asset data. Check tickers or date range.")
+        self.returns = np.ascontiguousarray(df.values if isinstance(df, pd.DataFrame) else df, dtype=np.float32)
+        self.n_days = len(self.returns)
+        self._last_start = max(lookback_window, self.n_days - RL_MIN_EPISODE_DAYS)
+        
+        self.action_space = spaces.Box(low=-1, high=1, shape=(self.n_assets,), dtype=np.float32)
+        
+        state_size = self.n_assets * (lookback_window) + self.n_assets
+        self.observation_space = spaces.Box(
+            low=-10, high=10, 
+            shape=(state_size,), 
+            dtype=np.float32
+        )
+        self._obs = np.zeros(state_size, dtype=np.float32)
+        self._window_size = lookback_window * self.n_assets
+        self._obs_window = self._obs[:self._window_size].reshape(lookback_window, self.n_assets)
+
+        self._portfolio_history = np.zeros(self.n_days + 1, dtype=np.float64)
+        self._weights_history = np.zeros((self.n_days + 1, self.n_assets), dtype=np.float32)
+        self._returns_history = np.zeros(self.n_days, dtype=np.float32)
+        self._vol_window = np.zeros(ROLLING_VOL_WINDOW, dtype=np.float64)
+        self._num_steps = 0
+
+    @property
+    def portfolio_history(self) -> np.ndarray:
+        return self._portfolio_history[:self._num_steps + 1]
+
+    @property
+    def weights_history(self) -> np.ndarray:
+        return self._weights_history[:self._num_steps + 1]
+
+    @property
+    def returns_history(self) -> np.ndarray:
+        return self._returns_history[:self._num_steps]
+        
+    def _get_state(self):
+        """Get current state including historical returns and current weights"""
+        # Episodes start at or after lookback_window, so the window never needs padding.
+        np.clip(self.returns[self.current_step - self.lookback_window:self.current_step], -10, 10, out=self._obs_window)
+        # Weights come out of a softmax, so they are already inside the [-10, 10] observation bounds.
+        self._obs[self._window_size:] = self.current_weights
+        # Vec envs keep observations across steps, so hand out a copy of the buffer.
+        return self._obs.copy()
     
-    if isinstance(data.columns, pd.MultiIndex):
-        try:
-            # Handle potential multi-level column issues in newer yfinance versions
-            prices_df = data['Close'] if 'Close' in data.columns else data
-            if isinstance(prices_df.columns, pd.MultiIndex):
-                 # Try to drop top level if it's ticker symbols
-                 prices_df.columns = prices_df.columns.get_level_values(0)
-        except:
-             prices_df = data.copy()
-    else:
-        prices_df = data.copy()
+    def _normalize_action(self, action: np.ndarray) -> np.ndarray:
+        """Convert symmetric actions [-1, 1] to valid portfolio weights [0, 1] that sum to 1"""
+        weights = np.exp(np.minimum(np.maximum(action, -10), 10))
+        weights /= weights.sum() + 1e-8
+        return weights
+
+    def _rolling_std(self, portfolio_return: float) -> float:
+        """Population std of the last ROLLING_VOL_WINDOW returns including this one, via running sums."""
+        pos = self._num_steps % ROLLING_VOL_WINDOW
+        self._vol_sum += portfolio_return - self._vol_window[pos]
+        self._vol_sumsq += portfolio_return * portfolio_return - self._vol_window[pos] ** 2
+        self._vol_window[pos] = portfolio_return
+        if pos == ROLLING_VOL_WINDOW - 1:
+            # Re-sum once per lap so floating point error in the running sums cannot accumulate.
+            self._vol_sum = self._vol_window.sum()
+            self._vol_sumsq = np.dot(self._vol_window, self._vol_window)
+
+        count = min(self._num_steps + 1, ROLLING_VOL_WINDOW)
+        mean = self._vol_sum / count
+        return float(np.sqrt(max(self._vol_sumsq / count - mean * mean, 0.0)))
+    
+    def reset(self, seed: Optional[int] = None, options: Optional[dict] = None):
+        """Reset the environment to initial state"""
+        super().reset(seed=seed)
+        
+        if self.random_start:
+            self.current_step = int(self.np_random.integers(self.lookback_window, self._last_start + 1))
+        else:
+            self.current_step = self.lookback_window 
+        self.portfolio_value = self.initial_portfolio_value
+        self.current_weights = np.full(self.n_assets, 1.0 / self.n_assets, dtype=np.float32)
+
+        self._num_steps = 0
+        self._portfolio_history[0] = self.portfolio_value
+        self._weights_history[0] = self.current_weights
+        self._vol_window[:] = 0.0
+        self._vol_sum = 0.0
+        self._vol_sumsq = 0.0
         
-    # Map back to friendly names
-    # Note: yfinance returns tickers as columns. We need to map 'BTC-USD' -> 'Crypto'
-    # Invert the tickers dict
-    inv_tickers = {v: k for k, v in tickers.items()}
+        info = {}
+        state = self._get_state()
+        return state, info
     
-    # Filter columns that are in our ticker list
-    valid_cols = [c for c in prices_df.columns if c in list(tickers.values())]
-    if not valid_cols:
-         # Maybe columns are already mapped or different format?
-         # Fallback assume order matches keys if length matches (Risky, but yfinance usually sorts)
-         # Better: Re-download individually or just use column matching
-         pass
-
-    prices_df = prices_df[valid_cols].copy()
-    prices_df.rename(columns=inv_tickers, inplace=True)
+    def step(self, action):
+        """Execute one time step in the environment"""
+        action_weights = self._normalize_action(action)
+        
+        terminated = self.current_step >= self.n_days - 1
+        truncated = False
+        
+        if self.current_step >= self.n_days:
+            state = self._get_state()
+            return state, 0.0, terminated, truncated, {}
+            
+        portfolio_return = float(np.dot(action_weights, self.returns[self.current_step]))
+        new_portfolio_value = self.portfolio_value * (1 + portfolio_return)
+        
+        portfolio_std = self._rolling_std(portfolio_return)
+        if portfolio_std < 1e-8:
+            portfolio_std = 0.001 
+        
+        reward = portfolio_return * TRADING_DAYS_PER_YEAR - self.risk_aversion * 0.5 * (portfolio_std ** 2) * TRADING_DAYS_PER_YEAR
+        
+        self.current_weights = action_weights.astype(np.float32)
+        self.portfolio_value = new_portfolio_value
+        self.current_step += 1
+        
+        self._returns_history[self._num_steps] = portfolio_return
+        self._num_steps += 1
+        self._portfolio_history[self._num_steps] = self.portfolio_value
+        self._weights_history[self._num_steps] = self.current_weights
+        
+        info = {
+            'portfolio_value': float(self.portfolio_value),
+            'portfolio_return': portfolio_return,
+            'weights': self.current_weights.tolist()
+        }
+        
+        state = self._get_state()
+        return state, float(reward), terminated, truncated, info
     
-    prices_df = prices_df.dropna(axis=1, how='all') 
-    prices_df = prices_df.fillna(method='ffill').fillna(method='bfill') 
+    def get_final_weights(self):
+        """Get the optimized portfolio weights (average of the last 20% of episodes)"""
+        weights_history = self.weights_history
+        stable_period = max(1, len(weights_history) // 5)
+        final_weights = weights_history[-stable_period:].mean(axis=0)
+        final_weights = final_weights / np.sum(final_weights)  
+        return final_weights.astype(np.float32)
+
+
+def fetch_asset_data(tickers: Dict) -> pd.DataFrame:
+    """Historical asset data (5 years) from the local market data store, as daily returns."""
+    from market_data import load_prices
+
+    end_date = datetime.date.today()
+    start_date = end_date - datetime.timedelta(days=HISTORICAL_YEARS * 365)
+
+    print("Fetching historical asset data...")
+
+    # Only trading days missing from the store are downloaded; reads are memory-mapped from disk.
+    prices_df = load_prices(tickers, start_date, end_date)
+    if prices_df.empty:
+        raise ValueError("Failed to load asset data. Check tickers or the market data store.")
+
+    prices_df = prices_df.dropna(axis=1, how='all')
+    prices_df = prices_df.ffill().bfill()
     prices_df = prices_df.dropna()
 
     returns = prices_df.pct_change().dropna()
@@ -364,7 +529,7 @@ def test_rl_agent(model: PPO, env: PortfolioOptimizationEnv) -> Dict:
     total_return = (final_value - env.initial_portfolio_value) / env.initial_portfolio_value
     
     annual_return = (1 + total_return) ** (TRADING_DAYS_PER_YEAR / trading_days) - 1 if trading_days > 0 else 0.0
-    volatility = np.std(env.returns_history) * np.sqrt(TRADING_DAYS_PER_YEAR) if env.returns_history else 0.0
+    volatility = np.std(env.returns_history) * np.sqrt(TRADING_DAYS_PER_YEAR) if len(env.returns_history) > 0 else 0.0
     sharpe_ratio = annual_return / volatility if volatility > 0 else 0.0
     
     return {
@@ -377,113 +542,278 @@ def test_rl_agent(model: PPO, env: PortfolioOptimizationEnv) -> Dict:
         'final_weights': env.current_weights
     }
 
-def train_rl_agent(returns_df: pd.DataFrame, risk_aversion: float, initial_portfolio_value: float) -> Tuple[PPO, np.ndarray, Dict]:
-    print("\n🚀 Training RL Portfolio Optimizer...")
-    env = PortfolioOptimizationEnv(returns_df, risk_aversion, LOOKBACK_WINDOW, initial_portfolio_value)
-    
-    model = PPO("MlpPolicy", env, learning_rate=3e-4, verbose=0, device=DEVICE)
-    model.learn(total_timesteps=RL_TRAINING_STEPS)
+def share_returns(returns_df: pd.DataFrame) -> shared_memory.SharedMemory:
+    """Copies the returns into a shared memory block once, so rollout workers attach instead of unpickling a copy."""
+    returns = np.ascontiguousarray(returns_df.values, dtype=np.float32)
+    shm = shared_memory.SharedMemory(create=True, size=returns.nbytes)
+    np.ndarray(returns.shape, dtype=np.float32, buffer=shm.buf)[:] = returns
+    return shm
+
+def make_shared_env(shm_name: str, shape: Tuple[int, int], risk_aversion: float, initial_portfolio_value: float) -> Callable[[], gym.Env]:
+    """Env factory for a rollout worker; only the shared memory name and shape are pickled."""
+    def _init() -> gym.Env:
+        # Workers share the parent's resource tracker, so the block is unlinked once, by the parent.
+        shm = shared_memory.SharedMemory(name=shm_name)
+        returns = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+        env = PortfolioOptimizationEnv(returns, risk_aversion, LOOKBACK_WINDOW, initial_portfolio_value, random_start=True)
+        env._shm = shm  # keep the mapping alive as long as the env
+        return env
+    return _init
+
+def train_rl_agent(returns_df: pd.DataFrame, risk_aversion: float, initial_portfolio_value: float, num_envs: Optional[int] = None, total_timesteps: Optional[int] = None) -> Tuple[PPO, np.ndarray, Dict]:
+    num_envs = num_envs or RL_NUM_ENVS
+    total_timesteps = total_timesteps or RL_TRAINING_STEPS
+    print(f"\n🚀 Training RL Portfolio Optimizer ({num_envs} env{'s' if num_envs > 1 else ''})...")
+
+    shm = None
+    if num_envs > 1:
+        from stable_baselines3.common.vec_env import SubprocVecEnv
+
+        shm = share_returns(returns_df)
+        # Never fork: the parent may hold torch/OpenMP thread pools (and an event loop) mid-operation.
+        start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        env = SubprocVecEnv(
+            [make_shared_env(shm.name, returns_df.shape, risk_aversion, initial_portfolio_value) for _ in range(num_envs)],
+            start_method=start_method
+        )
+    else:
+        env = PortfolioOptimizationEnv(returns_df, risk_aversion, LOOKBACK_WINDOW, initial_portfolio_value)
+
+    try:
+        model = PPO("MlpPolicy", env, learning_rate=3e-4, n_steps=max(64, RL_ROLLOUT_STEPS // num_envs), verbose=0, device=DEVICE)
+        start = time.perf_counter()
+        model.learn(total_timesteps=total_timesteps)
+        steps_per_second = total_timesteps / (time.perf_counter() - start)
+    finally:
+        if shm is not None:
+            env.close()
+            shm.close()
+            shm.unlink()
+    print(f"PPO training: {steps_per_second:.0f} timesteps/s")
+    global _training_steps_per_second
+    _training_steps_per_second = steps_per_second
     
     print("\n🧐 Evaluating RL Agent (Deterministic)...")
-    # Use the same env for testing to see performance on the data
-    rl_results = test_rl_agent(model, env)
+    # Evaluate on the full history from the first tradable day
+    eval_env = env if num_envs == 1 else PortfolioOptimizationEnv(returns_df, risk_aversion, LOOKBACK_WINDOW, initial_portfolio_value)
+    rl_results = test_rl_agent(model, eval_env)
+    rl_results['training_steps_per_second'] = float(steps_per_second)
     
     final_weights = rl_results['final_weights']
     
     print("✅ RL Training & Evaluation Completed!")
     return model, final_weights, rl_results
 
-def run_monte_carlo(optimized_weights: np.ndarray, returns_df: pd.DataFrame, monthly_contribution: float, num_simulations: int = 100) -> Dict:
-    time_horizons = [5, 10, 25]
-    print(f"\n--- Running {num_simulations} Monte Carlo Simulations ---")
-    
-    # Ensure aligned headers
-    assets_in_df = list(returns_df.columns)
-    # Weights might need to be mapped if it's a specific order. 
-    # train_rl_agent -> returns_df determines column order. 
-    # optimized_weights matches that order.
-    
-    portfolio_returns = (returns_df * optimized_weights).sum(axis=1)
-    daily_return = portfolio_returns.mean()
-    daily_volatility = portfolio_returns.std()
+def simulate_contribution_paths(daily_returns: np.ndarray, monthly_contribution: float, sample_days: np.ndarray) -> np.ndarray:
+    """
+    Portfolio value at `sample_days` for each row of a (sims x days) daily return matrix.
+    A contribution is added every CONTRIBUTION_INTERVAL_DAYS before that day's return, so with
+    growth G_d = prod_{k<=d} (1 + r_k): V_d = G_d * sum_{contribution days k<=d} c / G_{k-1}.
+    `daily_returns` is overwritten with the growth factors.
+    """
+    daily_returns += 1.0
+    growth = np.cumprod(daily_returns, axis=1, out=daily_returns)
+
+    contribution_days = np.arange(0, growth.shape[1], CONTRIBUTION_INTERVAL_DAYS)
+    growth_before = np.ones((growth.shape[0], len(contribution_days)))
+    growth_before[:, 1:] = growth[:, contribution_days[1:] - 1]
+    contributed = np.cumsum(monthly_contribution / growth_before, axis=1)
+
+    return growth[:, sample_days] * contributed[:, sample_days // CONTRIBUTION_INTERVAL_DAYS]
+
+def stationary_bootstrap_indices(rng: np.random.Generator, num_paths: int, num_days: int, history_len: int, mean_block_length: int = MC_BLOCK_LENGTH) -> np.ndarray:
+    """
+    Politis-Romano stationary bootstrap: blocks of geometric length (mean `mean_block_length`) starting at
+    random days of the history, walked day by day and wrapping around. Draws one length and one start
+    per block instead of one coin flip per day.
+    """
+    # Enough blocks that every path covers num_days with overwhelming probability; topped up below if not.
+    expected_blocks = num_days / mean_block_length
+    num_blocks = int(expected_blocks + 6 * np.sqrt(expected_blocks) + 36)
+    lengths = rng.geometric(1.0 / mean_block_length, (num_paths, num_blocks))
+    while lengths.sum(axis=1).min() < num_days:
+        lengths = np.hstack([lengths, rng.geometric(1.0 / mean_block_length, (num_paths, num_blocks))])
+    starts = rng.integers(0, history_len, lengths.shape)
+
+    # Truncate each path at num_days: the last block is cut short, later ones get length 0.
+    block_ends = np.minimum(np.cumsum(lengths, axis=1), num_days)
+    block_begins = np.hstack([np.zeros((num_paths, 1), dtype=block_ends.dtype), block_ends[:, :-1]])
+    lengths = (block_ends - block_begins).ravel()
+
+    offsets = np.repeat((starts - block_begins).ravel(), lengths)
+    days = np.tile(np.arange(num_days), num_paths)
+    return ((offsets + days) % history_len).reshape(num_paths, num_days)
+
+def draw_daily_returns(engine: str, rng: np.random.Generator, portfolio_returns: np.ndarray, num_paths: int, num_days: int) -> np.ndarray:
+    """
+    (num_paths x num_days) matrix of daily portfolio returns for the given engine.
+    Bootstrap engines resample whole historical days, so the cross-asset correlation on each day is kept.
+    """
+    if engine == "normal":
+        return rng.normal(portfolio_returns.mean(), portfolio_returns.std(ddof=1), (num_paths, num_days))
+    if engine == "bootstrap":
+        return portfolio_returns[rng.integers(0, len(portfolio_returns), (num_paths, num_days))]
+    if engine == "block":
+        return portfolio_returns[stationary_bootstrap_indices(rng, num_paths, num_days, len(portfolio_returns))]
+    raise ValueError(f"Unknown Monte Carlo engine '{engine}'. Use one of {MC_ENGINES}.")
+
+def run_monte_carlo(optimized_weights: np.ndarray, returns_df: pd.DataFrame, monthly_contribution: float, num_simulations: int = MC_NUM_SIMULATIONS, seed: Optional[int] = None, engine: Optional[str] = None) -> Dict:
+    """
+    One vectorized run over the longest horizon; shorter horizons are prefixes of the same paths.
+    Simulations are drawn in chunks of MC_CHUNK_SIZE and only the yearly points of each path are kept.
+    """
+    engine = engine or MC_ENGINE
+    if engine not in MC_ENGINES:
+        raise ValueError(f"Unknown Monte Carlo engine '{engine}'. Use one of {MC_ENGINES}.")
+
+    time_horizons = MC_TIME_HORIZONS
+    print(f"\n--- Running {num_simulations} Monte Carlo Simulations ({engine}) ---")
     
+    # Weighting each historical day's asset returns once; resampling these keeps each day's joint move.
+    portfolio_returns = returns_df.values.astype(np.float64) @ np.asarray(optimized_weights, dtype=np.float64)
+
+    # Yearly points (day 0, 252, ...) plus the last day of every horizon.
+    max_days = max(time_horizons) * TRADING_DAYS_PER_YEAR
+    yearly_days = np.arange(0, max_days, TRADING_DAYS_PER_YEAR)
+    horizon_ends = np.array([h * TRADING_DAYS_PER_YEAR - 1 for h in time_horizons])
+    sample_days = np.union1d(yearly_days, horizon_ends)
+
+    rng = np.random.default_rng(seed)
+    samples = np.empty((num_simulations, len(sample_days)))
+    for chunk_start in range(0, num_simulations, MC_CHUNK_SIZE):
+        chunk = min(MC_CHUNK_SIZE, num_simulations - chunk_start)
+        daily_returns = draw_daily_returns(engine, rng, portfolio_returns, chunk, max_days)
+        samples[chunk_start:chunk_start + chunk] = simulate_contribution_paths(daily_returns, monthly_contribution, sample_days)
+
     mc_results = {
+        'engine': engine,
         'summary_table': [],
         'graphs': {}
     }
-    
-    for horizon in time_horizons:
-        num_trading_days = horizon * TRADING_DAYS_PER_YEAR
-        all_simulations = [] # Shape: (sims, days)
-        
-        final_values = []
-        
-        for sim in range(num_simulations):
-            current_value = 0.0 
-            sim_path = []
-            
-            for day in range(num_trading_days):
-                # Add monthly contribution approx every 21 trading days
-                if day % 21 == 0: 
-                    current_value += monthly_contribution
-                
-                stochastic_return = np.random.normal(loc=daily_return, scale=daily_volatility)
-                current_value *= (1 + stochastic_return)
-                
-                # Record yearly points (every 252 days) for graph to reduce payload
-                if day % 252 == 0:
-                     sim_path.append(current_value)
-            
-            # Append final
-            sim_path.append(current_value)
-            all_simulations.append(sim_path)
-            final_values.append(current_value)
-            
-        # Stats
-        mean_val = np.mean(final_values)
-        p5_val = np.percentile(final_values, 5)
-        p95_val = np.percentile(final_values, 95)
+
+    for horizon, end_day in zip(time_horizons, horizon_ends):
+        path_cols = np.append(np.searchsorted(sample_days, yearly_days[:horizon]), np.searchsorted(sample_days, end_day))
+        paths = samples[:, path_cols]
+        final_values = paths[:, -1]
+        bands = np.percentile(paths, MC_PERCENTILES, axis=0)
         
         mc_results['summary_table'].append({
             'year': horizon,
-            'estimated_value': float(round(mean_val, 2)),
-            'optimistic_value': float(round(p95_val, 2)),
-            'pessimistic_value': float(round(p5_val, 2))
+            'estimated_value': float(round(final_values.mean(), 2)),
+            'optimistic_value': float(round(np.percentile(final_values, 95), 2)),
+            'pessimistic_value': float(round(np.percentile(final_values, 5), 2))
         })
         
-        # Prepare graph data: Average path + Upper/Lower bounds path
-        # all_simulations is list of lists. Length varies by horizon? No, fixed.
-        # But we want year-by-year points.
-        max_len = max(len(s) for s in all_simulations)
-        avg_path = []
-        year_labels = []
-        
-        for i in range(max_len):
-            step_vals = [s[i] for s in all_simulations if i < len(s)]
-            if step_vals:
-                avg_path.append(float(round(np.mean(step_vals), 2)))
-                year_labels.append(i) # i is years since we sampled every 252
-        
         mc_results['graphs'][f'{horizon}yr'] = {
-            'years': year_labels,
-            'values': avg_path
+            'years': list(range(len(path_cols))),
+            'values': np.round(paths.mean(axis=0), 2).tolist(),
+            **{f'p{p}': np.round(band, 2).tolist() for p, band in zip(MC_PERCENTILES, bands)}
         }
         
     return mc_results
 
+def get_returns_snapshot(returns_df: pd.DataFrame) -> datetime.date:
+    """Market data snapshot a policy is trained on: the last trading day in the returns."""
+    last = returns_df.index[-1]
+    return last.date() if hasattr(last, "date") else datetime.date.today()
+
+def estimated_training_seconds() -> float:
+    return RL_TRAINING_STEPS / _training_steps_per_second
+
+# Policy keys (risk aversion, assets, snapshot) currently trained by start_background_training.
+_background_training: set = set()
+_background_training_lock = threading.Lock()
+
+def start_background_training(returns_df: pd.DataFrame, risk_aversion: float, assets: List[str], snapshot: datetime.date) -> bool:
+    """
+    Trains and saves the policy for this key on a daemon thread (one env, no worker processes).
+    Also measures the training rate estimated_training_seconds uses. Returns False if already running.
+    """
+    from policy_store import save_policy
+
+    key = (risk_aversion, tuple(assets), snapshot)
+    with _background_training_lock:
+        if key in _background_training:
+            return False
+        _background_training.add(key)
+
+    def _train():
+        try:
+            model, _, _ = train_rl_agent(returns_df, risk_aversion, INITIAL_PORTFOLIO_VALUE, num_envs=1)
+            save_policy(model, risk_aversion, assets, snapshot)
+        except Exception as e:
+            print(f"Background RL training failed: {e}")
+        finally:
+            with _background_training_lock:
+                _background_training.discard(key)
+
+    threading.Thread(target=_train, name=f"rl-train-ra{risk_aversion:g}", daemon=True).start()
+    return True
+
+def run_mean_variance(returns_df: pd.DataFrame, risk_aversion: float, initial_portfolio_value: float) -> Tuple[np.ndarray, Dict]:
+    """Deterministic allocation for the env reward's objective, backtested over the same days as test_rl_agent."""
+    from portfolio import mean_variance_weights, evaluate_static_weights
+
+    weights = mean_variance_weights(returns_df, risk_aversion)
+    performance = evaluate_static_weights(returns_df, weights, initial_portfolio_value, start=LOOKBACK_WINDOW)
+    return performance['final_weights'], performance
+
+def run_rl_policy(returns_df: pd.DataFrame, risk_aversion: float, initial_portfolio_value: float, engine: Optional[str] = None) -> Tuple[np.ndarray, Dict, Dict]:
+    """
+    Serves a pretrained policy for (risk bucket, asset set, snapshot) with inference only (test_rl_agent).
+    On a miss the agent is trained as before and saved, so the next request for the same key is served from the store,
+    unless engine is "auto" and training would exceed RL_LATENCY_SLO_SECONDS: then the mean-variance engine answers
+    while the policy trains in the background (rl_policy["training"] is "started" or "in_progress").
+    """
+    from policy_store import load_policy, save_policy
+
+    engine = engine or ALLOCATION_ENGINE
+    assets = returns_df.columns.tolist()
+    snapshot = get_returns_snapshot(returns_df)
+
+    if engine == "mean_variance":
+        weights, performance = run_mean_variance(returns_df, risk_aversion, initial_portfolio_value)
+        return weights, performance, {"source": "mean_variance", "snapshot": snapshot.isoformat()}
+
+    model = load_policy(risk_aversion, assets, snapshot)
+    if model is not None:
+        print("Serving pretrained RL policy.")
+        env = PortfolioOptimizationEnv(returns_df, risk_aversion, LOOKBACK_WINDOW, initial_portfolio_value)
+        rl_performance = test_rl_agent(model, env)
+        return rl_performance['final_weights'], rl_performance, {"source": "pretrained", "snapshot": snapshot.isoformat()}
+
+    if engine == "auto" and estimated_training_seconds() > RL_LATENCY_SLO_SECONDS:
+        print(f"No pretrained policy and training would take ~{estimated_training_seconds():.0f}s; using mean-variance.")
+        started = start_background_training(returns_df, risk_aversion, assets, snapshot)
+        weights, performance = run_mean_variance(returns_df, risk_aversion, initial_portfolio_value)
+        return weights, performance, {"source": "mean_variance", "snapshot": snapshot.isoformat(), "training": "started" if started else "in_progress"}
+
+    model, final_weights, rl_performance = train_rl_agent(returns_df, risk_aversion, initial_portfolio_value)
+    save_policy(model, risk_aversion, assets, snapshot)
+    return final_weights, rl_performance, {"source": "trained", "snapshot": snapshot.isoformat()}
+
 def generate_rl_optimization_report(
     latest_fhs: float, 
     starting_balance: float, 
     monthly_contribution: float, 
-    returns_df: pd.DataFrame
+    returns_df: pd.DataFrame,
+    mc_engine: Optional[str] = None,
+    engine: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Main function to execute the RL portfolio optimization pipeline.
     """
     try:
+        if mc_engine and mc_engine not in MC_ENGINES:
+            raise ValueError(f"Unknown Monte Carlo engine '{mc_engine}'. Use one of {MC_ENGINES}.")
+        if engine and engine not in ALLOCATION_ENGINES:
+            raise ValueError(f"Unknown allocation engine '{engine}'. Use one of {ALLOCATION_ENGINES}.")
+
         risk_aversion, risk_profile = get_risk_aversion(latest_fhs)
+        # Policies are keyed on the sorted asset set, so the observation layout is the same for every request.
+        returns_df = returns_df[sorted(returns_df.columns)]
         
-        model, final_weights_raw, rl_performance = train_rl_agent(returns_df, risk_aversion, starting_balance)
+        final_weights_raw, rl_performance, rl_policy = run_rl_policy(returns_df, risk_aversion, starting_balance, engine)
         
         # Map weights back to Asset Names correctly
         asset_names = returns_df.columns.tolist()
@@ -492,7 +822,7 @@ def generate_rl_optimization_report(
             for asset, weight in zip(asset_names, final_weights_raw)
         }
         
-        mc_forecast = run_monte_carlo(final_weights_raw, returns_df, monthly_contribution)
+        mc_forecast = run_monte_carlo(final_weights_raw, returns_df, monthly_contribution, engine=mc_engine)
         
         report = {
             "personalization": {
@@ -508,6 +838,7 @@ def generate_rl_optimization_report(
                 "final_value_history": rl_performance['portfolio_history']
             },
             "optimized_weights": optimized_weights,
+            "rl_policy": rl_policy,
             "mc_forecast": mc_forecast
         }
         
@@ -0,0 +1,84 @@
+# AIworkshop2/stat_forecast.py
+import numpy as np
+import pandas as pd
+from datetime import timedelta
+from typing import Dict, Any
+
+from lstm import FORECAST_DAYS, LOOKBACK, build_forecast_report
+
+STAT_ENGINES = ["seasonal_naive", "ets", "bootstrap"]
+DEFAULT_STAT_ENGINE = "seasonal_naive"
+# Users with at most this many days of history are served by DEFAULT_STAT_ENGINE instead of the LSTM.
+STAT_FORECAST_MAX_DAYS = LOOKBACK
+ETS_ALPHA = 0.3
+BOOTSTRAP_PATHS = 500
+BOOTSTRAP_SEED = 42
+
+
+def future_calendar(daily_summary: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """Weekday (0-6) and day-of-month (1-31) arrays for the FORECAST_DAYS after the last observed day."""
+    last_date = daily_summary["date"].iloc[-1]
+    future = pd.date_range(last_date + timedelta(days=1), periods=FORECAST_DAYS)
+    return future.dayofweek.values, future.day.values
+
+
+def profile_mean(keys: np.ndarray, values: np.ndarray, size: int, fallback: float) -> np.ndarray:
+    """Mean of `values` per key (0..size-1). Keys never observed get `fallback`."""
+    counts = np.bincount(keys, minlength=size)
+    sums = np.bincount(keys, weights=values, minlength=size)
+    return np.where(counts > 0, sums / np.maximum(counts, 1), fallback)
+
+
+def seasonal_naive_flows(daily_summary: pd.DataFrame) -> np.ndarray:
+    """
+    Income repeats by day of month (salaries, transfers); unseen days of month get no income.
+    Expense repeats by weekday, falling back to the overall daily mean for unseen weekdays.
+    """
+    income = daily_summary["income"].values.astype(np.float64)
+    expense = daily_summary["expense"].values.astype(np.float64)
+    future_dow, future_dom = future_calendar(daily_summary)
+
+    income_by_dom = profile_mean(daily_summary["day_of_month"].values, income, 32, 0.0)
+    expense_by_dow = profile_mean(daily_summary["day_of_week"].values, expense, 7, expense.mean())
+    return np.column_stack((income_by_dom[future_dom], expense_by_dow[future_dow]))
+
+
+def ets_flows(daily_summary: pd.DataFrame, alpha: float = ETS_ALPHA) -> np.ndarray:
+    """Simple exponential smoothing level of income and expense, held flat over the horizon."""
+    flows = daily_summary[["income", "expense"]].values.astype(np.float64)
+    n = len(flows)
+    # level_T = sum_k alpha (1-alpha)^k x_{T-k}, with the oldest observation carrying the remaining weight.
+    weights = alpha * (1 - alpha) ** np.arange(n - 1, -1, -1)
+    weights[0] = (1 - alpha) ** (n - 1)
+    level = weights @ flows
+    return np.tile(level, (FORECAST_DAYS, 1))
+
+
+def bootstrap_flows(daily_summary: pd.DataFrame, n_paths: int = BOOTSTRAP_PATHS, seed: int = BOOTSTRAP_SEED) -> np.ndarray:
+    """Expected daily flows over `n_paths` paths that resample observed (income, expense) days."""
+    flows = daily_summary[["income", "expense"]].values.astype(np.float64)
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, len(flows), size=(n_paths, FORECAST_DAYS))
+    return flows[idx].mean(axis=0)
+
+
+ENGINE_FUNCS = {
+    "seasonal_naive": seasonal_naive_flows,
+    "ets": ets_flows,
+    "bootstrap": bootstrap_flows,
+}
+
+
+def generate_stat_forecast(daily_summary: pd.DataFrame, engine: str = DEFAULT_STAT_ENGINE) -> Dict[str, Any]:
+    """Statistical forecast with the same schema as generate_lstm_forecast. No model fitting, runs in microseconds."""
+    if engine not in ENGINE_FUNCS:
+        return {"error": f"Unknown statistical forecast engine '{engine}'. Use one of {STAT_ENGINES}."}
+
+    forecast_flows = np.maximum(ENGINE_FUNCS[engine](daily_summary), 0.0)
+    start_balance = float(daily_summary["balance"].iloc[-1])
+    forecast_balances = (start_balance + np.cumsum(forecast_flows[:, 0] - forecast_flows[:, 1])).tolist()
+
+    return build_forecast_report(
+        daily_summary, forecast_flows, forecast_balances,
+        f"Statistical forecast ({engine}) based on {len(daily_summary)} days of history."
+    )
@@ -0,0 +1,60 @@
+import argparse
+import time
+from collections import defaultdict
+import firebase_admin
+from firebase_admin import credentials, firestore, initialize_app
+
+from lstm import preprocess_transactions, train_global_model, save_global_model, GLOBAL_EPOCHS, MODEL_DIR
+
+# Setup Firebase (Simplified for script)
+cred_path = './serviceAccountKey.json'
+
+def get_db():
+    try:
+        firebase_admin.get_app()
+    except ValueError:
+        cred = credentials.Certificate(cred_path)
+        initialize_app(cred)
+    return firestore.client()
+
+def load_daily_summaries(db) -> dict:
+    """Streams every transaction once and builds one daily series per user: {user_id: daily_summary}."""
+    print("Fetching transactions for all users...")
+    by_user = defaultdict(list)
+    for doc in db.collection('transactions').stream():
+        data = doc.to_dict()
+        if not data.get('user_id') or not data.get('transaction_date'):
+            continue
+        if hasattr(data['transaction_date'], 'isoformat'):
+            data['transaction_date'] = data['transaction_date'].isoformat()
+        by_user[data['user_id']].append(data)
+
+    daily_summaries = {}
+    for user_id, transactions in by_user.items():
+        try:
+            daily_summaries[user_id] = preprocess_transactions(transactions)
+        except Exception as e:
+            print(f"Skipping user {user_id}: {e}")
+
+    print(f"Built daily series for {len(daily_summaries)} users.")
+    return daily_summaries
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the shared cross-user LSTM forecast model.")
+    parser.add_argument("--epochs", type=int, default=GLOBAL_EPOCHS)
+    parser.add_argument("--no-scale-features", action="store_true", help="Do not feed the user-level scale as an input feature.")
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    args = parser.parse_args()
+
+    daily_summaries = load_daily_summaries(get_db())
+
+    start = time.perf_counter()
+    model, metadata = train_global_model(list(daily_summaries.values()), use_scale_features=not args.no_scale_features, epochs=args.epochs)
+    path = save_global_model(model, metadata, args.model_dir)
+
+    print(f"Trained on {metadata['num_users']} users / {metadata['num_windows']} windows in {time.perf_counter() - start:.1f}s "
+          f"(final loss {metadata['final_loss']:.4f}).")
+    print(f"Saved global forecast model to {path}")
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,7 @@ import json
 import base64
 import os
 from pathlib import Path
-from typing import List, Dict, Any, Literal
+from typing import List, Dict, Any, Literal, Optional
 from pydantic import BaseModel, Field
 from pdf2image import convert_from_path
 import tempfile
@@ -18,14 +18,7 @@ OPENAI_API_URL = os.getenv("OPENAI_API_URL")
 
 print(f"DEBUG: vlm.py loaded. Key: {str(OPENAI_API_KEY)[:10]}... URL: {OPENAI_API_URL}")
 
-from openai import AsyncOpenAI
-
-# Initialize OpenAI Client matching simulation.py logic
-client_kwargs = {"api_key": OPENAI_API_KEY}
-if OPENAI_API_URL:
-    client_kwargs["base_url"] = OPENAI_API_URL
-
-openai_client = AsyncOpenAI(**client_kwargs)
+import llm_gateway
 
 MODEL = "gpt-4o-mini"
 
@@ -77,10 +70,10 @@ def auto_classify(tx: dict) -> dict:
 
     return tx
 
-async def extract_transactions_from_image(data_url: str) -> List[Dict[str, Any]]:
-    """Calls the OpenAI VLM API using AsyncOpenAI client."""
+async def extract_transactions_from_image(data_url: str, user_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Calls the OpenAI VLM API through the shared LLM gateway."""
     
-    if not openai_client:
+    if not llm_gateway.is_configured():
         print("OpenAI client not initialized.")
         return []
 
@@ -109,7 +102,9 @@ async def extract_transactions_from_image(data_url: str) -> List[Dict[str, Any]]
     
     try:
         print(f"Requesting OpenAI VLM ({MODEL})...")
-        response = await openai_client.chat.completions.create(
+        response = await llm_gateway.chat_completion(
+            "vlm",
+            user_id=user_id,
             model=MODEL,
             messages=messages,
             response_format={"type": "json_object"},
@@ -142,7 +137,7 @@ async def extract_transactions_from_image(data_url: str) -> List[Dict[str, Any]]
         return []
 
 
-async def extract_transactions_from_data(base64_data: str, mime_type: str) -> List[Dict[str, Any]]:
+async def extract_transactions_from_data(base64_data: str, mime_type: str, user_id: Optional[str] = None) -> List[Dict[str, Any]]:
     """
     Called by main.py with base64 + mime_type.
     """
@@ -168,7 +163,7 @@ async def extract_transactions_from_data(base64_data: str, mime_type: str) -> Li
 
                 data_url = encode_image_to_data_url(img_path)
                 
-                txs = await extract_transactions_from_image(data_url)
+                txs = await extract_transactions_from_image(data_url, user_id)
                 transactions.extend(txs)
 
                 if os.path.exists(img_path):
@@ -176,7 +171,7 @@ async def extract_transactions_from_data(base64_data: str, mime_type: str) -> Li
 
         else:
             data_url = encode_image_to_data_url(tmp_path)
-            transactions = await extract_transactions_from_image(data_url)
+            transactions = await extract_transactions_from_image(data_url, user_id)
 
     except Exception as e:
         print(f"Error during file processing: {e}")
@@ -0,0 +1,25 @@
+# tests/returns_data.py
+"""Synthetic daily asset returns shared by the portfolio, backtest, Monte Carlo and RL tests."""
+from typing import Optional, Sequence, Union
+import numpy as np
+import pandas as pd
+
+ASSETS = ["Stocks", "Bonds", "Gold"]
+
+def make_returns_df(
+    days: int,
+    columns: Union[int, Sequence[str]] = ASSETS,
+    mean: Union[float, np.ndarray] = 0.0005,
+    vol: Union[float, np.ndarray] = 0.01,
+    seed: int = 0,
+    start: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Gaussian returns, mean + vol * N(0, 1), with scalar or per-asset mean/vol.
+    An int `columns` names the assets A0..An-1; `start` adds a business-day index from that date.
+    """
+    if isinstance(columns, int):
+        columns = [f"A{i}" for i in range(columns)]
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(start, periods=days) if start else None
+    return pd.DataFrame(mean + rng.standard_normal((days, len(columns))) * vol, index=index, columns=list(columns))
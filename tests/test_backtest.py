@@ -0,0 +1,44 @@
+# tests/test_backtest.py
+import sys
+import os
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'AIworkshop2')))
+
+from returns_data import make_returns_df
+from backtest import walk_forward_windows, apply_costs, run_backtest
+
+def test_walk_forward_windows():
+    windows = walk_forward_windows(700, train_days=504, test_days=63)
+    assert windows == [(0, 504, 567), (63, 567, 630), (126, 630, 693)]
+    assert all(test_end - train_end == 63 for _, train_end, test_end in windows)
+
+def test_costs_match_loop():
+    rng = np.random.default_rng(1)
+    returns = rng.normal(0, 0.01, (40, 3))
+    weights = rng.dirichlet(np.ones(3), 40)
+    net, turnover = apply_costs(weights, returns, cost_bps=25)
+
+    holdings = np.zeros(3)
+    for t in range(40):
+        expected_turnover = np.abs(weights[t] - holdings).sum()
+        gross = weights[t] @ returns[t]
+        assert abs(turnover[t] - expected_turnover) < 1e-12
+        assert abs(net[t] - (gross - 25e-4 * expected_turnover)) < 1e-12
+        holdings = weights[t] * (1 + returns[t]) / (1 + gross)
+
+def test_walk_forward_backtest():
+    report = run_backtest(make_returns_df(700, mean=0.0004), ["equal_weight", "mean_variance"], train_days=504, test_days=63, workers=2)
+
+    assert report["windows"] == 3 and report["out_of_sample_days"] == 189
+    for engine in ["equal_weight", "mean_variance"]:
+        result = report["engines"][engine]
+        assert len(result["window_returns"]) == 3
+        assert result["annual_turnover"] > 0
+    assert report["engines"]["equal_weight"]["mean_fit_seconds"] < report["wall_seconds"]
+
+if __name__ == "__main__":
+    test_walk_forward_windows()
+    test_costs_match_loop()
+    test_walk_forward_backtest()
+    print("✅ Backtest tests passed!")
@@ -0,0 +1,82 @@
+# tests/test_budget_generation.py
+import sys
+import os
+import json
+import time
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'AIworkshop2')))
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import budgeter
+import balance_manager
+import llm_gateway
+
+ALLOCATION = [
+    {"category": "Bills", "amount": 1500.0, "percentage": 30.0},
+    {"category": "Food", "amount": 750.0, "percentage": 15.0},
+    {"category": "Transport", "amount": 500.0, "percentage": 10.0},
+    {"category": "Discretionary/Other Expenses", "amount": 750.0, "percentage": 15.0},
+    {"category": "Savings", "amount": 1000.0, "percentage": 20.0},
+    {"category": "Investment", "amount": 500.0, "percentage": 10.0},
+]
+
+def test_repair_and_validate():
+    messy = 'Here is your budget:\n```json\n{"explanation": "Balanced.", "budget_allocation": [{"category": "Bills", "amount": "RM 2,000",}, {"category": "Savings", "amount": 1000},],}\n```'
+    parsed = budgeter.parse_budget_response(messy, 5000.0)
+    assert [item["amount"] for item in parsed["budget_allocation"]] == [3333.33, 1666.67]
+    assert sum(item["amount"] for item in parsed["budget_allocation"]) == 5000.0
+    assert parsed["budget_allocation"][0]["percentage"] == 66.67
+
+    exact = budgeter.parse_budget_response(json.dumps({"explanation": "ok", "budget_allocation": ALLOCATION}), 5000.0)
+    assert exact["budget_allocation"] == ALLOCATION
+
+    for bad in ["no json here", '{"budget_allocation": []}', '{"budget_allocation": [{"category": "Food", "amount": -5}]}',
+                '{"budget_allocation": [{"category": "Food", "amount": "lots"}]}']:
+        try:
+            budgeter.parse_budget_response(bad, 5000.0)
+            assert False, f"Expected ValueError for {bad}"
+        except ValueError:
+            pass
+
+def test_generate_auto_budget_prefetches_concurrently():
+    def slow_stream():
+        time.sleep(0.2)
+        return [SimpleNamespace(to_dict=lambda: {"transaction_date": "2025-01-05", "type": "Expense", "amount": 120.0, "category": "Food"}),
+                SimpleNamespace(to_dict=lambda: {"transaction_date": "2025-01-01", "type": "Income", "amount": 5000.0})]
+
+    def slow_metrics(user_id, db):
+        time.sleep(0.2)  # blocking Firestore read, as in balance_manager
+        return {"avg_monthly_income": 5000.0, "avg_monthly_spending": 3500.0}
+
+    calls = []
+
+    async def fake_create(**kwargs):
+        calls.append(kwargs)
+        content = json.dumps({"explanation": "Balanced.", "budget_allocation": ALLOCATION[:-1]}) + ","
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    db = MagicMock()
+    db.collection.return_value.where.return_value.order_by.return_value.limit.return_value.stream.side_effect = slow_stream
+    original_metrics, original_get_client = balance_manager.read_average_metrics_last_3_months, llm_gateway.get_client
+    balance_manager.read_average_metrics_last_3_months = slow_metrics
+    llm_gateway.get_client = lambda: SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=fake_create)))
+    try:
+        start = time.perf_counter()
+        budget = asyncio.run(budgeter.generate_auto_budget("user-1", db, {"summary": {}}, {"summary": {}}, currency="MYR"))
+        elapsed = time.perf_counter() - start
+    finally:
+        balance_manager.read_average_metrics_last_3_months, llm_gateway.get_client = original_metrics, original_get_client
+
+    assert elapsed < 0.35
+    assert calls[0]["timeout"] == budgeter.BUDGET_LLM_TIMEOUT_SECONDS
+    assert "error" not in budget
+    assert round(sum(item["amount"] for item in budget["budget_allocation"]), 2) == 5000.0
+    assert budget["data_context"]["income"] == 5000.0 and budget["data_context"]["spending_breakdown"] == {"Food": 120.0}
+
+if __name__ == "__main__":
+    test_repair_and_validate()
+    test_generate_auto_budget_prefetches_concurrently()
+    print("✅ Budget generation tests passed!")
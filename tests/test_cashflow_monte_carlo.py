@@ -0,0 +1,67 @@
+# tests/test_cashflow_monte_carlo.py
+import sys
+import os
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'AIworkshop2')))
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from simulation import run_cashflow_monte_carlo, run_financial_simulation, monthly_flow_samples, MAX_SIMULATION_MONTHS
+
+def make_daily_summary(days: int = 400, seed: int = 0) -> pd.DataFrame:
+    """Salary every 30 days, occasional side income, noisy daily spending."""
+    rng = np.random.default_rng(seed)
+    income = np.zeros(days)
+    income[::30] = 5000.0
+    income += (rng.random(days) < 0.05) * rng.uniform(50, 500, days)
+    expense = rng.gamma(2.0, 50.0, days)
+    return pd.DataFrame({"income": income, "expense": expense})
+
+def test_monthly_flow_samples():
+    daily = make_daily_summary()
+    income, expense = monthly_flow_samples(daily, np.random.default_rng(0))
+    assert len(income) == len(daily) - 29
+    assert abs(income[0] - daily["income"].values[:30].sum()) < 1e-9
+    # Short histories fall back to months of resampled days.
+    income, _ = monthly_flow_samples(daily.iloc[:20], np.random.default_rng(0))
+    assert len(income) > 0 and np.all(income >= 0)
+
+def test_bands_and_target_probability():
+    daily = make_daily_summary()
+    params = {"simulation_goal": "buy a car", "time_horizon_months": 36, "monthly_impact": -900.0, "target_amount": 40000.0}
+    report = run_cashflow_monte_carlo(params, daily, 10000.0, baseline_income=5000.0, baseline_expense=3000.0, num_paths=4000, seed=1)
+    again = run_cashflow_monte_carlo(params, daily, 10000.0, baseline_income=5000.0, baseline_expense=3000.0, num_paths=4000, seed=1)
+    assert report == again
+
+    bands = report["balance_bands"]
+    assert len(bands["p50"]) == 37
+    assert all(lo <= mid <= hi for lo, mid, hi in zip(bands["p5"], bands["p50"], bands["p95"]))
+    assert bands["p95"][-1] > bands["p5"][-1]
+
+    # Recentred on the baselines, the median tracks the deterministic engine, also with a spending cut.
+    for goal in ["buy a car", "reduce spending"]:
+        scenario = dict(params, simulation_goal=goal)
+        median = run_cashflow_monte_carlo(scenario, daily, 10000.0, baseline_income=5000.0, baseline_expense=3000.0, num_paths=4000, seed=1)["final_balance"]["p50"]
+        deterministic = run_financial_simulation(scenario, {}, {}, 10000.0, baseline_income=5000.0, baseline_expense=3000.0)
+        assert abs(median - deterministic["final_balance"]) < 0.02 * deterministic["final_balance"], goal
+    # Expected savings are 1100 x 36 = 39600, just under the target.
+    assert 0.1 < report["probability_of_target"] < 0.9
+
+def test_latency_at_max_horizon():
+    daily = make_daily_summary()
+    params = {"time_horizon_months": MAX_SIMULATION_MONTHS, "target_amount": 500000.0}
+    timings = []
+    for seed in range(3):
+        start = time.perf_counter()
+        report = run_cashflow_monte_carlo(params, daily, 0.0, baseline_income=5000.0, baseline_expense=3000.0, seed=seed)
+        timings.append((time.perf_counter() - start) * 1000)
+    print(f"{report['num_paths']} paths x {MAX_SIMULATION_MONTHS} months in {min(timings):.1f} ms")
+    assert len(report["balance_bands"]["p5"]) == MAX_SIMULATION_MONTHS + 1
+
+if __name__ == "__main__":
+    test_monthly_flow_samples()
+    test_bands_and_target_probability()
+    test_latency_at_max_horizon()
+    print("✅ Cash-flow Monte Carlo tests passed!")
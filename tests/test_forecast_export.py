@@ -0,0 +1,67 @@
+# tests/test_forecast_export.py
+import sys
+import os
+import tempfile
+import numpy as np
+import torch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'AIworkshop2')))
+
+import lstm
+from lstm import preprocess_transactions, train_global_model, save_global_model, LOOKBACK
+from forecast_export import load_forecaster, quantize_forecast_model
+from test_global_forecast import make_transactions
+
+try:
+    import onnxruntime  # noqa: F401
+    RUNTIMES = ["torchscript", "onnx"]
+except ImportError:
+    RUNTIMES = ["torchscript"]  # ONNX is optional
+
+def rollout(forecaster, window: torch.Tensor, next_day: torch.Tensor) -> np.ndarray:
+    """A window forecast, then one more day fed with the carried state, as generate_lstm_forecast does."""
+    with torch.no_grad():
+        first, state = forecaster.forward_with_state(window)
+        second, _ = forecaster.forward_with_state(next_day, state)
+    return np.concatenate([np.asarray(first), np.asarray(second)])
+
+def test_exported_runtimes_match_eager():
+    users = [make_transactions(3000 * (k + 1), 60 * (k + 1), 120, seed=k) for k in range(3)]
+    model, metadata = train_global_model([preprocess_transactions(t) for t in users], epochs=1)
+    model.eval()
+
+    rng = np.random.default_rng(0)
+    window = torch.tensor(rng.normal(0, 1, (1, LOOKBACK, metadata["input_size"])), dtype=torch.float32)
+    next_day = torch.tensor(rng.normal(0, 1, (1, 1, metadata["input_size"])), dtype=torch.float32)
+    eager = rollout(model, window, next_day)
+    eager_int8 = rollout(quantize_forecast_model(model), window, next_day)
+    scale = np.abs(eager).max()
+
+    with tempfile.TemporaryDirectory() as model_dir:
+        path = save_global_model(model, metadata, model_dir)
+        original_dir = lstm.MODEL_DIR
+        lstm.MODEL_DIR = model_dir
+        try:
+            for runtime in RUNTIMES:
+                for quantize in [False, True]:
+                    forecaster, loaded_metadata = load_forecaster(runtime, quantize)
+                    assert loaded_metadata["version"] in os.path.basename(path)
+                    exported = rollout(forecaster, window, next_day)
+                    if not quantize:
+                        np.testing.assert_allclose(exported, eager, rtol=1e-4, atol=1e-5, err_msg=runtime)
+                    elif runtime == "torchscript":
+                        # Traced from the same dynamically quantized module as eager int8.
+                        np.testing.assert_allclose(exported, eager_int8, rtol=1e-4, atol=1e-5, err_msg=runtime)
+                    else:
+                        # onnxruntime quantizes with its own int8 kernels: only close to fp32, not equal.
+                        assert np.abs(exported - eager).max() <= 0.1 * scale + 1e-3, (runtime, exported, eager)
+                    print(f"{runtime:<12} int8={quantize!s:<6} max |diff| vs eager fp32: {np.abs(exported - eager).max():.2e}")
+                    assert load_forecaster(runtime, quantize)[0] is forecaster
+        finally:
+            lstm.MODEL_DIR = original_dir
+
+    assert np.abs(eager_int8 - eager).max() <= 0.1 * scale + 1e-3
+
+if __name__ == "__main__":
+    test_exported_runtimes_match_eager()
+    print("✅ Forecast export tests passed!")
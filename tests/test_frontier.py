@@ -0,0 +1,56 @@
+# tests/test_frontier.py
+import sys
+import os
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'AIworkshop2')))
+
+from returns_data import make_returns_df
+from portfolio import evaluate_weight_matrix, evaluate_static_weights, pareto_frontier, candidate_weights, generate_frontier_report
+
+def frontier_returns(days: int = 1250, assets: int = 8) -> pd.DataFrame:
+    """Assets spread from low-return/low-risk to high-return/high-risk."""
+    return make_returns_df(days, columns=assets, mean=np.linspace(0.0001, 0.0008, assets), vol=np.linspace(0.002, 0.02, assets))
+
+def test_batched_metrics_match_single_backtest():
+    returns_df = frontier_returns(days=300, assets=4)
+    weights = candidate_weights(4, 50, seed=3)
+    metrics = evaluate_weight_matrix(returns_df, weights, chunk_size=16)
+
+    for i in [0, 4, 17, 49]:
+        single = evaluate_static_weights(returns_df, weights[i], 1.0)
+        assert abs(metrics["annual_return"][i] - single["annual_return"]) < 1e-12
+        assert abs(metrics["volatility"][i] - single["volatility"]) < 1e-12
+        assert abs(metrics["sharpe_ratio"][i] - single["sharpe_ratio"]) < 1e-9
+
+        history = np.array(single["portfolio_history"])
+        drawdown = (history / np.maximum.accumulate(history) - 1).min()
+        assert abs(metrics["max_drawdown"][i] - drawdown) < 1e-12
+
+def test_pareto_frontier():
+    annual_return = np.array([0.05, 0.04, 0.08, 0.07, 0.10, 0.02])
+    volatility = np.array([0.05, 0.06, 0.10, 0.12, 0.20, 0.01])
+    # 1 is beaten by 0, 3 is beaten by 2.
+    assert pareto_frontier(annual_return, volatility).tolist() == [5, 0, 2, 4]
+
+def test_frontier_report():
+    returns_df = frontier_returns()
+    start = time.perf_counter()
+    report = generate_frontier_report(returns_df, num_portfolios=5000, risk_aversion_levels=[1.0, 4.0, 10.0])
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    print(f"Frontier over {report['num_evaluated']} portfolios in {elapsed_ms:.0f} ms ({len(report['frontier'])} frontier points)")
+
+    assert report["num_evaluated"] == 5003
+    vols = [p["annual_volatility_pct"] for p in report["frontier"]]
+    returns = [p["annual_return_pct"] for p in report["frontier"]]
+    assert vols == sorted(vols) and returns == sorted(returns)
+    assert report["max_sharpe"]["sharpe_ratio"] >= max(p["sharpe_ratio"] for p in report["frontier"])
+    assert all(abs(sum(p["weights"].values()) - 100) < 0.1 for p in report["frontier"])
+
+if __name__ == "__main__":
+    test_batched_metrics_match_single_backtest()
+    test_pareto_frontier()
+    test_frontier_report()
+    print("✅ Frontier tests passed!")
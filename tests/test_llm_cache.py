@@ -0,0 +1,88 @@
+# tests/test_llm_cache.py
+import sys
+import os
+import time
+import asyncio
+import tempfile
+from types import SimpleNamespace
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'AIworkshop2')))
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import simulation
+import llm_gateway
+from llm_cache import LLMCache, normalize_question
+
+def test_normalize_question():
+    variants = [
+        "What if I buy a car for RM1,000 a month?",
+        "what if i buy a car for rm 1000 a month",
+        "  What if I buy a car for RM 1k   a month ?? ",
+        "what if I buy a car for rm1000.00 a month.",
+    ]
+    assert len({normalize_question(v) for v in variants}) == 1
+    assert normalize_question("Save 1.5k for 9 years") == "save 1500 for 9 years"
+    # A bare "m" is months, not million.
+    assert normalize_question("Save RM500 a month for 12m") == "save rm 500 a month for 12m"
+    assert normalize_question("Save 2 million") == normalize_question("save 2mil") == "save 2000000"
+    assert normalize_question("car for rm 1000 a month") != normalize_question("car for rm 1200 a month")
+
+def test_lru_ttl_and_persistence():
+    cache = LLMCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", {"x": 1})
+    cache.set("b", {"x": 2})
+    cache.get("a")
+    cache.set("c", {"x": 3})  # evicts b, the least recently used
+    assert cache.get("b") is None and cache.get("a") == {"x": 1}
+
+    value = cache.get("c")
+    value["x"] = 99
+    assert cache.get("c") == {"x": 3}
+    assert cache.stats()["hits"] == 4 and cache.stats()["misses"] == 1
+
+    expired = LLMCache(ttl_seconds=0.01)
+    expired.set("a", 1)
+    time.sleep(0.02)
+    assert expired.get("a") is None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "llm_cache.sqlite")
+        LLMCache(path=path).set("q", {"months": 12})
+        restarted = LLMCache(path=path)
+        assert restarted.get("q") == {"months": 12} and restarted.stats()["persistent"]
+
+def test_extraction_uses_cache():
+    calls = []
+
+    async def fake_create(**kwargs):
+        calls.append(kwargs)
+        content = '{"simulation_goal": "Buy Car", "time_horizon_months": 60, "monthly_impact": -1000}'
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    async def failing_create(**kwargs):
+        raise RuntimeError("API down")
+
+    original_cache, original_get_client = simulation.extraction_cache, llm_gateway.get_client
+    simulation.extraction_cache = LLMCache()
+    try:
+        llm_gateway.get_client = lambda: SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=failing_create)))
+        fallback = asyncio.run(simulation.extract_simulation_parameters("Buy a car for RM1,000 a month for 5 years"))
+        assert fallback["simulation_goal"] == "General Savings"
+
+        llm_gateway.get_client = lambda: SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=fake_create)))
+        first = asyncio.run(simulation.extract_simulation_parameters("Buy a car for RM1,000 a month for 5 years"))
+        second = asyncio.run(simulation.extract_simulation_parameters("buy a car for rm 1k a month for 5 years?"))
+        stats = simulation.extraction_cache.stats()
+    finally:
+        simulation.extraction_cache, llm_gateway.get_client = original_cache, original_get_client
+
+    # The failed call was not cached, the second phrasing was served from the first answer.
+    assert len(calls) == 1
+    assert first == second and first["monthly_impact"] == -1000
+    assert stats["hits"] == 1 and stats["misses"] == 2
+
+if __name__ == "__main__":
+    test_normalize_question()
+    test_lru_ttl_and_persistence()
+    test_extraction_uses_cache()
+    print("✅ LLM cache tests passed!")
@@ -0,0 +1,139 @@
+# tests/test_llm_gateway.py
+import sys
+import os
+import asyncio
+from types import SimpleNamespace
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'AIworkshop2')))
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import llm_gateway
+
+class FakeCompletions:
+    """Counts in-flight calls; fails the first `failures` calls with `error`."""
+    def __init__(self, delay: float = 0.0, failures: int = 0, error: Exception = None):
+        self.delay, self.failures, self.error = delay, failures, error
+        self.calls = self.in_flight = self.max_in_flight = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.calls <= self.failures:
+                raise self.error
+            usage = SimpleNamespace(prompt_tokens=300, completion_tokens=40)
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="{}"))], usage=usage)
+        finally:
+            self.in_flight -= 1
+
+def with_fake(completions, coroutine_factory):
+    original_get_client, original_backoff = llm_gateway.get_client, llm_gateway.LLM_BACKOFF_BASE_SECONDS
+    llm_gateway.get_client = lambda: SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    llm_gateway.LLM_BACKOFF_BASE_SECONDS = 0.0
+    try:
+        return asyncio.run(coroutine_factory())
+    finally:
+        llm_gateway.get_client, llm_gateway.LLM_BACKOFF_BASE_SECONDS = original_get_client, original_backoff
+
+def test_single_pooled_client():
+    assert llm_gateway.get_client() is llm_gateway.get_client()
+
+def test_retries_then_succeeds_and_records_metrics():
+    completions = FakeCompletions(failures=2, error=asyncio.TimeoutError())
+    with_fake(completions, lambda: llm_gateway.chat_completion("test_retry", model="m", messages=[]))
+    metrics = llm_gateway.get_metrics()["test_retry"]
+    assert completions.calls == 3
+    assert metrics["calls"] == 1 and metrics["retries"] == 2 and metrics["errors"] == 0
+    assert metrics["prompt_tokens"]["buckets"]["le_512"] == 1
+
+def test_non_retryable_error_raises_immediately():
+    completions = FakeCompletions(failures=5, error=ValueError("bad request"))
+    try:
+        with_fake(completions, lambda: llm_gateway.chat_completion("test_fail", model="m", messages=[]))
+        assert False, "should raise"
+    except ValueError:
+        pass
+    assert completions.calls == 1 and llm_gateway.get_metrics()["test_fail"]["errors"] == 1
+
+def test_timeout_is_enforced():
+    completions = FakeCompletions(delay=1.0)
+    try:
+        with_fake(completions, lambda: llm_gateway.chat_completion("test_timeout", timeout=0.05, max_retries=1, model="m", messages=[]))
+        assert False, "should time out"
+    except asyncio.TimeoutError:
+        pass
+    assert completions.calls == 2
+
+def test_per_user_and_global_concurrency():
+    async def burst(user_ids):
+        await asyncio.gather(*[llm_gateway.chat_completion("test_burst", user_id=u, model="m", messages=[]) for u in user_ids])
+
+    one_user = FakeCompletions(delay=0.02)
+    with_fake(one_user, lambda: burst(["alice"] * 8))
+    assert one_user.max_in_flight == llm_gateway.LLM_MAX_CONCURRENCY_PER_USER
+
+    original = llm_gateway.LLM_MAX_CONCURRENCY
+    llm_gateway.LLM_MAX_CONCURRENCY = 3
+    try:
+        many_users = FakeCompletions(delay=0.02)
+        with_fake(many_users, lambda: burst([f"user-{i}" for i in range(10)]))
+    finally:
+        llm_gateway.LLM_MAX_CONCURRENCY = original
+    assert many_users.max_in_flight == 3
+    assert llm_gateway._limits["users"] == {}
+
+class FakeStream:
+    """Yields `chunks`, then stalls forever if `stall`; records whether it was closed."""
+    def __init__(self, chunks, stall: bool = False):
+        self.chunks, self.stall, self.closed = list(chunks), stall, False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.chunks:
+            return self.chunks.pop(0)
+        if self.stall:
+            await asyncio.sleep(3600)
+        raise StopAsyncIteration
+
+    async def close(self):
+        self.closed = True
+
+def test_stream_chunk_timeout_and_usage():
+    requests = []
+
+    def streaming(stream):
+        async def create(**kwargs):
+            requests.append(kwargs)
+            return stream
+        return SimpleNamespace(create=create)
+
+    async def consume(purpose, **kwargs):
+        return [chunk async for chunk in llm_gateway.stream_chat_completion(purpose, model="m", messages=[], **kwargs)]
+
+    text = SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content="hi"))], usage=None)
+    final = SimpleNamespace(choices=[], usage=SimpleNamespace(prompt_tokens=300, completion_tokens=40))
+    chunks = with_fake(streaming(FakeStream([text, final])), lambda: consume("test_stream"))
+    assert len(chunks) == 2 and requests[0]["stream_options"] == {"include_usage": True}
+    assert llm_gateway.get_metrics()["test_stream"]["completion_tokens"]["count"] == 1
+
+    stalled = FakeStream([text], stall=True)
+    try:
+        with_fake(streaming(stalled), lambda: consume("test_stall", user_id="alice", timeout=0.05))
+        assert False, "should time out"
+    except asyncio.TimeoutError:
+        pass
+    assert stalled.closed and llm_gateway._limits["users"] == {}
+    assert llm_gateway.get_metrics()["test_stall"]["errors"] == 1
+
+if __name__ == "__main__":
+    test_single_pooled_client()
+    test_retries_then_succeeds_and_records_metrics()
+    test_non_retryable_error_raises_immediately()
+    test_timeout_is_enforced()
+    test_per_user_and_global_concurrency()
+    test_stream_chunk_timeout_and_usage()
+    print("✅ LLM gateway tests passed!")
@@ -0,0 +1,109 @@
+# tests/test_llm_stub_server.py
+import sys
+import os
+import json
+import time
+import socket
+import asyncio
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'AIworkshop2')))
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import uvicorn
+from fastapi.testclient import TestClient
+
+import llm_stub_server
+import llm_gateway
+import simulation
+import vlm
+from budgeter import generate_budget_prompt
+
+SIMULATION_DATA = {
+    "time_horizon_months": 24, "initial_balance": 1000.0, "final_balance": 25000.0,
+    "total_income": 120000.0, "total_expense": 96000.0, "net_savings": 24000.0,
+    "final_fhs": 72.5, "fhs_change": 3.25, "metrics_context": {"avg_income": 5000.0, "avg_spending": 4000.0},
+}
+
+def ask(messages, **body):
+    return TestClient(llm_stub_server.app).post("/v1/chat/completions", json={"model": "gpt-4o-mini", "messages": messages, **body})
+
+def test_canned_answers_match_app_schemas():
+    budget_prompt = generate_budget_prompt({"avg_monthly_income": 5000.0, "accurate_total_spending": 3500.0}, {}, {}, "MYR")
+    budget = json.loads(ask([
+        {"role": "system", "content": "You are a precise JSON output generator for financial planning. Only output the requested JSON object."},
+        {"role": "user", "content": budget_prompt},
+    ]).json()["choices"][0]["message"]["content"])
+    assert abs(sum(item["amount"] for item in budget["budget_allocation"]) - 5000.0) < 0.01
+
+    extraction = ask([
+        {"role": "system", "content": simulation.EXTRACTION_SYSTEM_PROMPT},
+        {"role": "user", "content": "Analyze user question: 'What if I spend 300 more a month?'."},
+    ]).json()
+    assert json.loads(extraction["choices"][0]["message"]["content"])["monthly_impact"] == -300.0
+    assert extraction["usage"]["total_tokens"] > 0
+
+    receipt = ask([{"role": "user", "content": [{"type": "text", "text": "Extract"}, {"type": "image_url", "image_url": {"url": "data:,"}}]}])
+    vlm.VLMResponse.model_validate_json(receipt.json()["choices"][0]["message"]["content"])
+
+def test_streamed_usage_chunk():
+    messages = [{"role": "user", "content": "hi"}]
+    def events(**body):
+        lines = ask(messages, stream=True, **body).text.split("\n\n")
+        return [json.loads(line[len("data: "):]) for line in lines if line.startswith("data: {")]
+
+    with_usage = events(stream_options={"include_usage": True})
+    assert with_usage[-1]["choices"] == [] and with_usage[-1]["usage"]["completion_tokens"] > 0
+    assert all("usage" not in e for e in events())
+
+def test_error_injection():
+    original = dict(llm_stub_server.config)
+    llm_stub_server.config.update(error_rate=0.0, rate_limit_rate=1.0)
+    try:
+        assert ask([{"role": "user", "content": "hi"}]).status_code == 429
+        llm_stub_server.config.update(error_rate=1.0, rate_limit_rate=0.0)
+        assert ask([{"role": "user", "content": "hi"}]).status_code == 500
+    finally:
+        llm_stub_server.config.update(original)
+
+def test_gateway_against_running_stub():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(llm_stub_server.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+
+    original_url, original_client = os.environ.get("OPENAI_API_URL"), llm_gateway._client
+    os.environ["OPENAI_API_URL"] = f"http://127.0.0.1:{port}/v1"
+    llm_gateway._client = None
+
+    async def run():
+        report = await simulation.generate_detailed_report("Can I save more?", SIMULATION_DATA, "Good", currency="MYR")
+        streamed = "".join([piece async for piece in simulation.stream_detailed_report("Could I save more?", SIMULATION_DATA, "MYR")])
+        receipts = await vlm.extract_transactions_from_image("data:image/png;base64,AAAA")
+        return report, streamed, receipts, llm_gateway.get_metrics()["report_stream"]
+
+    try:
+        report, streamed, receipts, stream_metrics = asyncio.run(run())
+        assert "24 months" in report and "RM 24,000.00" in report
+        assert streamed == report
+        assert stream_metrics["completion_tokens"]["count"] >= 1
+        assert [tx["merchant"] for tx in receipts] == ["Stub Cafe", "Stub Employer"]
+    finally:
+        server.should_exit = True
+        thread.join(timeout=5)
+        llm_gateway._client = original_client
+        if original_url is None:
+            os.environ.pop("OPENAI_API_URL", None)
+        else:
+            os.environ["OPENAI_API_URL"] = original_url
+
+if __name__ == "__main__":
+    test_canned_answers_match_app_schemas()
+    test_streamed_usage_chunk()
+    test_error_injection()
+    test_gateway_against_running_stub()
+    print("✅ LLM stub server tests passed!")
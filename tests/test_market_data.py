@@ -0,0 +1,59 @@
+# tests/test_market_data.py
+import sys
+import os
+import datetime
+import tempfile
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'AIworkshop2')))
+
+import market_data
+from market_data import load_prices, read_prices, write_prices, synthetic_prices, update_price_store
+
+TICKERS = {"Stocks": "SPY", "Gold": "GLD"}
+END = datetime.date(2025, 6, 30)
+START = END - datetime.timedelta(days=365)
+
+def test_offline_snapshot_is_deterministic():
+    with tempfile.TemporaryDirectory() as store_dir:
+        first = load_prices(TICKERS, START, END, store_dir=store_dir, offline=True)
+        second = load_prices(TICKERS, START, END, store_dir=store_dir, offline=True)
+
+    assert list(first.columns) == ["Stocks", "Gold"]
+    assert len(first) > 250
+    pd.testing.assert_frame_equal(first, second)
+    # Prices are anchored by date, so a shorter window is a slice of a longer one.
+    shorter = synthetic_prices("SPY", START, END - datetime.timedelta(days=30))
+    pd.testing.assert_series_equal(shorter, first["Stocks"].loc[shorter.index], check_names=False)
+
+def test_store_only_downloads_missing_days():
+    calls = []
+
+    def fake_download(tickers, start, end):
+        calls.append((tuple(tickers), start, end))
+        return pd.DataFrame({t: synthetic_prices(t, start, end) for t in tickers})
+
+    original = market_data.download_prices
+    market_data.download_prices = fake_download
+    try:
+        with tempfile.TemporaryDirectory() as store_dir:
+            old_end = END - datetime.timedelta(days=10)
+            write_prices("SPY", synthetic_prices("SPY", START, old_end), store_dir)
+
+            failed = update_price_store(["SPY", "GLD"], START, END, store_dir)
+            spy = read_prices("SPY", store_dir)
+            gld = read_prices("GLD", store_dir)
+    finally:
+        market_data.download_prices = original
+
+    assert failed == []
+    # SPY only fetches the 10 missing days; GLD (never stored) fetches the full range.
+    assert (("SPY",), old_end + datetime.timedelta(days=1), END) in calls
+    assert (("GLD",), START, END) in calls
+    pd.testing.assert_series_equal(spy, synthetic_prices("SPY", START, END), check_names=False, check_freq=False, check_index_type=False)
+    assert gld.index[-1] == synthetic_prices("GLD", START, END).index[-1]
+
+if __name__ == "__main__":
+    test_offline_snapshot_is_deterministic()
+    test_store_only_downloads_missing_days()
+    print("✅ Market data tests passed!")
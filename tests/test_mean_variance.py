@@ -0,0 +1,82 @@
+# tests/test_mean_variance.py
+import sys
+import os
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'AIworkshop2')))
+
+from returns_data import make_returns_df
+import rl
+import policy_store
+from portfolio import project_to_simplex, mean_variance_weights, evaluate_static_weights, TRADING_DAYS_PER_YEAR
+
+MEANS = np.array([0.0015, 0.0002, 0.0006])
+VOLS = np.array([0.012, 0.003, 0.008])
+
+def objective(returns_df: pd.DataFrame, weights: np.ndarray, risk_aversion: float) -> np.ndarray:
+    mu = returns_df.values.mean(axis=0) * TRADING_DAYS_PER_YEAR
+    cov = np.cov(returns_df.values, rowvar=False) * TRADING_DAYS_PER_YEAR
+    return weights @ mu - risk_aversion / 2 * np.einsum("ij,jk,ik->i", weights, cov, weights)
+
+def test_simplex_projection():
+    w = project_to_simplex(np.array([0.9, -0.3, 0.6, 2.0]))
+    assert np.all(w >= 0) and abs(w.sum() - 1) < 1e-12
+    np.testing.assert_allclose(project_to_simplex(np.array([0.2, 0.3, 0.5])), [0.2, 0.3, 0.5])
+
+def test_mean_variance_beats_every_sampled_portfolio():
+    returns_df = make_returns_df(1500, mean=MEANS, vol=VOLS, start="2022-01-03")
+    candidates = np.random.default_rng(1).dirichlet(np.ones(3), 20000)
+    for risk_aversion in rl.RISK_AVERSION_LEVELS:
+        start = time.perf_counter()
+        weights = mean_variance_weights(returns_df, risk_aversion)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        assert np.all(weights >= 0) and abs(weights.sum() - 1) < 1e-9
+        best = objective(returns_df, weights[np.newaxis], risk_aversion)[0]
+        assert best >= objective(returns_df, candidates, risk_aversion).max() - 1e-9
+        print(f"risk aversion {risk_aversion}: {np.round(weights, 3)} in {elapsed_ms:.2f} ms")
+
+    # More risk aversion never buys a riskier portfolio.
+    cov = np.cov(returns_df.values, rowvar=False)
+    variances = [w @ cov @ w for w in (mean_variance_weights(returns_df, ra) for ra in rl.RISK_AVERSION_LEVELS)]
+    assert all(later <= earlier + 1e-12 for earlier, later in zip(variances, variances[1:]))
+    assert variances[-1] < variances[0]
+
+def test_static_backtest_matches_rl_metrics_schema():
+    returns_df = make_returns_df(200, mean=MEANS, vol=VOLS, start="2022-01-03")
+    result = evaluate_static_weights(returns_df, np.array([0.5, 0.3, 0.2]), 1000.0, start=60)
+    assert len(result["portfolio_history"]) == 141
+    daily = returns_df.values[60:] @ np.array([0.5, 0.3, 0.2])
+    assert abs(result["final_value"] - 1000.0 * np.prod(1 + daily)) < 1e-6
+
+def test_report_engines():
+    returns_df = make_returns_df(1500, mean=MEANS, vol=VOLS, start="2022-01-03")
+    with tempfile.TemporaryDirectory() as policy_dir:
+        original = policy_store.POLICY_DIR, rl.RL_LATENCY_SLO_SECONDS
+        policy_store.POLICY_DIR = policy_dir
+        # No pretrained policy and an SLO no training run can meet: auto must fall back without training.
+        rl.RL_LATENCY_SLO_SECONDS = 0.0
+        try:
+            start = time.perf_counter()
+            explicit = rl.generate_rl_optimization_report(60.0, 5000.0, 200.0, returns_df, engine="mean_variance")
+            auto = rl.generate_rl_optimization_report(60.0, 5000.0, 200.0, returns_df, engine="auto")
+            elapsed = time.perf_counter() - start
+            bad = rl.generate_rl_optimization_report(60.0, 5000.0, 200.0, returns_df, engine="genetic")
+        finally:
+            policy_store.POLICY_DIR, rl.RL_LATENCY_SLO_SECONDS = original
+
+    print(f"Two mean-variance reports in {elapsed:.2f}s")
+    assert explicit["rl_policy"]["source"] == auto["rl_policy"]["source"] == "mean_variance"
+    assert explicit["optimized_weights"] == auto["optimized_weights"]
+    assert set(explicit) == {"personalization", "rl_performance", "optimized_weights", "rl_policy", "mc_forecast"}
+    assert "error" in bad
+
+if __name__ == "__main__":
+    test_simplex_projection()
+    test_mean_variance_beats_every_sampled_portfolio()
+    test_static_backtest_matches_rl_metrics_schema()
+    test_report_engines()
+    print("✅ Mean-variance tests passed!")
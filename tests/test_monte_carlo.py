@@ -0,0 +1,83 @@
+# tests/test_monte_carlo.py
+import sys
+import os
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'AIworkshop2')))
+
+from returns_data import make_returns_df
+from rl import simulate_contribution_paths, run_monte_carlo, stationary_bootstrap_indices, draw_daily_returns
+from rl import MC_TIME_HORIZONS, CONTRIBUTION_INTERVAL_DAYS
+
+def reference_paths(daily_returns: np.ndarray, monthly_contribution: float, sample_days: np.ndarray) -> np.ndarray:
+    """The original day-by-day loop."""
+    out = np.empty((daily_returns.shape[0], len(sample_days)))
+    for sim, returns in enumerate(daily_returns):
+        value, values = 0.0, []
+        for day, r in enumerate(returns):
+            if day % CONTRIBUTION_INTERVAL_DAYS == 0:
+                value += monthly_contribution
+            value *= 1 + r
+            values.append(value)
+        out[sim] = np.array(values)[sample_days]
+    return out
+
+def test_vectorized_paths_match_loop():
+    rng = np.random.default_rng(1)
+    daily_returns = rng.normal(0.0005, 0.01, (20, 1260))
+    sample_days = np.array([0, 252, 504, 756, 1008, 1259])
+
+    expected = reference_paths(daily_returns, 250.0, sample_days)
+    actual = simulate_contribution_paths(daily_returns.copy(), 250.0, sample_days)
+    np.testing.assert_allclose(actual, expected, rtol=1e-10)
+
+def test_monte_carlo_report_shape_and_bands():
+    weights = np.array([0.5, 0.3, 0.2])
+    report = run_monte_carlo(weights, make_returns_df(500, mean=0.0004), 300.0, num_simulations=2500, seed=7)
+
+    assert [row["year"] for row in report["summary_table"]] == MC_TIME_HORIZONS
+    for horizon in MC_TIME_HORIZONS:
+        graph = report["graphs"][f"{horizon}yr"]
+        assert graph["years"] == list(range(horizon + 1))
+        assert all(lo <= mid <= hi for lo, mid, hi in zip(graph["p5"], graph["p50"], graph["p95"]))
+
+    # Horizons share paths: the 5-year path is a prefix of the 25-year path.
+    assert report["graphs"]["5yr"]["values"][:5] == report["graphs"]["25yr"]["values"][:5]
+    # Seeded runs are reproducible.
+    again = run_monte_carlo(weights, make_returns_df(500, mean=0.0004), 300.0, num_simulations=2500, seed=7)
+    assert again["summary_table"] == report["summary_table"]
+
+def test_stationary_bootstrap_blocks():
+    rng = np.random.default_rng(3)
+    idx = stationary_bootstrap_indices(rng, 200, 2000, history_len=500, mean_block_length=20)
+
+    assert idx.min() >= 0 and idx.max() < 500
+    # Within a block the history is walked day by day (wrapping at the end).
+    continues = idx[:, 1:] == (idx[:, :-1] + 1) % 500
+    mean_block_length = continues.size / (~continues).sum()
+    assert 17 < mean_block_length < 23
+
+def test_bootstrap_engines():
+    history = np.array([-0.03, 0.0, 0.01, 0.02])
+    draws = draw_daily_returns("bootstrap", np.random.default_rng(0), history, 10, 100)
+    assert set(np.unique(draws)) <= set(history)
+
+    weights = np.array([0.5, 0.3, 0.2])
+    for engine in ["bootstrap", "block"]:
+        report = run_monte_carlo(weights, make_returns_df(500, mean=0.0004), 300.0, num_simulations=500, seed=11, engine=engine)
+        again = run_monte_carlo(weights, make_returns_df(500, mean=0.0004), 300.0, num_simulations=500, seed=11, engine=engine)
+        assert report["engine"] == engine
+        assert report["summary_table"] == again["summary_table"]
+
+    try:
+        run_monte_carlo(weights, make_returns_df(500, mean=0.0004), 300.0, num_simulations=10, engine="garch")
+        assert False, "unknown engine should raise"
+    except ValueError:
+        pass
+
+if __name__ == "__main__":
+    test_vectorized_paths_match_loop()
+    test_monte_carlo_report_shape_and_bands()
+    test_stationary_bootstrap_blocks()
+    test_bootstrap_engines()
+    print("✅ Monte Carlo tests passed!")
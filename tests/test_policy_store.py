@@ -0,0 +1,88 @@
+# tests/test_policy_store.py
+import sys
+import os
+import time
+import datetime
+import tempfile
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'AIworkshop2')))
+
+from returns_data import make_returns_df
+import rl
+import policy_store
+from policy_store import save_policy, find_policy_path, load_policy
+from rl import PortfolioOptimizationEnv, generate_rl_optimization_report, LOOKBACK_WINDOW
+from stable_baselines3 import PPO
+
+def test_policy_lookup_by_key_and_age():
+    # Deliberately unsorted columns: the store keys on the sorted asset set.
+    returns_df = make_returns_df(400, start="2024-01-01")[["Bonds", "Gold", "Stocks"]]
+    model = PPO("MlpPolicy", PortfolioOptimizationEnv(returns_df, 4.0, LOOKBACK_WINDOW), verbose=0, device="cpu")
+    snapshot = datetime.date(2025, 3, 10)
+
+    with tempfile.TemporaryDirectory() as policy_dir:
+        for days_old in [20, 9, 3]:
+            save_policy(model, 4.0, ["Stocks", "Gold", "Bonds"], snapshot - datetime.timedelta(days=days_old), policy_dir)
+
+        # Only the newest RL_POLICY_KEEP snapshots are kept.
+        assert len(os.listdir(policy_dir)) == policy_store.RL_POLICY_KEEP
+        path = find_policy_path(4.0, ["Bonds", "Gold", "Stocks"], snapshot, policy_dir)
+        assert path.endswith("ra4_Bonds-Gold-Stocks_20250307.zip")
+        assert find_policy_path(4.0, ["Bonds", "Gold", "Stocks"], snapshot, policy_dir, max_age_days=1) is None
+        assert find_policy_path(2.0, ["Bonds", "Gold", "Stocks"], snapshot, policy_dir) is None
+        assert find_policy_path(4.0, ["Bonds", "Gold"], snapshot, policy_dir) is None
+        assert load_policy(4.0, ["Gold", "Stocks", "Bonds"], snapshot, policy_dir) is load_policy(4.0, ["Bonds", "Gold", "Stocks"], snapshot, policy_dir)
+
+def test_report_served_from_pretrained_policy():
+    returns_df = make_returns_df(400, start="2024-01-01")
+    sorted_df = returns_df[sorted(returns_df.columns)]
+    model = PPO("MlpPolicy", PortfolioOptimizationEnv(sorted_df, 4.0, LOOKBACK_WINDOW), verbose=0, device="cpu")
+    snapshot = sorted_df.index[-1].date()
+
+    with tempfile.TemporaryDirectory() as policy_dir:
+        original_dir = policy_store.POLICY_DIR
+        policy_store.POLICY_DIR = policy_dir
+        try:
+            save_policy(model, 4.0, sorted_df.columns.tolist(), snapshot)
+            start = time.perf_counter()
+            # FHS 60 falls in the 4.0 risk bucket.
+            report = generate_rl_optimization_report(60.0, 5000.0, 200.0, returns_df)
+            elapsed = time.perf_counter() - start
+        finally:
+            policy_store.POLICY_DIR = original_dir
+
+    print(f"Report from pretrained policy in {elapsed:.2f}s")
+    assert "error" not in report
+    assert report["rl_policy"] == {"source": "pretrained", "snapshot": snapshot.isoformat()}
+    assert set(report["optimized_weights"]) == {"Bonds", "Gold", "Stocks"}
+    assert abs(sum(report["optimized_weights"].values()) - 100) < 0.1
+
+def test_auto_fallback_trains_in_background():
+    returns_df = make_returns_df(400, start="2024-01-01")
+    snapshot = returns_df.index[-1].date()
+    original = (policy_store.POLICY_DIR, rl.RL_TRAINING_STEPS, rl._training_steps_per_second)
+
+    with tempfile.TemporaryDirectory() as policy_dir:
+        policy_store.POLICY_DIR = policy_dir
+        # A slow assumed rate forces the fallback; the background run measures the real one.
+        rl.RL_TRAINING_STEPS, rl._training_steps_per_second = 256, 1.0
+        try:
+            first = generate_rl_optimization_report(60.0, 5000.0, 200.0, returns_df, engine="auto")
+            for thread in threading.enumerate():
+                if thread.name.startswith("rl-train-"):
+                    thread.join(timeout=120)
+            second = generate_rl_optimization_report(60.0, 5000.0, 200.0, returns_df, engine="auto")
+            measured_rate = rl._training_steps_per_second
+        finally:
+            policy_store.POLICY_DIR, rl.RL_TRAINING_STEPS, rl._training_steps_per_second = original
+
+    assert first["rl_policy"] == {"source": "mean_variance", "snapshot": snapshot.isoformat(), "training": "started"}
+    assert second["rl_policy"] == {"source": "pretrained", "snapshot": snapshot.isoformat()}
+    assert measured_rate > 1.0
+
+if __name__ == "__main__":
+    test_policy_lookup_by_key_and_age()
+    test_report_served_from_pretrained_policy()
+    test_auto_fallback_trains_in_background()
+    print("✅ Policy store tests passed!")
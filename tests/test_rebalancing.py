@@ -0,0 +1,72 @@
+# tests/test_rebalancing.py
+import sys
+import os
+import time
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'AIworkshop2')))
+
+from returns_data import make_returns_df
+from portfolio import parse_rebalance_policies, simulate_rebalancing, DEFAULT_REBALANCE_POLICIES
+
+# Stocks/Bonds/Gold-like daily means and volatilities.
+MEANS = np.array([0.0008, 0.0001, 0.0003])
+VOLS = np.array([0.015, 0.003, 0.009])
+
+def loop_reference(returns: np.ndarray, target: np.ndarray, policy: dict, cost_rate: float) -> float:
+    holdings = target * 1000.0 * (1 - cost_rate)
+    for t, day_returns in enumerate(returns):
+        holdings = holdings * (1 + day_returns)
+        value = holdings.sum()
+        drift = np.abs(holdings / value - target)
+        due = (policy["type"] == "calendar" and (t + 1) % policy["interval_days"] == 0) or \
+              (policy["type"] == "threshold" and drift.max() > policy["band"])
+        if due:
+            value -= cost_rate * value * drift.sum()
+            holdings = target * value
+    return holdings.sum()
+
+def test_parse_policies():
+    policies = parse_rebalance_policies(DEFAULT_REBALANCE_POLICIES)
+    assert [p["type"] for p in policies] == ["none", "calendar", "calendar", "calendar", "threshold", "threshold"]
+    assert policies[1]["interval_days"] == 21 and policies[4]["band"] == 0.05
+    for bad in ["", "calendar:0", "calendar:x", "threshold:1.5", "monthly"]:
+        try:
+            parse_rebalance_policies(bad)
+            assert False, f"'{bad}' should raise"
+        except ValueError:
+            pass
+
+def test_batched_policies_match_loop():
+    returns_df = make_returns_df(756, mean=MEANS, vol=VOLS)
+    target = np.array([0.6, 0.3, 0.1])
+    policies = parse_rebalance_policies(DEFAULT_REBALANCE_POLICIES)
+
+    start = time.perf_counter()
+    report = simulate_rebalancing(returns_df, target, policies, cost_bps=25, initial_value=1000.0)
+    print(f"{len(policies)} policies over {len(returns_df)} days in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    for policy, result in zip(policies, report["policies"]):
+        expected = loop_reference(returns_df.values, target, policy, 25e-4)
+        assert abs(result["final_value"] - expected) < 0.01
+
+    by_name = {r["name"]: r for r in report["policies"]}
+    assert by_name["none"]["rebalances"] == 0
+    assert by_name["calendar:21"]["rebalances"] == 756 // 21
+    assert by_name["calendar:252"]["rebalances"] == 3
+    assert by_name["threshold:0.05"]["rebalances"] >= by_name["threshold:0.1"]["rebalances"]
+    assert len(report["history"]["values"]["none"]) == len(report["history"]["days"])
+
+def test_costs_reduce_value():
+    returns_df = make_returns_df(756, mean=MEANS, vol=VOLS)
+    policies = parse_rebalance_policies("calendar:21")
+    free = simulate_rebalancing(returns_df, [0.6, 0.3, 0.1], policies, cost_bps=0)["policies"][0]
+    costly = simulate_rebalancing(returns_df, [0.6, 0.3, 0.1], policies, cost_bps=50)["policies"][0]
+    assert free["total_costs"] == 0 and costly["total_costs"] > 0
+    assert costly["final_value"] < free["final_value"]
+
+if __name__ == "__main__":
+    test_parse_policies()
+    test_batched_policies_match_loop()
+    test_costs_reduce_value()
+    print("✅ Rebalancing tests passed!")
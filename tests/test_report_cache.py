@@ -0,0 +1,98 @@
+# tests/test_report_cache.py
+import sys
+import os
+import asyncio
+import tempfile
+from types import SimpleNamespace
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'AIworkshop2')))
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import simulation
+import llm_gateway
+from llm_cache import LLMCache
+
+SIMULATION_DATA = {
+    "time_horizon_months": 24, "initial_balance": 1000.0, "final_balance": 25000.0,
+    "total_income": 120000.0, "total_expense": 96000.0, "net_savings": 24000.0,
+    "final_fhs": 72.5, "fhs_change": 3.25, "metrics_context": {"avg_income": 5000.0, "avg_spending": 4000.0},
+    "daily_balances": [1000.0, 1010.0],
+}
+
+def test_report_cache_key():
+    key = simulation.report_cache_key("What if I buy a car for RM1,000 a month?", SIMULATION_DATA, "MYR")
+    noisy = dict(SIMULATION_DATA, final_balance=25000.0000001, daily_balances=[0.0])
+    assert simulation.report_cache_key("what if i buy a car for rm 1k a month", noisy, "MYR") == key
+
+    assert simulation.report_cache_key("What if I buy a car for RM1,000 a month?", dict(SIMULATION_DATA, net_savings=24000.5), "MYR") != key
+    assert simulation.report_cache_key("What if I buy a car for RM1,000 a month?", SIMULATION_DATA, "USD") != key
+    with_mc = dict(SIMULATION_DATA, monte_carlo={"num_paths": 5000, "summary": "RM 1 to RM 2", "probability_of_target": None})
+    assert simulation.report_cache_key("What if I buy a car for RM1,000 a month?", with_mc, "MYR") != key
+
+    original_version = simulation.REPORT_CACHE_VERSION
+    simulation.REPORT_CACHE_VERSION = "bumped"
+    try:
+        assert simulation.report_cache_key("What if I buy a car for RM1,000 a month?", SIMULATION_DATA, "MYR") != key
+    finally:
+        simulation.REPORT_CACHE_VERSION = original_version
+
+def test_report_served_from_cache():
+    calls = []
+
+    async def fake_create(**kwargs):
+        calls.append(kwargs)
+        text = "Your net savings reach $24,000."
+        if kwargs.get("stream"):
+            async def chunks():
+                for piece in [text[:10], text[10:]]:
+                    yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))])
+            return chunks()
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+    async def failing_create(**kwargs):
+        raise RuntimeError("API down")
+
+    async def stream(question, data):
+        return "".join([piece async for piece in simulation.stream_detailed_report(question, data, "MYR")])
+
+    original_cache, original_get_client = simulation.report_cache, llm_gateway.get_client
+    simulation.report_cache = LLMCache()
+    try:
+        llm_gateway.get_client = lambda: SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=failing_create)))
+        fallback = asyncio.run(simulation.generate_detailed_report("Can I save more?", SIMULATION_DATA, "Good", currency="MYR"))
+        assert fallback.startswith("Simulation finished.")
+
+        llm_gateway.get_client = lambda: SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=fake_create)))
+        first = asyncio.run(simulation.generate_detailed_report("Can I save more?", SIMULATION_DATA, "Good", currency="MYR"))
+        retry = asyncio.run(simulation.generate_detailed_report("can i save more", SIMULATION_DATA, "Good", currency="MYR"))
+        streamed = asyncio.run(stream("Can I save more?", SIMULATION_DATA))
+        other = dict(SIMULATION_DATA, net_savings=30000.0)
+        streamed_other = asyncio.run(stream("Can I save more?", other))
+        after_stream = asyncio.run(simulation.generate_detailed_report("Can I save more?", other, "Good", currency="MYR"))
+        stats = simulation.report_cache.stats()
+    finally:
+        simulation.report_cache, llm_gateway.get_client = original_cache, original_get_client
+
+    # One LLM call per distinct simulation; the failure was not cached.
+    assert len(calls) == 2 and calls[1]["stream"] is True
+    assert first == retry == streamed == "Your net savings reach RM24,000."
+    assert streamed_other == after_stream
+    assert stats["hits"] == 3 and stats["misses"] == 3
+
+def test_cache_tables_share_one_file():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "llm_cache.sqlite")
+        LLMCache(path=path).set("q", {"months": 12})
+        LLMCache(ttl_seconds=0, path=path, table="report_cache").set("r", "narrative")
+        assert LLMCache(path=path).get("q") == {"months": 12}
+        try:
+            LLMCache(path=path, table="x; DROP TABLE llm_cache")
+            assert False, "Expected ValueError"
+        except ValueError:
+            pass
+
+if __name__ == "__main__":
+    test_report_cache_key()
+    test_report_served_from_cache()
+    test_cache_tables_share_one_file()
+    print("✅ Report cache tests passed!")
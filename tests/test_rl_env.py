@@ -0,0 +1,83 @@
+# tests/test_rl_env.py
+import sys
+import os
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'AIworkshop2')))
+
+from returns_data import make_returns_df
+import rl
+from rl import PortfolioOptimizationEnv, PandasPortfolioOptimizationEnv, share_returns, make_shared_env, LOOKBACK_WINDOW, RL_MIN_EPISODE_DAYS
+
+def test_array_env_matches_pandas_env():
+    df = make_returns_df(150, columns=4)
+    fast = PortfolioOptimizationEnv(df, risk_aversion=4.0, lookback_window=30)
+    reference = PandasPortfolioOptimizationEnv(df, risk_aversion=4.0, lookback_window=30)
+
+    obs_fast, _ = fast.reset()
+    obs_ref, _ = reference.reset()
+    np.testing.assert_allclose(obs_fast, obs_ref)
+
+    rng = np.random.default_rng(1)
+    done = False
+    while not done:
+        action = rng.uniform(-1, 1, df.shape[1]).astype(np.float32)
+        obs_fast, reward_fast, done, _, _ = fast.step(action)
+        obs_ref, reward_ref, done_ref, _, _ = reference.step(action)
+
+        assert done == done_ref
+        np.testing.assert_allclose(obs_fast, obs_ref, rtol=1e-6)
+        np.testing.assert_allclose(reward_fast, reward_ref, rtol=1e-4, atol=1e-6)
+
+    np.testing.assert_allclose(fast.portfolio_history, reference.portfolio_history, rtol=1e-5)
+    np.testing.assert_allclose(fast.returns_history, reference.returns_history, rtol=1e-5, atol=1e-8)
+    np.testing.assert_allclose(fast.get_final_weights(), reference.get_final_weights(), rtol=1e-6)
+
+    # A second episode starts from a clean state.
+    fast.reset()
+    assert len(fast.returns_history) == 0 and len(fast.portfolio_history) == 1
+
+def test_shared_memory_env_with_random_starts():
+    df = make_returns_df(600, columns=4)
+    shm = share_returns(df)
+    try:
+        env = make_shared_env(shm.name, df.shape, 4.0, 10000.0)()
+        # The env reads the shared block directly instead of holding a copy.
+        assert not env.returns.flags.owndata
+        np.testing.assert_array_equal(env.returns, df.values.astype(np.float32))
+
+        starts = set()
+        for seed in range(20):
+            env.reset(seed=seed)
+            starts.add(env.current_step)
+        assert len(starts) > 1
+        assert min(starts) >= LOOKBACK_WINDOW and max(starts) <= len(df) - RL_MIN_EPISODE_DAYS
+        del env
+    finally:
+        shm.close()
+        shm.unlink()
+
+def test_parallel_training_never_forks():
+    from stable_baselines3.common import vec_env
+
+    start_methods = []
+    original = vec_env.SubprocVecEnv
+
+    def recording_subproc_vec_env(env_fns, start_method=None):
+        start_methods.append(start_method)
+        return original(env_fns, start_method=start_method)
+
+    vec_env.SubprocVecEnv = recording_subproc_vec_env
+    try:
+        _, weights, _ = rl.train_rl_agent(make_returns_df(600, columns=4), 4.0, 10000.0, num_envs=2, total_timesteps=256)
+    finally:
+        vec_env.SubprocVecEnv = original
+
+    assert start_methods and start_methods[0] in ("forkserver", "spawn")
+    assert abs(weights.sum() - 1) < 1e-6
+
+if __name__ == "__main__":
+    test_array_env_matches_pandas_env()
+    test_shared_memory_env_with_random_starts()
+    test_parallel_training_never_forks()
+    print("✅ RL environment tests passed!")
@@ -0,0 +1,74 @@
+# tests/test_rule_extraction.py
+import sys
+import os
+import json
+import time
+import asyncio
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'AIworkshop2')))
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import simulation
+from simulation import parse_simulation_question, RULE_PARSER_MIN_CONFIDENCE
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "simulation_question_corpus.json")
+FIELDS = ["monthly_impact", "one_time_impact", "time_horizon_months", "target_amount"]
+
+def test_corpus_coverage_and_accuracy():
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        corpus = json.load(f)
+
+    start = time.perf_counter()
+    parsed = [parse_simulation_question(item["question"]) for item in corpus]
+    per_question_us = (time.perf_counter() - start) / len(corpus) * 1e6
+
+    covered = [(item, params) for item, (params, confidence) in zip(corpus, parsed) if confidence >= RULE_PARSER_MIN_CONFIDENCE]
+    wrong = [(item["question"], params) for item, params in covered if any(params[k] != item[k] for k in FIELDS)]
+    coverage = len(covered) / len(corpus)
+    print(f"Rules cover {coverage:.0%} of {len(corpus)} questions, {len(covered) - len(wrong)}/{len(covered)} exact, {per_question_us:.0f} us/question")
+
+    # Anything the rules answer must be right; the rest goes to the LLM.
+    assert not wrong, wrong
+    assert coverage >= 0.6
+
+def test_ambiguous_questions_defer_to_llm():
+    for question in ["I want to invest 500 a month", "What if I buy a phone for 3000?", "Cut spending by 15% for 6 months",
+                     "What if I stop paying rent of 1200 a month?", "cancel my gym subscription of 150 a month",
+                     "rent a room out for 800 a month", "pay 1000 a month for 2 years, then 6 months more",
+                     "What if I lose 800 a month of income for 6 months", "what if my income decreases by 500 a month",
+                     "what if my salary drops by 300 a month", "what if I get a pay cut of 600 a month"]:
+        _, confidence = parse_simulation_question(question)
+        assert confidence < RULE_PARSER_MIN_CONFIDENCE, question
+
+def test_income_direction():
+    # A raise is still answered by the rules; a pay cut must never come back positive from them.
+    raise_params, confidence = parse_simulation_question("What if I get a 500 a month raise for 2 years")
+    assert confidence >= RULE_PARSER_MIN_CONFIDENCE and raise_params["monthly_impact"] == 500
+    for question in ["What if I lose 800 a month of income for 6 months", "what if my income decreases by 500 a month"]:
+        params, confidence = parse_simulation_question(question)
+        assert confidence < RULE_PARSER_MIN_CONFIDENCE or params["monthly_impact"] < 0, question
+
+def test_fast_path_skips_llm():
+    calls = []
+
+    async def fake_extract(user_question, user_id=None):
+        calls.append(user_question)
+        return {"simulation_goal": "Invest", "time_horizon_months": 12, "monthly_impact": -500}
+
+    original = simulation.extract_simulation_parameters
+    simulation.extract_simulation_parameters = fake_extract
+    try:
+        fast = asyncio.run(simulation.get_simulation_parameters("Pay RM 900 a month for a car for 9 years"))
+        slow = asyncio.run(simulation.get_simulation_parameters("I want to invest 500 a month"))
+    finally:
+        simulation.extract_simulation_parameters = original
+
+    assert fast["extraction_source"] == "rules" and fast["time_horizon_months"] == 108 and fast["monthly_impact"] == -900
+    assert slow["extraction_source"] == "llm" and calls == ["I want to invest 500 a month"]
+
+if __name__ == "__main__":
+    test_corpus_coverage_and_accuracy()
+    test_ambiguous_questions_defer_to_llm()
+    test_income_direction()
+    test_fast_path_skips_llm()
+    print("✅ Rule-based extraction tests passed!")
@@ -0,0 +1,60 @@
+# tests/test_simulation_batch.py
+import sys
+import os
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'AIworkshop2')))
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from simulation import run_financial_simulation, run_financial_simulation_batch
+
+FHS_REPORT = {"summary": {"latest_fhs": 62.0}}
+LSTM_REPORT = {"forecast_results": [{"forecast_income": 140.0, "forecast_expense": 95.0}]}
+
+def car_grid():
+    """A car at 5 price points x 3 loan terms, paid as a 10% downpayment plus a flat monthly instalment."""
+    scenarios = []
+    for price in [60000, 80000, 100000, 120000, 150000]:
+        for years in [5, 7, 9]:
+            scenarios.append({
+                "name": f"{price // 1000}k over {years}y",
+                "simulation_goal": "buy a car",
+                "monthly_impact": -round(price * 0.9 * (1 + 0.03 * years) / (years * 12), 2),
+                "one_time_impact": -price * 0.1,
+                "time_horizon_months": years * 12,
+                "target_amount": 30000.0,
+            })
+    scenarios.append({"name": "Cut spending", "simulation_goal": "reduce spending", "time_horizon_months": 480})
+    return scenarios
+
+def test_batch_matches_single_runs():
+    scenarios = car_grid()
+    start = time.perf_counter()
+    report = run_financial_simulation_batch(scenarios, FHS_REPORT, LSTM_REPORT, 15000.0, "MYR", baseline_income=6500.0, baseline_expense=3800.0)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    print(f"{len(scenarios)} scenarios in {elapsed_ms:.2f} ms")
+
+    assert len(report["scenarios"]) == len(scenarios)
+    for params, row in zip(scenarios, report["scenarios"]):
+        single = run_financial_simulation(params, FHS_REPORT, LSTM_REPORT, 15000.0, "MYR", baseline_income=6500.0, baseline_expense=3800.0)
+        for key in ["final_balance", "total_income", "total_expense", "net_savings", "final_fhs", "fhs_change", "dti_ratio_impact", "goal_status", "time_horizon_months"]:
+            expected = round(single[key], 2) if key == "final_balance" else single[key]
+            assert row[key] == expected, (params["name"], key, row[key], expected)
+
+def test_months_to_target():
+    scenarios = [
+        {"name": "Saver", "time_horizon_months": 24, "target_amount": 10000.0},
+        {"name": "Loan", "time_horizon_months": 24, "monthly_impact": -2500.0, "target_amount": 10000.0},
+        {"name": "No target", "time_horizon_months": 24},
+    ]
+    report = run_financial_simulation_batch(scenarios, FHS_REPORT, {}, 0.0, baseline_income=5000.0, baseline_expense=3000.0)
+    saver, loan, no_target = report["scenarios"]
+    # Saves 2000 a month, so 10000 is reached at the end of month 5.
+    assert saver["months_to_target"] == 5
+    assert loan["months_to_target"] is None and loan["goal_status"].startswith("Requires")
+    assert no_target["months_to_target"] is None
+
+if __name__ == "__main__":
+    test_batch_matches_single_runs()
+    test_months_to_target()
+    print("✅ Batch simulation tests passed!")
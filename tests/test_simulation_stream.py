@@ -0,0 +1,88 @@
+# tests/test_simulation_stream.py
+import sys
+import os
+import json
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'AIworkshop2')))
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import simulation
+import llm_gateway
+
+REPORT_CHUNKS = ["Your balance grows to $", "12,000 ", "over 12 months; ", "the $", "900 payment ", "is affordable."]
+SIMULATION_DATA = {
+    "time_horizon_months": 12, "initial_balance": 1000.0, "final_balance": 12000.0, "total_income": 60000.0,
+    "total_expense": 49000.0, "net_savings": 11000.0, "final_fhs": 66.0, "fhs_change": -4.0,
+    "metrics_context": {"avg_income": 5000.0, "avg_spending": 3183.33},
+}
+
+def fake_client(chunks):
+    async def create(**kwargs):
+        if not kwargs.get("stream"):
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="".join(chunks)))])
+
+        async def stream():
+            for text in chunks:
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+            yield SimpleNamespace(choices=[])  # usage-only trailer
+        return stream()
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+async def collect(question, data, currency):
+    return [text async for text in simulation.stream_detailed_report(question, data, currency)]
+
+def test_streamed_report_matches_blocking_report():
+    original = llm_gateway.get_client
+    llm_gateway.get_client = lambda: fake_client(REPORT_CHUNKS)
+    try:
+        streamed = asyncio.run(collect("Can I afford a car?", SIMULATION_DATA, "MYR"))
+        blocking = asyncio.run(simulation.generate_detailed_report("Can I afford a car?", SIMULATION_DATA, "Good", currency="MYR"))
+    finally:
+        llm_gateway.get_client = original
+
+    assert len(streamed) == len(REPORT_CHUNKS)
+    assert "".join(streamed) == blocking
+    assert "$" not in blocking and "RM12,000" in blocking
+
+def test_sse_endpoint_sends_numbers_first():
+    import main
+
+    async def fake_budget_analysis(user_id, db, transactions):
+        return {"avg_monthly_income": 5000.0, "accurate_total_spending": 3183.33}
+
+    async def fake_compute(*args, **kwargs):
+        return {"monthly_impact": -900.0, "extraction_source": "rules"}, SIMULATION_DATA, "Good"
+
+    db = MagicMock()
+    db.collection.return_value.where.return_value.order_by.return_value.stream.return_value = [
+        SimpleNamespace(to_dict=lambda: {"transaction_date": "2025-01-01", "type": "Income", "amount": 5000.0})
+    ]
+    originals = main.get_db, main.build_budget_analysis, simulation.compute_simulation, llm_gateway.get_client
+    main.get_db = lambda: db
+    main.build_budget_analysis = fake_budget_analysis
+    simulation.compute_simulation = fake_compute
+    llm_gateway.get_client = lambda: fake_client(REPORT_CHUNKS)
+    main.app.dependency_overrides[main.get_current_user_id] = lambda: "user-1"
+    try:
+        from fastapi.testclient import TestClient
+        response = TestClient(main.app).post("/reports/simulate/stream", params={"user_question": "Car for 900 a month", "currency": "MYR"})
+    finally:
+        main.get_db, main.build_budget_analysis, simulation.compute_simulation, llm_gateway.get_client = originals
+        main.app.dependency_overrides.clear()
+
+    assert response.status_code == 200 and response.headers["content-type"].startswith("text/event-stream")
+    events = [block.split("\n") for block in response.text.strip().split("\n\n")]
+    names = [lines[0][len("event: "):] for lines in events]
+    payloads = [json.loads(lines[1][len("data: "):]) for lines in events]
+
+    assert names[0] == "simulation" and payloads[0]["raw_simulation_data"]["final_balance"] == 12000.0
+    assert names[1:-1] == ["token"] * len(REPORT_CHUNKS) and names[-1] == "done"
+    assert "".join(p["text"] for p in payloads[1:-1]).count("RM") == 2
+
+if __name__ == "__main__":
+    test_streamed_report_matches_blocking_report()
+    test_sse_endpoint_sends_numbers_first()
+    print("✅ Simulation streaming tests passed!")
@@ -0,0 +1,82 @@
+# tests/test_simulation_vectorized.py
+import sys
+import os
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'AIworkshop2')))
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from simulation import run_financial_simulation, MAX_SIMULATION_MONTHS
+
+FHS_REPORT = {"summary": {"latest_fhs": 70.0}}
+LSTM_REPORT = {"forecast_results": [{"forecast_income": 140.0, "forecast_expense": 95.0}]}
+
+def loop_reference(params, initial_fhs, initial_balance, monthly_income, monthly_expense):
+    """The original day-by-day engine, kept here as the parity oracle."""
+    days = params["time_horizon_months"] * 30
+    monthly_impact = params.get("monthly_impact", 0.0)
+    dti_ratio = abs(monthly_impact) / monthly_income if monthly_impact < 0 else 0.0
+    current_balance = initial_balance + params.get("one_time_impact", 0.0)
+    current_fhs = initial_fhs
+    total_income = total_expense = 0.0
+    balances, fhs_scores = [current_balance], [current_fhs]
+    if monthly_impact < 0:
+        current_fhs = max(0.0, current_fhs - (5.0 + dti_ratio * 25.0))
+
+    for d in range(1, days + 1):
+        income = monthly_income / 30.0
+        expense = monthly_expense / 30.0 - monthly_impact / 30.0
+        if params.get("simulation_goal") == "reduce spending":
+            expense *= 0.90
+        net_flow = income - expense
+        current_balance += net_flow
+        total_income += income
+        total_expense += expense
+        if d % 30 == 0 or d == days:
+            balances.append(current_balance)
+        growth_multiplier = max(0.0, 1.0 - (dti_ratio * 3.0))
+        flow_impact = (net_flow / 1000.0) * 0.03 * growth_multiplier
+        debt_pressure = -0.05 * dti_ratio if monthly_impact < 0 else 0.0
+        current_fhs = max(0.0, min(100.0, current_fhs + flow_impact + debt_pressure))
+        if d % 30 == 0 or d == days:
+            fhs_scores.append(current_fhs)
+    return current_balance, current_fhs, total_income, total_expense, balances, fhs_scores
+
+def test_parity_with_day_loop():
+    scenarios = [
+        ({"simulation_goal": "buy a car", "time_horizon_months": 60, "monthly_impact": -900.0}, 70.0, 20000.0, 4205.0, 1061.0),
+        ({"simulation_goal": "reduce spending", "time_horizon_months": 24}, 55.0, 1500.0, 3000.0, 2900.0),
+        # Saturates at 100 within the horizon.
+        ({"simulation_goal": "side income", "time_horizon_months": 120, "monthly_impact": 2500.0}, 90.0, 0.0, 9000.0, 2000.0),
+        # Debt drives the score to 0 and the balance negative.
+        ({"simulation_goal": "mortgage", "time_horizon_months": 480, "monthly_impact": -3500.0, "one_time_impact": -40000.0}, 40.0, 50000.0, 5000.0, 2500.0),
+        # Out-of-range starting score is clamped on the first day, as the loop did.
+        ({"simulation_goal": "rent", "time_horizon_months": 6, "monthly_impact": -200.0}, 130.0, 100.0, 3000.0, 1000.0),
+    ]
+    for params, initial_fhs, balance, income, expense in scenarios:
+        result = run_financial_simulation(params, {"summary": {"latest_fhs": initial_fhs}}, LSTM_REPORT, balance,
+                                          baseline_income=income, baseline_expense=expense)
+        final_balance, final_fhs, total_income, total_expense, balances, fhs_scores = loop_reference(params, initial_fhs, balance, income, expense)
+
+        assert result["final_balance"] == final_balance
+        assert result["final_fhs"] == round(final_fhs, 2)
+        assert result["total_income"] == round(total_income, 2)
+        assert result["total_expense"] == round(total_expense, 2)
+        assert result["daily_balances"] == [round(b, 2) for b in balances]
+        assert result["daily_fhs"] == [round(f, 2) for f in fhs_scores]
+
+def test_forty_year_horizon():
+    params = {"simulation_goal": "retirement", "time_horizon_months": 1000, "monthly_impact": -500.0}
+    start = time.perf_counter()
+    result = run_financial_simulation(params, FHS_REPORT, LSTM_REPORT, 10000.0, baseline_income=5000.0, baseline_expense=3000.0)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    print(f"{MAX_SIMULATION_MONTHS}-month simulation in {elapsed_ms:.2f} ms")
+
+    assert result["time_horizon_months"] == MAX_SIMULATION_MONTHS
+    assert len(result["daily_balances"]) == MAX_SIMULATION_MONTHS + 1
+    assert abs(result["net_savings"] - 1500.0 * MAX_SIMULATION_MONTHS) < 1e-3
+
+if __name__ == "__main__":
+    test_parity_with_day_loop()
+    test_forty_year_horizon()
+    print("✅ Vectorized simulation tests passed!")
@@ -0,0 +1,54 @@
+# tests/test_stat_forecast.py
+import sys
+import os
+import time
+from datetime import date, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'AIworkshop2')))
+
+from lstm import generate_lstm_forecast, preprocess_transactions, FORECAST_DAYS
+from stat_forecast import generate_stat_forecast, STAT_ENGINES
+
+def make_low_data_transactions(days: int = 20):
+    start = date(2025, 3, 1)
+    transactions = [{"transaction_date": start.isoformat(), "amount": 3000, "type": "Income"}]
+    for i in range(days):
+        day = start + timedelta(days=i)
+        # Heavier spending on weekends
+        amount = 80 if day.weekday() >= 5 else 30
+        transactions.append({"transaction_date": day.isoformat(), "amount": amount, "type": "Expense"})
+    return transactions
+
+def test_stat_engines_schema():
+    daily_summary = preprocess_transactions(make_low_data_transactions())
+
+    for engine in STAT_ENGINES:
+        start = time.perf_counter()
+        report = generate_stat_forecast(daily_summary, engine)
+        elapsed_us = (time.perf_counter() - start) * 1e6
+        print(f"{engine}: {elapsed_us:.0f} us, {report['summary']}")
+
+        assert len(report["forecast_results"]) == FORECAST_DAYS
+        assert set(report["forecast_results"][0]) == {"date", "forecast_income", "forecast_expense", "forecast_balance"}
+        last = report["forecast_results"][-1]
+        assert abs(last["forecast_balance"] - report["summary"]["forecast_end_balance"]) < 0.01
+
+def test_seasonal_naive_repeats_salary_and_weekends():
+    report = generate_stat_forecast(preprocess_transactions(make_low_data_transactions()), "seasonal_naive")
+
+    for row in report["forecast_results"]:
+        day = date.fromisoformat(row["date"])
+        assert row["forecast_income"] == (3000.0 if day.day == 1 else 0.0)
+        assert row["forecast_expense"] == (80.0 if day.weekday() >= 5 else 30.0)
+
+def test_auto_engine_selects_stat_for_low_data():
+    report = generate_lstm_forecast(make_low_data_transactions())
+    assert "Statistical forecast (seasonal_naive)" in report["summary"]["model_notes"]
+
+    assert "error" in generate_lstm_forecast(make_low_data_transactions(), engine="prophet")
+
+if __name__ == "__main__":
+    test_stat_engines_schema()
+    test_seasonal_naive_repeats_salary_and_weekends()
+    test_auto_engine_selects_stat_for_low_data()
+    print("✅ Statistical forecast tests passed!")